@@ -0,0 +1,133 @@
+"""Benchmark đọc phản hồi w-locdsnhomto: resp.json() toàn bộ so với đọc dần (qldt.streaming).
+
+Mỗi cách chạy trong một tiến trình con riêng để đo đỉnh RSS độc lập; đỉnh bộ nhớ
+Python (tracemalloc) đo ở một lượt chạy riêng, không tính vào thời gian.
+Truyền tệp phản hồi đã lưu (--payload) hoặc sinh ngẫu nhiên -n nhóm tổ.
+
+    python benchmarks/bench_sections_parse.py --payload w-locdsnhomto.json
+    python benchmarks/bench_sections_parse.py -n 100000 --json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'streamlit'))
+
+from mock_ftugate import synthetic_row, synthetic_subjects  # noqa: E402
+from qldt import streaming  # noqa: E402
+from qldt.columnar import SectionTable  # noqa: E402
+
+CHUNK = 64 * 1024
+
+
+def synthetic_payload(path, n, seed=0):
+    """Ghi một phản hồi giả lập có cùng cấu trúc (kể cả các trường ứng dụng không dùng)"""
+    rng = random.Random(seed)
+    subjects = synthetic_subjects(n)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"data":{"ds_nhom_to":[')
+        for i in range(n):
+            if i:
+                f.write(',')
+            json.dump(synthetic_row(rng, i, subjects), f, ensure_ascii=False)
+        f.write('],"ds_mon_hoc":')
+        json.dump([{'ma': ma, 'ten': ten, 'so_tc': 3, 'ds_lop': []} for ma, ten in subjects], f, ensure_ascii=False)
+        f.write('},"result":true,"code":200,"message":null}')
+
+
+def chunks_of(path):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+
+def parse_json(path):
+    """Cách hiện tại: resp.content (cả body) -> resp.json() -> SectionTable.from_records"""
+    body = b''.join(chunks_of(path))
+    data = json.loads(body).get('data', {})
+    return SectionTable.from_records(data.get('ds_nhom_to', []), data.get('ds_mon_hoc', []))
+
+
+MODES = {
+    'json': parse_json,
+    'stream': lambda path: streaming.parse_sections(chunks_of(path)),
+}
+
+
+def run_child(mode, path, repeat):
+    """Chạy trong tiến trình con: in kết quả JSON của một cách đọc"""
+    parse = MODES[mode]
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        table = parse(path)
+        best = min(best, time.perf_counter() - t0)
+        del table
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    table = parse(path)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(json.dumps({
+        'mode': mode, 'rows': len(table), 'parse_s': best,
+        'traced_peak_mb': traced_peak / 2**20,
+        # ru_maxrss tính bằng KB trên Linux
+        'rss_growth_mb': (peak_rss - base_rss) / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--payload', help='tệp JSON phản hồi w-locdsnhomto đã lưu')
+    parser.add_argument('-n', type=int, default=50000, help='số nhóm tổ sinh ngẫu nhiên khi không có --payload')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help='in kết quả dạng JSON')
+    parser.add_argument('--child', choices=list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.payload, args.repeat)
+        return
+
+    path = args.payload
+    tmp = None
+    if not path:
+        tmp = tempfile.NamedTemporaryFile(suffix='.json', delete=False)
+        tmp.close()
+        path = tmp.name
+        synthetic_payload(path, args.n)
+    try:
+        results = {'payload': args.payload or 'synthetic', 'payload_mb': os.path.getsize(path) / 2**20, 'modes': []}
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', mode, '--payload', path,
+                 '--repeat', str(args.repeat)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results['modes'].append(json.loads(out))
+    finally:
+        if tmp:
+            os.unlink(path)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print(f"payload: {results['payload']} ({results['payload_mb']:.1f} MB)")
+        print(f"{'mode':>14} {'rows':>8} {'parse_s':>9} {'traced_peak_mb':>15} {'rss_growth_mb':>14}")
+        for r in results['modes']:
+            print(f"{r['mode']:>14} {r['rows']:>8} {r['parse_s']:>9.3f} {r['traced_peak_mb']:>15.1f} {r['rss_growth_mb']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+"""Bộ benchmark các luồng chính của ứng dụng trên server giả lập (mock_ftugate), không cần FTUGate thật.
+
+Đo: khởi động nguội của ứng dụng Streamlit (tiến trình mới tới lần vẽ đầu tiên), đăng nhập,
+tải + đọc danh sách lớp (đọc dần và resp.json()), dựng chỉ mục và tìm kiếm, đăng ký hàng loạt
+(tuần tự và song song) và xuất dữ liệu theo từng định dạng. Mỗi kích thước
+danh sách lớp trong --sections được đo riêng. Kết quả dạng JSON (--output / --json) có kèm
+phiên bản mã nguồn để so sánh giữa các lần thay đổi.
+
+    python benchmarks/bench_suite.py --sections 100 1000 10000 50000 --output bench.json
+    python benchmarks/bench_suite.py --latency 40 --jitter 10 --register-fail-rate 0.2
+    python benchmarks/bench_suite.py --base-url http://127.0.0.1:8765 --only catalogue search
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'streamlit'))
+
+from mock_ftugate import MockFTUGate, parse_endpoint_latency  # noqa: E402
+from qldt.api import QLDTApi  # noqa: E402
+from qldt.batch import DEFAULT_WORKERS, register_batch  # noqa: E402
+from qldt.cart import CartEntry  # noqa: E402
+from qldt.columnar import SectionTable  # noqa: E402
+from qldt.export import FORMATS, available  # noqa: E402
+from qldt.search import SectionIndex  # noqa: E402
+from qldt.stats import percentile  # noqa: E402
+from qldt.transport import Transport  # noqa: E402
+
+BENCHES = ('startup', 'login', 'catalogue', 'search', 'register', 'export')
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'streamlit', 'edit.py')
+# Các module nặng cần theo dõi: trang chưa đăng nhập không nên nạp chúng
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'openpyxl', 'xlsxwriter', 'requests')
+
+# Chạy trong tiến trình mới: vẽ trang chưa đăng nhập, chạy lại một lần, rồi đăng nhập (AppTest,
+# không qua trình duyệt). In JSON: thời điểm vẽ xong lần đầu và thời gian từng bước.
+_STARTUP_CHILD = '''
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+import_ms = (time.perf_counter() - t0) * 1000
+app_path, username, password, heavy = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4].split(',')
+at = AppTest.from_file(app_path, default_timeout=60)
+t0 = time.perf_counter()
+at.run()
+first_paint_ms, painted_at = (time.perf_counter() - t0) * 1000, time.time()
+modules = [m for m in heavy if m in sys.modules]
+t0 = time.perf_counter()
+at.run()
+rerun_ms = (time.perf_counter() - t0) * 1000
+at.sidebar.text_input[0].input(username)
+at.sidebar.text_input[1].input(password)
+at.sidebar.button[0].click()
+t0 = time.perf_counter()
+at.run()
+login_ms = (time.perf_counter() - t0) * 1000
+print(json.dumps({
+    'import_ms': import_ms, 'first_paint_ms': first_paint_ms, 'painted_at': painted_at, 'rerun_ms': rerun_ms,
+    'login_ms': login_ms, 'modules': modules, 'login_modules': [m for m in heavy if m in sys.modules],
+    'errors': [e.value for e in at.exception],
+}))
+'''
+
+
+class Timings(list):
+    """Danh sách ms của các lần chạy thành công, kèm số lần lỗi (server giả lập có thể trả lỗi)"""
+    errors = 0
+
+
+def timed(func, repeat):
+    """(kết quả thành công gần nhất, Timings)"""
+    timings = Timings()
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        try:
+            result = func()
+        except Exception:
+            timings.errors += 1
+            continue
+        timings.append((time.perf_counter() - t0) * 1000)
+    return result, timings
+
+
+def retry(func, attempts=5):
+    """Gọi func tới khi thành công (bước chuẩn bị, không tính vào kết quả)"""
+    for attempt in range(attempts):
+        try:
+            return func()
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+
+
+def record(name, timings, **extra):
+    return dict({
+        'bench': name,
+        'n': len(timings),
+        'errors': getattr(timings, 'errors', 0),
+        'mean_ms': sum(timings) / len(timings) if timings else None,
+        'p50_ms': percentile(timings, 50),
+        'p95_ms': percentile(timings, 95),
+        'min_ms': min(timings) if timings else None,
+        'max_ms': max(timings) if timings else None,
+    }, **extra)
+
+
+def search_queries(table):
+    """Các kiểu truy vấn người dùng hay gõ: đúng mã môn, tiền tố mã, một từ trong tên, mã + nhóm"""
+    codes = sorted({(table.value('ma_mon', i) or '').strip() for i in range(min(len(table), 500))})
+    code = codes[len(codes) // 2] if codes else 'SUB'
+    return [code, code[:4], 'môn học số 1', f"{code} 01", 'kinh te']
+
+
+def bench_startup(base_url, args):
+    """Khởi động nguội: mỗi lần một tiến trình Python mới chạy edit.py qua AppTest"""
+    # QLDT_SNAPSHOT_PATH rỗng tắt hẳn bản lưu trên đĩa: bỏ biến thì ứng dụng dùng đường dẫn mặc định,
+    # vừa đọc bản cũ (không còn là khởi động nguội) vừa ghi danh sách lớp giả lập vào cache thật
+    env = dict(os.environ, QLDT_BASE_URL=base_url, QLDT_PROXY='', QLDT_SNAPSHOT_PATH='')
+    for name in ('QLDT_METRICS_PATH', 'QLDT_METRICS_PORT'):
+        env.pop(name, None)
+    cold, import_ms, first_paint, rerun, login = Timings(), [], [], [], []
+    runs = []
+    for _ in range(args.repeat):
+        spawned_at = time.time()
+        proc = subprocess.run(
+            [sys.executable, '-c', _STARTUP_CHILD, APP_PATH, args.username, args.password, ','.join(HEAVY_MODULES)],
+            env=env, capture_output=True, text=True, timeout=300,
+        )
+        try:
+            run = json.loads(proc.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            cold.errors += 1
+            continue
+        if run['errors']:
+            cold.errors += 1
+            continue
+        runs.append(run)
+        cold.append((run['painted_at'] - spawned_at) * 1000)
+        import_ms.append(run['import_ms'])
+        first_paint.append(run['first_paint_ms'])
+        rerun.append(run['rerun_ms'])
+        login.append(run['login_ms'])
+    if not runs and cold.errors:
+        return [{'bench': 'startup', 'skipped': (proc.stderr.strip().splitlines() or ['lỗi không rõ'])[-1]}]
+    last = runs[-1] if runs else {}
+    return [
+        record('startup.cold', cold, modules=','.join(last.get('modules', ())) or '-'),
+        record('startup.import', import_ms),
+        record('startup.first_paint', first_paint),
+        record('startup.rerun', rerun),
+        record('startup.login', login, modules=','.join(last.get('login_modules', ())) or '-'),
+    ]
+
+
+def bench_login(api, args):
+    _, timings = timed(lambda: api.login(args.username, args.password), args.repeat)
+    return [record('login', timings)]
+
+
+def bench_catalogue(api, token, sections, args):
+    table, stream_ms = timed(lambda: api.get_section_table(token), args.repeat)
+
+    def via_json():
+        data = api.get_sections(token)
+        return SectionTable.from_records(data['ds_nhom_to'], data['ds_mon_hoc'])
+    _, json_ms = timed(via_json, args.repeat)
+    table = table or retry(lambda: api.get_section_table(token))
+    return table, [
+        record('catalogue.stream', stream_ms, sections=sections, rows=len(table)),
+        record('catalogue.json', json_ms, sections=sections, rows=len(table)),
+    ]
+
+
+def bench_search(table, sections, args):
+    index, build_ms = timed(lambda: SectionIndex(table), max(1, args.repeat // 2))
+    results = [record('search.index_build', build_ms, sections=sections)]
+    for query in search_queries(table):
+        (top, hits), query_ms = timed(lambda: index.search(query, limit=200), args.repeat * 5)
+        results.append(record('search.query', query_ms, sections=sections, query=query, hits=len(hits)))
+        # Ứng dụng xếp hạng toàn bộ lớp khớp một lần mỗi truy vấn rồi phân trang
+        _, rank_ms = timed(lambda: index.search(query, limit=None), args.repeat * 5)
+        results.append(record('search.rank_all', rank_ms, sections=sections, query=query, hits=len(hits)))
+    return results
+
+
+def bench_register(api, token, table, args):
+    classes = [CartEntry.from_section(table[i]) for i in range(min(args.cart, len(table)))]
+    results = []
+    for workers in sorted({1, DEFAULT_WORKERS}):
+        batch_ms, request_ms, ok = [], [], 0
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            batch = list(register_batch(api.register_course, token, classes, workers))
+            batch_ms.append((time.perf_counter() - t0) * 1000)
+            request_ms += [r['elapsed_ms'] for r in batch]
+            ok += sum(1 for r in batch if r['ok'])
+        results.append(record('register.batch', batch_ms, workers=workers, cart=len(classes),
+                              request_p50_ms=percentile(request_ms, 50),
+                              request_p95_ms=percentile(request_ms, 95),
+                              success_rate=ok / (len(classes) * args.repeat) if classes else None))
+    return results
+
+
+def bench_export(api, token, args):
+    _, fetch_ms = timed(lambda: api.get_registered_courses(token), args.repeat)
+    courses_data = retry(lambda: api.get_registered_courses(token))
+    results = [record('courses.fetch', fetch_ms, courses=len(courses_data.get('courses', [])))]
+    for name, fmt in FORMATS.items():
+        if not available(name):
+            results.append({'bench': 'export', 'format': name, 'skipped': 'thiếu thư viện: ' + ', '.join(fmt.requires)})
+            continue
+        sizes = []
+
+        def write():
+            out = io.BytesIO()
+            fmt.writer(courses_data, out)
+            sizes.append(len(out.getvalue()))
+        _, export_ms = timed(write, args.repeat)
+        results.append(record('export', export_ms, format=name, courses=len(courses_data.get('courses', [])),
+                              bytes=sizes[-1]))
+    return results
+
+
+def source_version():
+    """Commit hiện tại của mã nguồn (kèm '-dirty' nếu có thay đổi chưa commit), None nếu không phải git"""
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=root, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    benches = set(args.only or BENCHES)
+    mock = None
+    if args.base_url:
+        base_url = args.base_url
+    else:
+        mock = MockFTUGate(
+            sections=args.sections[0], latency_ms=args.latency, jitter_ms=args.jitter,
+            endpoint_latency=parse_endpoint_latency(args.endpoint_latency), error_rate=args.error_rate,
+            register_fail_rate=args.register_fail_rate, registered=args.registered, seed=args.seed,
+        ).start()
+        base_url = mock.url
+    api = QLDTApi(Transport(proxy=None, compress=not args.no_gzip), base_url=base_url)
+    results = []
+    try:
+        if 'startup' in benches:
+            results += bench_startup(base_url, args)
+        if 'login' in benches:
+            results += bench_login(api, args)
+        token = retry(lambda: api.login(args.username, args.password))['access_token']
+        table = None
+        for sections in (args.sections if mock else [None]):
+            if mock and sections != len(mock.sections):
+                mock.set_sections(sections)
+            if benches & {'catalogue', 'search', 'register'}:
+                if 'catalogue' in benches:
+                    table, catalogue_results = bench_catalogue(api, token, sections, args)
+                    results += catalogue_results
+                else:
+                    table = retry(lambda: api.get_section_table(token))
+            if 'search' in benches:
+                results += bench_search(table, sections or len(table), args)
+        if 'register' in benches:
+            results += bench_register(api, token, table, args)
+        if 'export' in benches:
+            results += bench_export(api, token, args)
+    finally:
+        if mock:
+            mock.stop()
+    return {
+        'meta': {
+            'at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'version': source_version(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'base_url': args.base_url or 'mock',
+            'args': {k: v for k, v in vars(args).items() if k not in ('password', 'output', 'json')},
+            'mock': {'requests': mock.requests, 'injected_errors': mock.injected_errors} if mock else None,
+        },
+        'results': results,
+    }
+
+
+def print_table(report):
+    meta = report['meta']
+    print(f"version {meta['version']} · python {meta['python']} · {meta['base_url']}")
+    print(f"{'bench':<20} {'params':<34} {'n':>4} {'err':>4} {'p50_ms':>9} {'p95_ms':>9} {'mean_ms':>9}")
+    for r in report['results']:
+        if r.get('skipped'):
+            print(f"{r['bench']:<20} {r.get('format', ''):<34} {'':>4} {'':>4} {r['skipped']}")
+            continue
+        params = ' '.join(f"{k}={v}" for k, v in r.items()
+                          if k not in ('bench', 'n', 'errors', 'mean_ms', 'p50_ms', 'p95_ms', 'min_ms', 'max_ms')
+                          and not k.startswith('request_') and k != 'success_rate')
+        if not r['n']:
+            print(f"{r['bench']:<20} {params[:34]:<34} {0:>4} {r['errors']:>4}")
+            continue
+        print(f"{r['bench']:<20} {params[:34]:<34} {r['n']:>4} {r['errors']:>4} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['mean_ms']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sections', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='các kích thước danh sách lớp cần đo (số nhóm tổ)')
+    parser.add_argument('--only', nargs='+', choices=BENCHES, help='chỉ chạy các benchmark này')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--cart', type=int, default=10, help='số lớp trong mỗi lô đăng ký')
+    parser.add_argument('--registered', type=int, default=30, help='số môn đã đăng ký (dữ liệu xuất)')
+    parser.add_argument('--latency', type=float, default=0.0, help='độ trễ giả lập mỗi request (ms)')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--endpoint-latency', action='append', metavar='ENDPOINT=MS')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--register-fail-rate', type=float, default=0.0)
+    parser.add_argument('--no-gzip', action='store_true', help='không xin phản hồi nén')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--base-url', help='dùng server có sẵn (ví dụ mock_ftugate.py chạy riêng) thay vì tự khởi động')
+    parser.add_argument('--username', default='sv')
+    parser.add_argument('--password', default='benchmark')
+    parser.add_argument('--output', help='ghi kết quả JSON ra tệp')
+    parser.add_argument('--json', action='store_true', help='in kết quả dạng JSON')
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_table(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Benchmark bộ phân tích tkb so với cách tách chuỗi cũ.
+
+Dùng dữ liệu thật: truyền tệp JSON lưu từ w-locdsnhomto / w-locdskqdkmhsinhvien
+(mọi trường 'tkb' đều được lấy ra) hoặc tệp văn bản mỗi dòng một chuỗi tkb.
+Không có tệp thì sinh ngẫu nhiên một bộ chuỗi cùng định dạng.
+
+    python benchmarks/bench_tkb.py --corpus ds_nhom_to.json
+    python benchmarks/bench_tkb.py -n 50000 --json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'streamlit'))
+
+from qldt.tkb import parse_tkb, summarize_slots  # noqa: E402
+
+WEEKDAYS = ['Thứ 2', 'Thứ 3', 'Thứ 4', 'Thứ 5', 'Thứ 6', 'Thứ 7', 'Chủ nhật']
+
+
+def synthetic_corpus(n, seed=0):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.choice((1, 1, 2, 3))):
+            start = rng.randint(1, 12)
+            parts.append(
+                f"{rng.choice(WEEKDAYS)},tiết {start}-{start + rng.randint(1, 3)},"
+                f"Phòng {rng.choice('ABCDG')}{rng.randint(100, 999)},GV Nguyễn Văn {rng.choice('ABCDEGHK')},"
+                f"{rng.randint(1, 28):02d}/0{rng.randint(1, 9)}/25 đến {rng.randint(1, 28):02d}/12/25"
+            )
+        corpus.append('<hr>'.join(parts))
+    return corpus
+
+
+def load_corpus(path):
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return [line for line in text.splitlines() if line.strip()]
+    found = []
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if isinstance(node.get('tkb'), str):
+                found.append(node['tkb'])
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return found
+
+
+def legacy_split(tkb):
+    """Cách làm cũ trong get_registered_courses và vòng render"""
+    lecturer = ''
+    if 'GV ' in tkb:
+        parts = tkb.split('GV ')
+        if len(parts) > 1:
+            lecturer = parts[1].split(',')[0].strip()
+    schedule = ''
+    if tkb:
+        first = tkb.split('<hr>')[0]
+        if 'tiết' in first:
+            schedule = first.split(',GV')[0] if ',GV' in first else first
+    fragments = [p.strip() for p in tkb.split('<hr>') if p.strip()]
+    return lecturer, schedule, fragments
+
+
+def timed(fn, corpus, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for tkb in corpus:
+            fn(tkb)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', help='tệp JSON phản hồi API hoặc tệp văn bản mỗi dòng một tkb')
+    parser.add_argument('-n', type=int, default=20000, help='số chuỗi sinh ngẫu nhiên khi không có --corpus')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help='in kết quả dạng JSON')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.n)
+    parse_uncached = parse_tkb.__wrapped__
+
+    results = {
+        'corpus': args.corpus or 'synthetic',
+        'strings': len(corpus),
+        'unique': len(set(corpus)),
+        'legacy_split_s': timed(legacy_split, corpus, args.repeat),
+        'parse_s': timed(lambda t: summarize_slots(parse_uncached(t)), corpus, args.repeat),
+    }
+    parse_tkb.cache_clear()
+    for tkb in corpus:
+        parse_tkb(tkb)
+    results['cached_reuse_s'] = timed(parse_tkb, corpus, args.repeat)
+    parsed = [parse_uncached(t) for t in corpus]
+    slots = [s for p in parsed for s in p]
+    results['slots'] = len(slots)
+    results['unparsed_weekday'] = sum(1 for s in slots if s.weekday is None)
+    results['unparsed_period'] = sum(1 for s in slots if s.start_period is None)
+    results['parse_us_per_string'] = results['parse_s'] / max(len(corpus), 1) * 1e6
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for key, value in results.items():
+            print(f"{key:>22}: {value:.4f}" if isinstance(value, float) else f"{key:>22}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+"""Server giả lập FTUGate cho benchmark và chạy thử không cần server thật lẫn proxy.
+
+Có đủ các endpoint ứng dụng dùng: đăng nhập/đăng xuất, danh sách môn đã đăng ký
+(w-locdskqdkmhsinhvien), danh sách nhóm tổ (w-locdsnhomto) và đăng ký (w-xulydkmhsinhvien).
+Độ trễ, tỉ lệ lỗi HTTP, tỉ lệ đăng ký thất bại và số nhóm tổ đều cấu hình được.
+
+    python benchmarks/mock_ftugate.py --port 8765 --sections 50000 --latency 80 --jitter 20
+    QLDT_BASE_URL=http://127.0.0.1:8765 QLDT_PROXY= streamlit run streamlit/edit.py
+"""
+import argparse
+import base64
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+LOGIN_PATH = '/api/auth/login'
+LOGOUT_PATH = '/api/auth/logout'
+REGISTERED_PATH = '/cq/hanoi/api/dkmh/w-locdskqdkmhsinhvien'
+SECTIONS_PATH = '/cq/hanoi/api/dkmh/w-locdsnhomto'
+REGISTER_PATH = '/cq/hanoi/api/dkmh/w-xulydkmhsinhvien'
+
+TOKEN_LIFETIME = 3600
+
+
+def synthetic_subjects(n):
+    """Danh sách (mã môn, tên môn): khoảng 40 nhóm tổ mỗi môn"""
+    return [(f"SUB{i:03d}", f"Môn học số {i}") for i in range(max(n // 40, 1))]
+
+
+def synthetic_row(rng, i, subjects):
+    """Một phần tử ds_nhom_to có cùng cấu trúc với phản hồi thật (kể cả các trường ứng dụng không dùng)"""
+    ma, _ = rng.choice(subjects)
+    start = rng.randint(1, 12)
+    return {
+        'id_to_hoc': str(100000 + i), 'id_mon': str(rng.randint(1, 5000)), 'ma_mon': ma + ' ',
+        'nhom_to': f"{rng.randint(1, 30):02d}", 'to': '', 'so_tc': str(rng.choice((2, 3, 4))),
+        'lop': f"K{rng.randint(60, 64)}", 'sl_cp': rng.randint(40, 120), 'sl_cl': rng.randint(0, 40),
+        'tkb': f"Thứ {rng.randint(2, 7)},tiết {start}-{start + 2},Phòng A{rng.randint(100, 999)},"
+               f"GV Nguyễn Văn {rng.choice('ABCDEGH')},01/09/25 đến 15/12/25",
+        'ds_lop': [f"K{rng.randint(60, 64)}-{rng.randint(1, 20)}" for _ in range(3)],
+        'ds_khoa': ['KT', 'QTKD'], 'is_kdk': False, 'is_dk': False, 'enable': True,
+        'ghi_chu': '', 'thu': rng.randint(2, 7), 'tbd': start, 'so_tiet': 3,
+        'ngay_bd': '2025-09-01T00:00:00', 'ngay_kt': '2025-12-15T00:00:00',
+    }
+
+
+def synthetic_sections(n, seed=0):
+    """(ds_nhom_to, ds_mon_hoc) ngẫu nhiên nhưng cố định theo seed"""
+    rng = random.Random(seed)
+    subjects = synthetic_subjects(n)
+    rows = [synthetic_row(rng, i, subjects) for i in range(n)]
+    return rows, [{'ma': ma, 'ten': ten, 'so_tc': 3, 'ds_lop': []} for ma, ten in subjects]
+
+
+def _token(username, expires_at):
+    """Token dạng JWT (không ký) có claim exp để ứng dụng đọc được hạn dùng"""
+    def part(obj):
+        return base64.urlsafe_b64encode(json.dumps(obj).encode()).rstrip(b'=').decode()
+    return f"{part({'alg': 'none', 'typ': 'JWT'})}.{part({'sub': username, 'exp': int(expires_at)})}.mock"
+
+
+class MockFTUGate:
+    """Server giả lập chạy trong một luồng nền; dùng được như context manager.
+
+    latency_ms/jitter_ms áp cho mọi request, endpoint_latency ghi đè theo phần cuối đường dẫn
+    (ví dụ {'w-locdsnhomto': 400}). error_rate là xác suất trả HTTP 500, register_fail_rate
+    là xác suất đăng ký bị từ chối (is_thanh_cong = false).
+    """
+
+    def __init__(self, sections=1000, latency_ms=0.0, jitter_ms=0.0, endpoint_latency=None, error_rate=0.0,
+                 register_fail_rate=0.0, registered=5, compress=True, seed=0, host='127.0.0.1', port=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.endpoint_latency = dict(endpoint_latency or {})
+        self.error_rate = error_rate
+        self.register_fail_rate = register_fail_rate
+        self.initial_registered = registered
+        self.compress = compress
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._registered = {}
+        self.requests = {}
+        self.injected_errors = 0
+        self.set_sections(sections)
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_sections(self, n):
+        """Sinh lại n nhóm tổ; phản hồi w-locdsnhomto được dựng sẵn (và nén sẵn) một lần"""
+        rows, subjects = synthetic_sections(n, self.seed)
+        body = json.dumps(
+            {'data': {'ds_nhom_to': rows, 'ds_mon_hoc': subjects}, 'result': True, 'code': 200, 'message': None},
+            ensure_ascii=False
+        ).encode('utf-8')
+        with self._lock:
+            self.sections = rows
+            self._by_id = {row['id_to_hoc']: row for row in rows}
+            self._subject_names = {ma: ten for ma, ten in ((s['ma'], s['ten']) for s in subjects)}
+            self._sections_body = body
+            self._sections_gzip = gzip.compress(body, 5) if self.compress else None
+            self._registered.clear()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='mock-ftugate', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _delay(self, endpoint):
+        base = self.endpoint_latency.get(endpoint, self.latency_ms)
+        with self._lock:
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        seconds = max(base + jitter, 0.0) / 1000
+        if seconds:
+            time.sleep(seconds)
+
+    def _roll(self, rate):
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < rate
+
+    def _user(self, headers):
+        auth = headers.get('Authorization', '')
+        token = auth[len('Bearer '):] if auth.startswith('Bearer ') else None
+        with self._lock:
+            found = self._tokens.get(token)
+        if found is None or found[1] < time.time():
+            return None
+        return found[0]
+
+    def _registered_for(self, username):
+        with self._lock:
+            if username not in self._registered:
+                self._registered[username] = [row['id_to_hoc'] for row in self.sections[:self.initial_registered]]
+            return list(self._registered[username])
+
+    def login(self, form):
+        username = form.get('username', 'sv')
+        expires_at = time.time() + TOKEN_LIFETIME
+        token = _token(username, expires_at)
+        with self._lock:
+            self._tokens[token] = (username, expires_at)
+        return {
+            'access_token': token, 'token_type': 'bearer', 'expires_in': TOKEN_LIFETIME,
+            'logtime': time.strftime('%y%m%d%H%M%S'), 'username': username, 'name': f"Sinh viên {username}",
+        }
+
+    def registered_courses(self, username):
+        records = []
+        for id_to_hoc in self._registered_for(username):
+            row = self._by_id.get(id_to_hoc)
+            if row is None:
+                continue
+            to_hoc = dict(row, ten_mon=self._subject_names.get(row['ma_mon'].strip(), ''), ten_mon_eg='Subject ')
+            records.append({'to_hoc': to_hoc, 'trang_thai_mon': 'Đăng ký', 'ngay_dang_ky': '2025-08-01'})
+        return {'data': {'ds_kqdkmh': records, 'total_items': len(records), 'so_tin_chi_min': 14},
+                'result': True, 'code': 200}
+
+    def register(self, username, payload):
+        id_to_hoc = str(payload.get('filter', {}).get('id_to_hoc', ''))
+        if id_to_hoc not in self._by_id:
+            return {'data': {'is_thanh_cong': False, 'thong_bao_loi': 'Không tìm thấy nhóm tổ'}}
+        if self._roll(self.register_fail_rate):
+            return {'data': {'is_thanh_cong': False, 'thong_bao_loi': 'Nhóm tổ đã đủ số lượng'}}
+        self._registered_for(username)
+        with self._lock:
+            if id_to_hoc not in self._registered[username]:
+                self._registered[username].append(id_to_hoc)
+        return {'data': {'is_thanh_cong': True, 'thong_bao_loi': ''}}
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Header và body ghi riêng: tắt Nagle để không cộng thêm ~40 ms delayed ACK vào mỗi request
+            disable_nagle_algorithm = True
+
+            def _reply(self, code, body, gzipped=None):
+                use_gzip = gzipped is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+                payload = gzipped if use_gzip else body
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                if use_gzip:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _json(self, code, obj):
+                self._reply(code, json.dumps(obj, ensure_ascii=False).encode('utf-8'))
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0) or 0))
+                path = self.path.split('?', 1)[0]
+                endpoint = path.rsplit('/', 1)[-1]
+                with mock._lock:
+                    mock.requests[endpoint] = mock.requests.get(endpoint, 0) + 1
+                mock._delay(endpoint)
+                if mock._roll(mock.error_rate):
+                    with mock._lock:
+                        mock.injected_errors += 1
+                    return self._json(500, {'result': False, 'code': 500, 'message': 'Lỗi giả lập'})
+
+                if path == LOGIN_PATH:
+                    return self._json(200, mock.login(dict(parse_qsl(body.decode('utf-8')))))
+                username = mock._user(self.headers)
+                if username is None:
+                    return self._json(401, {'result': False, 'code': 401, 'message': 'Unauthorized'})
+                if path == LOGOUT_PATH:
+                    return self._json(200, {'result': True, 'code': 200})
+                if path == SECTIONS_PATH:
+                    return self._reply(200, mock._sections_body, mock._sections_gzip)
+                if path == REGISTERED_PATH:
+                    return self._json(200, mock.registered_courses(username))
+                if path == REGISTER_PATH:
+                    return self._json(200, mock.register(username, json.loads(body or b'{}')))
+                self._json(404, {'result': False, 'code': 404, 'message': path})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def parse_endpoint_latency(values):
+    """['w-locdsnhomto=400', ...] -> {'w-locdsnhomto': 400.0}"""
+    out = {}
+    for value in values or ():
+        endpoint, _, ms = value.partition('=')
+        out[endpoint.strip()] = float(ms)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--sections', type=int, default=5000, help='số nhóm tổ trong w-locdsnhomto')
+    parser.add_argument('--registered', type=int, default=5, help='số môn đã đăng ký sẵn của mỗi tài khoản')
+    parser.add_argument('--latency', type=float, default=0.0, help='độ trễ mỗi request (ms)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='dao động ngẫu nhiên ± quanh độ trễ (ms)')
+    parser.add_argument('--endpoint-latency', action='append', metavar='ENDPOINT=MS',
+                        help='độ trễ riêng theo endpoint, ví dụ w-locdsnhomto=400 (lặp lại được)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='xác suất trả HTTP 500')
+    parser.add_argument('--register-fail-rate', type=float, default=0.0, help='xác suất đăng ký bị từ chối')
+    parser.add_argument('--no-gzip', action='store_true', help='không nén phản hồi w-locdsnhomto')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    mock = MockFTUGate(
+        sections=args.sections, latency_ms=args.latency, jitter_ms=args.jitter,
+        endpoint_latency=parse_endpoint_latency(args.endpoint_latency), error_rate=args.error_rate,
+        register_fail_rate=args.register_fail_rate, registered=args.registered, compress=not args.no_gzip,
+        seed=args.seed, host=args.host, port=args.port,
+    )
+    print(f"FTUGate giả lập tại {mock.url} ({args.sections} nhóm tổ, {len(mock._sections_body) / 2**20:.1f} MB)")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
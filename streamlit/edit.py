@@ -1,16 +1,34 @@
 import streamlit as st
-import os
-import requests
-import json
-import pandas as pd
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import functools
+import uuid
 from datetime import datetime
+from urllib.parse import urlsplit
 import time
-from collections import defaultdict
-import streamlit.components.v1 as components
-import certifi
+from collections import deque
 
-os.environ['HTTP_PROXY'] = 'http://113.160.132.195:8080'
-os.environ['HTTPS_PROXY'] = 'http://113.160.132.195:8080'
+from qldt.api import QLDTApi
+from qldt.auth import token_expiry, token_state
+from qldt.cart import Cart, CartEntry, section_label
+from qldt.catalogue import CatalogueCache
+from qldt.export import FORMATS, ExportCache, courses_frame
+from qldt.export import available as export_available
+from qldt.memory import deep_sizeof, process_rss
+from qldt.metrics import MetricsExporter, metrics_text
+from qldt.planner import RANKINGS, Option, plan_timetables, rank_plans
+from qldt import profiling
+from qldt.profiling import span, trace_rows
+from qldt.scheduler import RequestScheduler, SchedulerBusy
+from qldt.search import SectionIndex, fold
+from qldt.seats import SeatPoller, row_index
+from qldt.snapshot import SnapshotStore
+from qldt.timetable import ClashChecker
+from qldt.batch import MAX_WORKERS, register_batch, summarize, workers_from_env
+from qldt.transport import Transport
+
+# Mốc thời gian đầu mỗi lần chạy toàn trang
+_run_started = time.perf_counter()
+profiling.start_trace("Toàn trang")
 
 # Cấu hình page
 st.set_page_config(
@@ -53,153 +71,747 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# API functions - Sử dụng API thực tế của FTUGate
-class QLDTApi:
-    def __init__(self):
-        self.base_url = "https://ftugate.ftu.edu.vn"
-        self.default_headers = {
-            'Content-Type': 'application/json',
-            'Accept': 'application/json, text/plain, */*',
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36',
-        }
-    
-    def _post(self, path, data=None, json=None, token=None, content_type=None):
-        url = f"{self.base_url}{path}"
-        headers = self.default_headers.copy()
-        if token: headers['Authorization'] = f'Bearer {token}'
-        if content_type: headers['Content-Type'] = content_type
-        resp = requests.post(url, data=data, json=json, proxies={'http': 'http://113.160.132.195:8080','https': 'http://113.160.132.195:8080'}, headers=headers, verify=certifi.where())
-        resp.raise_for_status()
-        return resp.json()
-    
-    def login(self, username, password):
-        """Đăng nhập vào hệ thống QLDT"""
-        return self._post(
-            '/api/auth/login',
-            data={'username':username, 'password':password, 'grant_type':'password'},
-            content_type='application/x-www-form-urlencoded'
+@st.cache_resource
+def get_transport():
+    """Transport dùng chung cho mọi phiên: giữ kết nối keep-alive qua proxy"""
+    return Transport.from_env()
+
+@st.cache_resource
+def get_scheduler():
+    """Bộ điều phối request dùng chung: đăng ký > đăng nhập > danh sách môn > danh sách lớp"""
+    return RequestScheduler.from_env()
+
+@st.cache_resource
+def get_catalogue_cache():
+    """Danh sách lớp dùng chung cho mọi phiên, có TTL, gộp request đồng thời và lưu xuống đĩa"""
+    return CatalogueCache.from_env(store=SnapshotStore.from_env())
+
+@st.cache_resource
+def get_seat_poller():
+    """Một luồng quét số chỗ dùng chung; kết quả cũng cập nhật danh sách lớp cho mọi phiên"""
+    poller_api = QLDTApi(get_transport(), get_scheduler())
+    return SeatPoller.from_env(get_catalogue_cache(), poller_api.get_section_table)
+
+@st.cache_resource
+def get_metrics_collector():
+    """Hàm trả về số liệu Prometheus của các thành phần dùng chung (gọi được từ luồng nền)"""
+    return functools.partial(
+        metrics_text, transport=get_transport(), scheduler=get_scheduler(), spans=profiling.STATS,
+        catalogue=get_catalogue_cache(), poller=get_seat_poller()
+    )
+
+@st.cache_resource
+def get_metrics_exporter():
+    """Xuất số liệu Prometheus ra tệp/endpoint nếu đặt QLDT_METRICS_PATH hoặc QLDT_METRICS_PORT"""
+    return MetricsExporter.from_env(get_metrics_collector())
+
+# Khởi tạo API
+api = QLDTApi(get_transport(), get_scheduler())
+catalogue_cache = get_catalogue_cache()
+seat_poller = get_seat_poller()
+metrics_exporter = get_metrics_exporter()
+
+# Khởi tạo session state gọn hơn
+for k,v in {'logged_in': False, 'user_info': None, 'token': None, 'courses_data': None}.items():
+    st.session_state.setdefault(k, v)
+# Khóa của phiên trong bộ quét chỗ trống dùng chung
+st.session_state.setdefault('watcher_id', uuid.uuid4().hex)
+
+# Số lần chạy lại gần nhất giữ lại trong phiên cho bảng phân tích thời gian
+TRACE_HISTORY = 20
+
+
+def fragment_rerun():
+    """True nếu lần chạy hiện tại chỉ chạy lại fragment (không chạy toàn trang)"""
+    ctx = get_script_run_ctx()
+    return bool(getattr(ctx, 'fragment_ids_this_run', None))
+
+
+def record_trace(trace):
+    if trace is not None:
+        st.session_state.setdefault('traces', deque(maxlen=TRACE_HISTORY)).append(trace)
+
+
+def timed_fragment(name, run_every=None):
+    """Biến hàm thành fragment (tự chạy lại mỗi run_every nếu có) và ghi lại thời gian của mỗi lần chạy"""
+    def decorate(func):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            # Fragment chạy lại riêng thì là một lần chạy lại có trace của riêng nó
+            own_trace = fragment_rerun()
+            if own_trace:
+                profiling.start_trace(name)
+            t0 = time.perf_counter()
+            with span(name):
+                result = func(*args, **kwargs)
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            if own_trace:
+                record_trace(profiling.finish_trace())
+            st.session_state.setdefault('rerun_times', {})[name] = elapsed_ms
+            if st.session_state.get('show_timing'):
+                st.caption(f"⏱️ {name}: {elapsed_ms:.1f} ms")
+            return result
+        # Các phần giao diện chạy lại độc lập với phần còn lại của trang
+        return st.fragment(run) if run_every is None else st.fragment(run_every=run_every)(run)
+    return decorate
+
+
+def format_age(seconds):
+    """Khoảng thời gian dạng '42 giây' / '5 phút' / '3 giờ'"""
+    if seconds < 60:
+        return f"{seconds:.0f} giây"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} phút"
+    return f"{seconds / 3600:.1f} giờ"
+
+
+def token_used():
+    """Một request cần xác thực vừa thành công: tính luôn là lần kiểm tra token gần nhất"""
+    st.session_state.token_check = {'valid': True, 'ms': None, 'at': time.time()}
+
+
+def apply_login(login_data):
+    """Lưu kết quả đăng nhập vào phiên và tính mốc hết hạn token từ logtime + expires_in"""
+    st.session_state.logged_in = True
+    st.session_state.user_info = login_data
+    st.session_state.token = login_data["access_token"]
+    # Parse 'logtime' from API response
+    logtime_str = login_data.get("logtime", "")
+    try:
+        logtime_parsed = datetime.strptime(logtime_str, "%y%m%d%H%M%S")
+        st.session_state.login_time = logtime_parsed.strftime("%Y-%m-%d %H:%M:%S")
+        st.session_state.token_expiry_ts = int(logtime_parsed.timestamp()) + login_data["expires_in"]
+    except ValueError:
+        st.session_state.login_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        st.session_state.token_expiry_ts = int(time.time()) + login_data["expires_in"]
+    token_used()
+
+
+def load_courses():
+    st.session_state.courses_data = api.get_registered_courses(st.session_state.token)
+    st.session_state.course_changes = None
+    if 'error' not in st.session_state.courses_data:
+        token_used()
+
+
+def refresh_courses():
+    """Tải lại danh sách môn đã đăng ký nhưng chỉ dựng lại các môn thêm/bớt/đổi"""
+    t0 = time.perf_counter()
+    courses_data, changes = api.refresh_registered_courses(st.session_state.token, st.session_state.courses_data)
+    st.session_state.courses_data = courses_data
+    if changes is not None:
+        changes['elapsed_ms'] = (time.perf_counter() - t0) * 1000
+        token_used()
+    st.session_state.course_changes = changes
+
+
+def show_table(rows, columns=None, rename=None):
+    """Bảng số liệu (list dict) làm tròn 1 chữ số; pandas chỉ được nạp khi có bảng đầu tiên cần hiển thị"""
+    import pandas as pd
+    frame = pd.DataFrame(rows, columns=columns)
+    if rename:
+        frame = frame.rename(columns=rename)
+    st.dataframe(frame.round(1), use_container_width=True, hide_index=True)
+
+
+def session_memo(name, source, build):
+    """build(source) chỉ tính một lần cho mỗi đối tượng source trong phiên (so sánh bằng `is`)"""
+    memo = st.session_state.setdefault('_memo', {})
+    cached = memo.get(name)
+    if cached is None or cached[0] is not source:
+        cached = memo[name] = (source, build(source))
+    return cached[1]
+
+
+@timed_fragment("Đồng hồ token")
+def token_countdown(expiry_ts):
+    # Đếm ngược ngay trên trang (st.html, không iframe, không tải font ngoài); giá trị ban đầu
+    # tính sẵn ở server nên vẫn hiển thị đúng lúc vẽ nếu JavaScript chưa chạy
+    remaining = max(int(expiry_ts - time.time()), 0)
+    element_id = f"countdown-{uuid.uuid4().hex[:8]}"
+    text = f"{remaining // 60 % 60:02d}:{remaining % 60:02d}" if remaining else "Hết hạn"
+    color = "#32CD32" if remaining else "red"
+    st.html(f"""
+        <div style="font-size: 16px; font-weight: 600; color: {color};">
+            <span>Token còn lại:</span> <span id="{element_id}">{text}</span>
+        </div>
+        <script>
+            (function () {{
+                var expiry = {expiry_ts} * 1000;
+                var timer = setInterval(function () {{
+                    var el = document.getElementById("{element_id}");
+                    // Phần tử đã bị thay khi trang vẽ lại: dừng bộ đếm cũ
+                    if (!el) {{ clearInterval(timer); return; }}
+                    var distance = expiry - Date.now();
+                    if (distance <= 0) {{
+                        el.textContent = "Hết hạn";
+                        el.parentNode.style.color = "red";
+                        clearInterval(timer);
+                        return;
+                    }}
+                    var minutes = Math.floor((distance % 3600000) / 60000);
+                    var seconds = Math.floor((distance % 60000) / 1000);
+                    el.textContent = ("0" + minutes).slice(-2) + ":" + ("0" + seconds).slice(-2);
+                }}, 1000);
+            }})();
+        </script>
+    """, unsafe_allow_javascript=True)
+
+
+def course_details_markdown(course):
+    """Toàn bộ thông tin một môn trong một khối markdown (một phần tử thay vì ~15 lần st.write)"""
+    left = [f"**Mã môn học:** {course['course_id']}", f"**Tên môn học:** {course['course_name']}"]
+    if course.get('english_name'):
+        left.append(f"**Tên tiếng Anh:** {course['english_name']}")
+    left += [f"**Số tín chỉ:** {course['credits']}", f"**Trạng thái:** {course['status']}"]
+    if course.get('group_number'):
+        left.append(f"**Nhóm:** {course['group_number']}")
+    if course.get('registration_date'):
+        left.append(f"**Ngày đăng ký:** {course['registration_date']}")
+    right = [f"**Giảng viên:** {course['lecturer']}", f"**Thời gian:** {course['schedule']}"]
+    if course.get('room'):
+        right.append(f"**Phòng học:** {course['room']}")
+    if course.get('class_name'):
+        right.append(f"**Lớp:** {course['class_name']}")
+    if course.get('group_id'):
+        right.append(f"**Mã nhóm:** {course['group_id']}")
+    lines = left + right
+    # Hiển thị thời khóa biểu chi tiết
+    if course.get('slots'):
+        lines.append("**Thời khóa biểu chi tiết:**")
+        lines += [f"• {slot.text}" for slot in course['slots']]
+    return "  \n".join(lines)
+
+
+def overview_row(course):
+    return {
+        'Mã môn': course.code,
+        'Tên môn': course['course_name'],
+        'TC': course['credits'],
+        'Nhóm': course.get('group_number', ''),
+        'Giảng viên': course['lecturer'],
+        'Lịch học': "; ".join(slot.text for slot in course.get('slots', ())) or course['schedule'],
+        'Trạng thái': course['status'],
+    }
+
+
+def courses_overview(courses, changes=None):
+    """Bảng gọn một dòng mỗi môn; dòng của môn không đổi (cùng đối tượng Course) được dùng lại từ lần dựng trước"""
+    row_cache = st.session_state.setdefault('_overview_rows', {})
+    marks = {}
+    if changes:
+        marks.update((id(course), "🆕 mới") for course in changes['added'])
+        marks.update((id(course), "✏️ đổi") for course in changes['changed'])
+    rows, cache = [], {}
+    for course in courses:
+        cached = row_cache.get(id(course))
+        if cached is None or cached[0] is not course:
+            cached = (course, overview_row(course))
+        cache[id(course)] = cached
+        rows.append(dict(cached[1], **{'Thay đổi': marks.get(id(course), '')}) if marks else cached[1])
+    st.session_state['_overview_rows'] = cache
+    import pandas as pd
+    with span("dựng DataFrame môn"):
+        return pd.DataFrame(rows)
+
+
+def course_changes_summary(changes):
+    parts = []
+    for key, icon in (('added', "➕ thêm"), ('removed', "➖ bỏ"), ('changed', "✏️ đổi")):
+        if changes[key]:
+            parts.append(f"{icon} {', '.join(course.code for course in changes[key])}")
+    return parts
+
+
+COURSE_PAGE_SIZES = (10, 25, 50, 100)
+
+
+@timed_fragment("Danh sách môn đã đăng ký")
+def registered_courses_panel(courses, changes=None):
+    # Mỗi lần chỉ dựng một trang: bảng gọn là một phần tử duy nhất, chi tiết chỉ mở khi chọn
+    if changes is not None:
+        parts = course_changes_summary(changes)
+        if parts:
+            st.info(f"🔄 Đã cập nhật: {' · '.join(parts)} ({changes['elapsed_ms']:.0f} ms)")
+        else:
+            st.caption(f"🔄 Đã tải lại, không có thay đổi ({changes['elapsed_ms']:.0f} ms)")
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        view = st.radio("Chế độ xem:", ["Bảng gọn", "Thẻ chi tiết"], horizontal=True, key="courses_view")
+    with col2:
+        page_size = st.selectbox("Số môn mỗi trang:", COURSE_PAGE_SIZES, key="courses_page_size")
+    pages = max(1, -(-len(courses) // page_size))
+    with col3:
+        page = st.number_input("Trang:", min_value=1, max_value=pages, value=1, key="courses_page")
+    start = (min(page, pages) - 1) * page_size
+    page_courses = courses[start:start + page_size]
+    st.caption(f"Môn {start + 1}–{start + len(page_courses)} / {len(courses)} · trang {min(page, pages)}/{pages}")
+
+    if view == "Bảng gọn":
+        overview = session_memo('courses_overview', courses, lambda c: courses_overview(c, changes))
+        st.dataframe(overview.iloc[start:start + page_size], use_container_width=True, hide_index=True)
+        selected = st.selectbox(
+            "Xem chi tiết môn:", range(len(page_courses)), index=None, placeholder="Chọn môn...",
+            format_func=lambda i: f"{page_courses[i]['course_id'].strip()} - {page_courses[i]['course_name']}",
+            key=f"courses_detail_{start}"
         )
-    
-    def get_registered_courses(self, token):
-        """Lấy danh sách môn học đã đăng ký"""
-        data = self._post(
-            '/cq/hanoi/api/dkmh/w-locdskqdkmhsinhvien',
-            json={'is_CVHT': False, 'is_Clear': True},
-            token=token
+        if selected is not None:
+            with st.container(border=True):
+                st.markdown(course_details_markdown(page_courses[selected]))
+    else:
+        new = {id(course) for course in changes['added'] + changes['changed']} if changes else set()
+        for course in page_courses:
+            mark = "🆕 " if id(course) in new else ""
+            with st.expander(f"{mark}📖 {course['course_id']} - {course['course_name']}", expanded=False):
+                st.markdown(course_details_markdown(course))
+
+
+SEARCH_PAGE_SIZES = (25, 50, 100, 200)
+SEARCH_SORTS = ("Độ khớp", "Mã môn", "Còn nhiều chỗ", "Không trùng lịch trước")
+
+
+def search_order(table, ranked, sort, clash_checker):
+    """Thứ tự các lớp khớp theo cách sắp xếp đã chọn; "Độ khớp" giữ thứ tự xếp hạng của chỉ mục"""
+    value = table.value
+    if sort == "Mã môn":
+        return sorted(ranked, key=lambda i: ((value('ma_mon', i) or '').strip(), value('nhom_to', i) or '',
+                                             value('to', i) or ''))
+    if sort == "Còn nhiều chỗ":
+        # Lớp không có số chỗ xếp cuối
+        return sorted(ranked, key=lambda i: (value('sl_cl', i) is None, -(value('sl_cl', i) or 0)))
+    if sort == "Không trùng lịch trước":
+        return sorted(ranked, key=lambda i: bool(clash_checker.clashes(
+            value('slots', i), exclude=value('id_to_hoc', i), mask=value('mask', i))))
+    return ranked
+
+
+def search_rows(table, ids, clash_checker, cart):
+    """Các dòng của một trang kết quả; chỉ dựng cho các lớp đang hiển thị"""
+    rows = []
+    for i in ids:
+        s = table[i]
+        clashes = clash_checker.clashes(s['slots'], exclude=s['id_to_hoc'], mask=s['mask'])
+        rows.append({
+            'Mã lớp': s['id_to_hoc'],
+            'Mã môn': s.get('ma_mon', '').strip(),
+            'Tên môn': s.get('ten_mon', ''),
+            'Nhóm': s.get('nhom_to', ''),
+            'TC': s.get('so_tc', ''),
+            'Còn chỗ': s.get('sl_cl'),
+            'Lịch học': "; ".join(slot.text for slot in s['slots']),
+            'Trùng lịch': f"⚠️ {', '.join(clashes)}" if clashes else "",
+            'Trong giỏ': s['id_to_hoc'] in cart,
+        })
+    return rows
+
+
+def run_search(section_index, query, within=None):
+    """Xếp hạng toàn bộ lớp khớp một lần; các lần đổi trang/sắp xếp sau đó dùng lại kết quả"""
+    t0 = time.perf_counter()
+    with span("tìm trong chỉ mục"):
+        ranked, hits = section_index.search(query, limit=None, within=within)
+    return {'hits': hits, 'ranked': ranked, 'orders': {}, 'ms': (time.perf_counter() - t0) * 1000}
+
+
+@timed_fragment("Tìm lớp")
+def search_panel(catalogue, section_index, clash_checker):
+    # Gõ tìm kiếm, đổi trang, sắp xếp hay chọn dòng chỉ chạy lại phần này; thêm lớp vào giỏ thì
+    # chạy lại toàn trang để giỏ cập nhật. Mỗi lần chỉ dựng một trang kết quả.
+    search_query = st.text_input("🔍 Tìm lớp học (mã môn, tên môn hoặc nhóm):")
+    cart = st.session_state.selected_classes
+
+    if len(search_query.strip()) >= 3 and section_index is not None:
+        folded = fold(search_query)
+        previous = st.session_state.get("search_state")
+        if previous is not None and previous['query'] == folded:
+            state = previous
+            if state['version'] != catalogue.version:
+                # Có bản danh sách lớp mới (bộ quét chỗ trống, làm mới nền): xếp hạng lại cùng truy vấn
+                # nhưng giữ nguyên trang, cách sắp xếp và lựa chọn đang xem
+                state.update(run_search(section_index, search_query), version=catalogue.version)
+        else:
+            # Gõ thêm ký tự thì chỉ lọc trong kết quả của truy vấn trước (vị trí chỉ đúng trên cùng bản)
+            within = None
+            if (previous is not None and previous['version'] == catalogue.version
+                    and folded.startswith(previous['query'])):
+                within = previous['hits']
+            state = dict(run_search(section_index, search_query, within),
+                         version=catalogue.version, query=folded, view=None)
+            st.session_state.search_state = state
+            st.session_state.search_page = 1
+
+        total = len(state['ranked'])
+        if not total:
+            st.info("Không tìm thấy lớp nào khớp.")
+            return
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            sort = st.selectbox("Sắp xếp theo:", SEARCH_SORTS, key="search_sort")
+        with col2:
+            page_size = st.selectbox("Số lớp mỗi trang:", SEARCH_PAGE_SIZES, key="search_page_size")
+        pages = max(1, -(-total // page_size))
+        if st.session_state.get("search_page", 1) > pages:
+            st.session_state.search_page = pages
+        with col3:
+            page = st.number_input("Trang:", min_value=1, max_value=pages, key="search_page")
+
+        table = catalogue.sections
+        with span("sắp xếp kết quả tìm kiếm"):
+            order = state['orders'].get(sort)
+            if order is None:
+                order = search_order(table, state['ranked'], sort, clash_checker)
+                # Thứ tự theo trùng lịch phụ thuộc giỏ hiện tại nên không giữ lại
+                if sort != "Không trùng lịch trước":
+                    state['orders'][sort] = order
+        start = (page - 1) * page_size
+        view = state['view']
+        if view is not None and view['key'] == (sort, page_size, page):
+            # Cùng trang đang xem: giữ đúng các lớp và thứ tự đã hiển thị để lựa chọn trên bảng không
+            # bị lệch dòng; bản danh sách lớp mới thì ánh xạ lại chỉ số dòng theo id_to_hoc
+            if view['version'] == catalogue.version:
+                page_ids = view['rows']
+            else:
+                positions = catalogue.derived('row_index', row_index)
+                page_ids = [positions[key] for key in view['ids'] if key in positions]
+        else:
+            page_ids = order[start:start + page_size]
+        state['view'] = {'key': (sort, page_size, page), 'version': catalogue.version, 'rows': page_ids,
+                         'ids': [table.value('id_to_hoc', i) for i in page_ids]}
+        st.caption(
+            f"Lớp {start + 1}–{start + len(page_ids)} / {total} lớp khớp · trang {page}/{pages} · "
+            f"tìm {state['ms']:.1f} ms"
         )
-        
-        courses = []
-        
-        # Kiểm tra nếu data là string
-        if isinstance(data, str):
-            try:
-                data = json.loads(data)
-            except json.JSONDecodeError:
-                return {
-                    'courses': [],
-                    'total_credits': 0,
-                    'total_courses': 0,
-                    'raw_data': {'raw_response': data},
-                    'error': 'Dữ liệu trả về không đúng định dạng JSON'
-                }
-        
-        # Xử lý dữ liệu sau khi đảm bảo đã parse thành object
-        if isinstance(data, dict) and 'data' in data:
-            data_section = data['data']
-            
-            # Kiểm tra nếu có ds_kqdkmh trong data
-            if 'ds_kqdkmh' in data_section and isinstance(data_section['ds_kqdkmh'], list):
-                for course_record in data_section['ds_kqdkmh']:
-                    if isinstance(course_record, dict) and 'to_hoc' in course_record:
-                        to_hoc = course_record['to_hoc']
-                        
-                        # Xử lý thời khóa biểu
-                        tkb = to_hoc.get('tkb', '')
-                        # Tách thông tin giảng viên từ tkb
-                        lecturer = ''
-                        if 'GV ' in tkb:
-                            parts = tkb.split('GV ')
-                            if len(parts) > 1:
-                                lecturer_part = parts[1].split(',')[0]
-                                lecturer = lecturer_part.strip()
-                        
-                        # Tách thông tin thời gian học
-                        schedule = ''
-                        if tkb:
-                            # Lấy phần đầu tiên của tkb để hiển thị thời gian chính
-                            schedule_parts = tkb.split('<hr>')
-                            if schedule_parts:
-                                first_schedule = schedule_parts[0]
-                                # Tách thông tin thứ và tiết
-                                if 'tiết' in first_schedule:
-                                    schedule = first_schedule.split(',GV')[0] if ',GV' in first_schedule else first_schedule
-                        
-                        course_info = {
-                            'course_id': to_hoc.get('ma_mon', ''),
-                            'course_name': to_hoc.get('ten_mon', ''),
-                            'credits': int(to_hoc.get('so_tc', 0)) if to_hoc.get('so_tc', '').isdigit() else 0,
-                            'lecturer': lecturer,
-                            'schedule': schedule,
-                            'room': '',  # Không có thông tin phòng học rõ ràng trong dữ liệu
-                            'semester': '',  # Có thể lấy từ ngày học
-                            'status': course_record.get('trang_thai_mon', ''),
-                            'group_id': to_hoc.get('id_to_hoc', ''),
-                            'class_name': to_hoc.get('lop', ''),
-                            'week_schedule': tkb,  # Lưu toàn bộ thời khóa biểu
-                            'group_number': to_hoc.get('nhom_to', ''),
-                            'registration_date': course_record.get('ngay_dang_ky', ''),
-                            'english_name': to_hoc.get('ten_mon_eg', '').strip()
-                        }
-                        courses.append(course_info)
-        
-        return {
-            'courses': courses,
-            'total_credits': sum(course['credits'] for course in courses if isinstance(course['credits'], (int, float))),
-            'total_courses': len(courses),
-            'total_items': data_section.get('total_items', len(courses)),
-            'min_credits': data_section.get('so_tin_chi_min', 0),
-            'raw_data': data
-        }
-    
-    def get_sections(self, token):
-        """Lấy danh sách nhóm tổ học và danh sách môn trong học kỳ"""
-        data = self._post(
-            '/cq/hanoi/api/dkmh/w-locdsnhomto',
-            json={
-                'is_CVHT': False,
-                'additional': {
-                    'paging': {'limit': 99999, 'page': 1},
-                    'ordering': [{'name': '', 'order_type': ''}]
-                }
-            },
-            token=token
+        with span("dựng trang kết quả"):
+            rows = search_rows(table, page_ids, clash_checker, cart)
+        # Khóa theo truy vấn và trang để lựa chọn không bị áp sang dòng khác khi đổi trang
+        event = st.dataframe(
+            rows, use_container_width=True, hide_index=True, on_select="rerun", selection_mode="multi-row",
+            key=f"search_table_{folded}_{sort}_{page_size}_{page}"
         )
-        return {
-            'ds_nhom_to': data.get('data', {}).get('ds_nhom_to', []),
-            'ds_mon_hoc': data.get('data', {}).get('ds_mon_hoc', [])
-        }
-    
-    def register_course(self, token, id_to_hoc):
-        """Đăng ký một môn học"""
-        return self._post(
-            '/cq/hanoi/api/dkmh/w-xulydkmhsinhvien',
-            json={'filter': {'id_to_hoc': id_to_hoc, 'is_checked': True, 'sv_nganh': 1}},
-            token=token
+        picked = [page_ids[r] for r in event.selection.rows if r < len(page_ids)]
+        new = [i for i in picked if table.value('id_to_hoc', i) not in cart]
+        if st.button(f"➕ Thêm {len(new)} lớp đã chọn vào giỏ", disabled=not new, key="search_add"):
+            notices = []
+            for i in new:
+                entry = CartEntry.from_section(table[i])
+                clashes = clash_checker.clashes(entry.slots, exclude=entry.id, mask=entry.mask)
+                if clashes:
+                    notices.append(f"{entry.label} trùng lịch với: {', '.join(clashes)}")
+                cart.add(entry)
+                # Các lớp chọn cùng lúc cũng được kiểm tra trùng lịch với nhau
+                clash_checker.add(entry.id, entry.label, entry.slots, entry.mask)
+            if notices:
+                st.session_state.cart_notice = "⚠️ " + "; ".join(notices)
+            st.rerun()
+    elif search_query and len(search_query.strip()) < 3:
+        st.warning("Vui lòng nhập ít nhất 3 ký tự để tìm lớp.")
+
+
+@timed_fragment("Giỏ đăng ký")
+def cart_panel(clash_checker):
+    if st.session_state.get("cart_notice"):
+        st.warning(st.session_state.pop("cart_notice"))
+    report = st.session_state.get("batch_report")
+    if report:
+        st.info(f"Hoàn tất: {report['success']} thành công, {report['fail']} thất bại.")
+        st.caption(
+            f"⏱️ {report['workers']} luồng · tổng {report['total_ms']:.0f} ms · "
+            f"p50 {report['p50_ms']:.0f} ms · p95 {report['p95_ms']:.0f} ms mỗi yêu cầu"
         )
-    
-    def logout(self, token):
-        """Đăng xuất khỏi hệ thống"""
+        with st.expander("📄 Báo cáo đăng ký", expanded=False):
+            show_table(report['results'], columns=['label', 'ok', 'message', 'elapsed_ms'])
+            if st.button("Ẩn báo cáo", key="hide_batch_report"):
+                del st.session_state.batch_report
+                st.rerun()
+    cart = st.session_state.selected_classes
+    if not cart:
+        return
+    st.markdown("### 🛒 Lớp đã chọn:")
+    clash_count = 0
+    watched = seat_poller.watched(st.session_state.watcher_id)
+    for cls in cart:
+        col1, col2, col3 = st.columns([6, 1, 1])
+        with col1:
+            clashes = clash_checker.clashes(cls.slots, exclude=cls.id, mask=cls.mask)
+            clash_count += bool(clashes)
+            st.markdown(f"- {cls.label}" + (f" — ⚠️ trùng lịch với: {', '.join(clashes)}" if clashes else ""))
+        with col2:
+            if cls.id in watched:
+                if st.button("🔕", key=f"unwatch_{cls.id}", help="Bỏ theo dõi chỗ trống"):
+                    seat_poller.unwatch(st.session_state.watcher_id, cls.id)
+                    st.rerun()
+            elif st.button("🔔", key=f"watch_{cls.id}", help="Báo khi lớp này thay đổi số chỗ còn lại"):
+                st.session_state.setdefault('watch_labels', {})[cls.id] = cls.label
+                seat_poller.watch(st.session_state.watcher_id, cls.id, st.session_state.token)
+                st.rerun()
+        with col3:
+            if st.button("❌", key=f"remove_{cls.id}"):
+                cart.remove(cls.id)
+                # Ô tìm kiếm và cảnh báo trùng lịch phụ thuộc giỏ nên chạy lại toàn trang
+                st.rerun()
+
+    if clash_count:
+        st.warning(f"⚠️ {clash_count} lớp trong giỏ bị trùng lịch, server có thể từ chối đăng ký.")
+    workers = st.number_input(
+        "Số yêu cầu đăng ký song song:", min_value=1, max_value=MAX_WORKERS,
+        value=workers_from_env(), help="1 = gửi lần lượt từng lớp như trước"
+    )
+    if st.button("✅ Đăng ký tất cả lớp đã chọn"):
+        with st.spinner("Đang thực hiện đăng ký..."):
+            selected = list(cart)
+            progress = st.progress(0.0)
+            results = []
+            t0 = time.perf_counter()
+            # Hiển thị từng kết quả ngay khi request tương ứng hoàn tất
+            for r in register_batch(api.register_course, st.session_state.token, selected, workers):
+                results.append(r)
+                if r['ok']:
+                    st.success(f"✅ {r['label']}")
+                elif r['error']:
+                    st.error(f"⚠️ {r['label']}: {r['message']}")
+                else:
+                    st.error(f"❌ {r['label']}: {r['message']}")
+                progress.progress(len(results) / len(selected))
+            report = summarize(results, (time.perf_counter() - t0) * 1000, min(workers, len(selected)))
+            st.session_state.batch_report = report
+            # Server đã trả lời (thành công hay bị từ chối) nghĩa là token còn dùng được
+            if any(not r['error'] for r in report['results']):
+                token_used()
+            # Chỉ giữ lại các lớp đăng ký thất bại
+            cart.retain(r['id'] for r in report['results'] if not r['ok'])
+            # Cập nhật gia tăng danh sách môn đã đăng ký rồi chạy lại toàn trang để hiển thị thay đổi
+            if report['success']:
+                try:
+                    refresh_courses()
+                except Exception as e:
+                    st.session_state.cart_notice = f"Không cập nhật được danh sách môn đã đăng ký: {e}"
+        st.rerun()
+
+
+# Chế độ chuẩn bị đăng ký: giữ ấm kết nối mỗi PREPARE_INTERVAL giây (dưới thời gian
+# keep-alive thông thường của proxy). Token chỉ được gọi thử khi trong TOKEN_CHECK_INTERVAL giây
+# không có request cần xác thực nào của phiên thành công (xem token_used)
+PREPARE_INTERVAL = 20
+TOKEN_CHECK_INTERVAL = 120
+
+
+def ensure_token():
+    """Đăng nhập lại nếu token sắp hết hạn và người dùng đã cho phép; trả về (trạng thái, giây còn lại)"""
+    expiry = token_expiry(st.session_state.token, st.session_state.get('token_expiry_ts'))
+    state, remaining = token_state(expiry)
+    credentials = st.session_state.get('saved_credentials')
+    if state in ('expiring', 'expired') and credentials:
         try:
-            return self._post('/api/auth/logout', json={}, token=token)
-        except:
-            return {'success': True, 'message': 'Logged out (token may have expired)'}
+            apply_login(api.login(*credentials))
+        except SchedulerBusy:
+            raise
+        except Exception:
+            # Mật khẩu đã lưu không còn đăng nhập được: không giữ lại trong phiên nữa
+            st.session_state.pop('saved_credentials', None)
+            raise
+        # Chạy lại toàn trang để đồng hồ token ở sidebar dùng mốc hết hạn mới
+        st.rerun()
+    return state, remaining
 
-# Khởi tạo API
-api = QLDTApi()
 
-# Khởi tạo session state gọn hơn
-for k,v in {'logged_in': False, 'user_info': None, 'token': None, 'courses_data': None}.items():
-    st.session_state.setdefault(k, v)
+@timed_fragment("Chuẩn bị đăng ký", run_every=PREPARE_INTERVAL)
+def prepare_panel():
+    if not st.toggle(
+        "🚀 Chuẩn bị đăng ký", key="prepare_mode",
+        help="Giữ sẵn kết nối tới server qua proxy và kiểm tra token để lần đăng ký đầu tiên không phải chờ"
+    ):
+        return
+    try:
+        state, remaining = ensure_token()
+        check = st.session_state.get('token_check')
+        if check is None or time.time() - check['at'] > TOKEN_CHECK_INTERVAL:
+            valid, check_ms = api.check_token(st.session_state.token)
+            check = st.session_state.token_check = {'valid': valid, 'ms': check_ms, 'at': time.time()}
+        warm = api.warm_up(workers_from_env())
+    except SchedulerBusy as e:
+        st.warning(f"⏳ {e}")
+        return
+    except Exception as e:
+        st.error(f"Không chuẩn bị được kết nối: {e}")
+        return
+
+    rtt = sorted(w['rtt_ms'] for w in warm)
+    opened = [w for w in warm if w['new']]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Kết nối sẵn sàng", len(warm), f"mở mới {len(opened)}" if opened else None, delta_color="off")
+    with col2:
+        st.metric("Khứ hồi (ms)", f"{rtt[len(rtt) // 2]:.0f}",
+                  f"mở kết nối {max(w['setup_ms'] for w in opened):.0f} ms" if opened else None, delta_color="off")
+    with col3:
+        st.metric("Token còn lại", format_age(remaining) if remaining is not None and remaining > 0 else "—")
+
+    if not check['valid'] or state == 'expired':
+        st.error("🔑 Token đã hết hạn hoặc bị từ chối, hãy đăng xuất rồi đăng nhập lại trước khi đăng ký")
+    elif state == 'expiring':
+        st.warning(f"🔑 Token sẽ hết hạn sau {format_age(remaining)}; bật tự đăng nhập lại hoặc đăng nhập lại ngay")
+    else:
+        st.caption(
+            "✅ Token hợp lệ ("
+            + (f"kiểm tra {check['ms']:.0f} ms" if check['ms'] is not None else "theo request gần nhất")
+            + f", {format_age(time.time() - check['at'])} trước) · "
+            f"lần gửi đăng ký đầu tiên sẽ dùng kết nối đã mở · giữ ấm mỗi {PREPARE_INTERVAL} giây"
+        )
+
+
+# Chu kỳ làm mới phần theo dõi (giây): chỉ đọc hàng đợi trong tiến trình, không gọi server
+SEAT_UI_REFRESH = 5
+
+
+@timed_fragment("Theo dõi chỗ trống", run_every=SEAT_UI_REFRESH)
+def seat_watch_panel():
+    session_id = st.session_state.watcher_id
+    watched = seat_poller.watched(session_id)
+    if not watched:
+        return
+    labels = st.session_state.setdefault('watch_labels', {})
+    events = st.session_state.setdefault('seat_events', [])
+    for change in seat_poller.drain(session_id, st.session_state.token):
+        label = labels.get(change.id_to_hoc, change.id_to_hoc)
+        if change.status == 'gone':
+            message = f"🗑️ {label}: lớp không còn trong danh sách"
+        else:
+            message = f"{'🟢' if change.status == 'open' else '🔴'} {label}: còn {change.new_cl} chỗ (trước đó {change.old_cl})"
+        st.toast(message)
+        events.insert(0, f"{datetime.fromtimestamp(change.at).strftime('%H:%M:%S')} · {message}")
+    del events[20:]
+
+    st.markdown("### 🔔 Đang theo dõi chỗ trống")
+    snapshot = catalogue_cache.current()
+    if snapshot is not None:
+        rows = snapshot.derived('row_index', row_index)
+        table = []
+        for id_to_hoc in sorted(watched, key=lambda i: labels.get(i, i)):
+            i = rows.get(id_to_hoc)
+            table.append({
+                'Lớp': labels.get(id_to_hoc, id_to_hoc),
+                'Còn lại': snapshot.sections.value('sl_cl', i) if i is not None else None,
+                'Sĩ số': snapshot.sections.value('sl_cp', i) if i is not None else None,
+            })
+        show_table(table)
+    poller_stats = seat_poller.stats()
+    next_poll = seat_poller.next_poll_in()
+    st.caption(
+        f"Một lượt quét chung cho {poller_stats['watchers']} phiên · mỗi {poller_stats['interval']:.0f} giây"
+        + (f" · lượt tới sau {next_poll:.0f} giây" if next_poll is not None else " · đang quét lần đầu")
+        + (f" · lỗi lần quét gần nhất: {poller_stats['last_error']}" if poller_stats['last_error'] else "")
+    )
+    if events:
+        st.markdown("\n".join(f"- {event}" for event in events))
+
+
+@timed_fragment("Gợi ý thời khóa biểu")
+def planner_panel(catalogue, courses):
+    sections = catalogue.sections
+    by_subject = catalogue.derived('by_subject', lambda t: t.rows_by_subject())
+    subject_names = {ma: sections[rows[0]].get('ten_mon', '') for ma, rows in by_subject.items() if ma}
+    wanted = st.multiselect(
+        "Môn muốn học:", sorted(subject_names),
+        format_func=lambda ma: f"{ma} - {subject_names[ma]}", key="plan_subjects"
+    )
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        rank_by = st.selectbox("Ưu tiên:", list(RANKINGS), format_func=RANKINGS.get, key="plan_rank")
+    with col2:
+        budget = st.slider("Thời gian tìm tối đa (giây):", 0.2, 5.0, 1.0, 0.2, key="plan_budget")
+    with col3:
+        skip_full = st.checkbox("Bỏ lớp đã hết chỗ", value=True, key="plan_skip_full")
+
+    if st.button("🔎 Tìm phương án", disabled=not wanted):
+        candidates = {}
+        for ma in wanted:
+            options = []
+            for i in by_subject[ma]:
+                s = sections[i]
+                if skip_full and s.get('sl_cl') is not None and s['sl_cl'] <= 0:
+                    continue
+                options.append(Option(s['id_to_hoc'], section_label(s), s['slots'], s['mask'], row=i))
+            candidates[ma] = options
+        # Lịch cố định: môn đã đăng ký và các lớp đang trong giỏ thuộc môn khác
+        fixed = [Option(course.group_id, course.course_id, course.slots, course.mask) for course in courses]
+        fixed += [Option(cls.id, cls.label, cls.slots, cls.mask)
+                  for cls in st.session_state.selected_classes if cls.code not in wanted]
+        t0 = time.perf_counter()
+        plans, complete = plan_timetables(candidates, fixed, time_budget=budget, max_results=2000)
+        st.session_state.plan_results = {
+            'plans': rank_plans(plans, fixed, by=rank_by)[:10],
+            'found': len(plans),
+            'complete': complete,
+            'elapsed_ms': (time.perf_counter() - t0) * 1000,
+        }
+
+    plan_results = st.session_state.get("plan_results")
+    if plan_results:
+        st.caption(
+            f"Tìm thấy {plan_results['found']} phương án trong {plan_results['elapsed_ms']:.0f} ms"
+            + ("" if plan_results['complete'] else " (dừng sớm do giới hạn thời gian/số phương án)")
+            + f" · hiển thị {len(plan_results['plans'])} phương án tốt nhất"
+        )
+        if not plan_results['plans']:
+            st.info("Không có tổ hợp lớp nào không trùng lịch.")
+        for n, (metrics, plan) in enumerate(plan_results['plans'], 1):
+            st.markdown(
+                f"**Phương án {n}:** {metrics['days']} ngày lên trường · "
+                f"{metrics['early']} ngày học tiết 1 · {metrics['gaps']} tiết trống\n"
+                + "\n".join(f"- {option.label}" for option in plan.values())
+            )
+            if st.button("🛒 Thêm phương án vào giỏ", key=f"plan_add_{n}"):
+                cart = st.session_state.selected_classes
+                # Phương án thay cho các lớp cùng môn đang trong giỏ, nếu không giỏ có thể giữ hai lớp trùng lịch của một môn
+                cart.remove_subjects(plan)
+                for ma, option in plan.items():
+                    cart.add(CartEntry(option.key, option.label, ma, option.slots, option.mask))
+                st.rerun()
+
+
+@timed_fragment("Xuất dữ liệu")
+def export_panel(courses_data):
+    courses = courses_data["courses"]
+    # Tạo tabs cho các chức năng khác nhau
+    tab1, tab2, tab3 = st.tabs(["📋 Bảng dữ liệu", "📥 Tải xuống", "🔍 Dữ liệu Raw"])
+    
+    with tab1:
+        # Hiển thị bảng; DataFrame chỉ dựng lại khi courses_data đổi
+        if courses:
+            st.dataframe(session_memo('courses_df', courses_data, courses_frame), use_container_width=True)
+        else:
+            st.info("Không có dữ liệu để hiển thị")
+    
+    with tab2:
+        if courses:
+            # Tệp chỉ được dựng khi bấm tải, ghi nhớ theo hash nội dung
+            export_cache = st.session_state.setdefault('export_cache', ExportCache())
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            cols = st.columns(len(FORMATS))
+            for col, (name, fmt) in zip(cols, FORMATS.items()):
+                with col:
+                    if not export_available(name):
+                        st.button(f"📥 {fmt.label}", key=f"export_{name}", disabled=True,
+                                  help=f"Cần cài {' hoặc '.join(fmt.requires)}", use_container_width=True)
+                        continue
+                    st.download_button(
+                        label=f"📥 Tải xuống {fmt.label}",
+                        data=export_cache.opener(courses_data, name),
+                        file_name=f"danh_sach_mon_hoc_{stamp}.{fmt.extension}",
+                        mime=fmt.mime,
+                        key=f"download_{name}",
+                        use_container_width=True
+                    )
+        else:
+            st.info("Không có dữ liệu để tải xuống")
+    
+    with tab3:
+        st.write("**Dữ liệu Raw từ API:**")
+        if 'raw_data' in courses_data:
+            st.json(courses_data['raw_data'])
+        else:
+            st.json(courses_data)
+
 
 # Header chính
 st.markdown('<h1 class="main-header">🎓 Hệ thống Quản lý Đào tạo - Danh sách môn học</h1>', 
@@ -211,34 +823,97 @@ with st.sidebar:
     
     # Hiển thị trạng thái kết nối
     st.write("**Trạng thái:** 🟢 Kết nối API thực")
-    st.write("**Server:** ftugate.ftu.edu.vn")
+    st.write(f"**Server:** {urlsplit(api.base_url).netloc}")
+
+    # Độ trễ theo endpoint (dùng chung cho mọi phiên). Các bảng chẩn đoán chỉ dựng khi bật
+    # (nội dung expander luôn được tính dù đang đóng) để trang chưa đăng nhập không cần pandas
+    if st.toggle("📈 Độ trễ API (ms)", key="show_latency"):
+        latency_rows = api.transport.stats.snapshot()
+        if latency_rows:
+            show_table(latency_rows)
+        else:
+            st.caption("Chưa có request nào")
+
+    # Hàng đợi request theo loại ưu tiên: thời gian chờ lượt tách riêng với thời gian phục vụ (ms)
+    scheduler = api.scheduler
+    if st.toggle(f"🚦 Hàng đợi request (tối đa {scheduler.concurrency} đồng thời)", key="show_scheduler"):
+        show_table(scheduler.snapshot())
+
+    # Bộ nhớ: danh sách lớp dùng chung chỉ tính một lần, không tính vào từng phiên
+    if st.toggle("🧠 Báo cáo bộ nhớ", key="show_memory"):
+        snapshot = catalogue_cache.current()
+        shared_ids = {id(snapshot.sections)} if snapshot else set()
+        session_bytes = deep_sizeof(dict(st.session_state), exclude=shared_ids)
+        rss = process_rss()
+        st.write(f"**RSS tiến trình:** {rss / 2**20:.1f} MB" if rss else "**RSS tiến trình:** N/A")
+        if snapshot:
+            st.write(f"**Danh sách lớp dùng chung:** {deep_sizeof(snapshot) / 2**20:.1f} MB ({len(snapshot.sections)} lớp)")
+        st.write(f"**Phiên này:** {session_bytes / 2**10:.1f} KB")
+
+    # Phân tích thời gian theo giai đoạn cho các lần chạy lại gần nhất của phiên này
+    if st.toggle("🔬 Phân tích thời gian (debug)", key="show_profile"):
+        traces = list(st.session_state.get('traces', ()))[::-1]
+        if traces:
+            picked = st.selectbox(
+                f"Lần chạy lại ({len(traces)} gần nhất):", range(len(traces)), key="profile_trace",
+                format_func=lambda i: f"{datetime.fromtimestamp(traces[i].at).strftime('%H:%M:%S')} · "
+                                      f"{traces[i].name} · {traces[i].total_ms:.0f} ms"
+            )
+            rows = trace_rows(traces[picked])
+            if rows:
+                show_table(rows)
+            else:
+                st.caption("Không có giai đoạn nào được đo trong lần chạy này")
+        with st.expander("Tổng hợp toàn tiến trình (ms)", expanded=False):
+            span_rows = profiling.STATS.snapshot()
+            if span_rows:
+                show_table(span_rows, rename={'endpoint': 'giai đoạn', 'phase': 'loại'})
+            st.download_button(
+                "⬇️ Số liệu Prometheus", get_metrics_collector()(), file_name="qldt.prom", mime="text/plain",
+                key="download_metrics"
+            )
+            if metrics_exporter is not None:
+                target = " · ".join(filter(None, (
+                    metrics_exporter.path,
+                    f"http://{metrics_exporter.server.server_address[0]}:{metrics_exporter.server.server_address[1]}/metrics"
+                    if metrics_exporter.server else None,
+                )))
+                st.caption(f"Đang xuất tới {target}" + (
+                    f" · lỗi ghi tệp: {metrics_exporter.last_error}" if metrics_exporter.last_error else ""))
+
+    # Thời gian chạy lại: toàn trang và từng phần (fragment) lần gần nhất
+    if st.toggle("⏱️ Thời gian chạy lại", key="show_timing"):
+        rerun_times = st.session_state.get('rerun_times', {})
+        if rerun_times:
+            show_table([{'phần': name, 'ms': ms} for name, ms in rerun_times.items()])
     
+    if st.session_state.get("sidebar_notice"):
+        st.success(st.session_state.pop("sidebar_notice"))
+
     if not st.session_state.logged_in:
         with st.form("login_form"):
             username = st.text_input("Tên đăng nhập:")
             password = st.text_input("Mật khẩu:", type="password")
+            remember = st.checkbox(
+                "Tự đăng nhập lại khi token sắp hết hạn",
+                help="Mật khẩu được giữ nguyên văn (không mã hóa) trong phiên này trên bộ nhớ máy chủ ứng dụng, "
+                     "cho tới khi đăng xuất hoặc tự đăng nhập lại thất bại"
+            )
             login_button = st.form_submit_button("Đăng nhập")
         
         if login_button:
             if username and password:
                 try:
                     with st.spinner("Đang đăng nhập..."):
-                        login_data = api.login(username, password)
-                        st.session_state.logged_in = True
-                        st.session_state.user_info = login_data
-                        st.session_state.token = login_data["access_token"]
-                        # Parse 'logtime' from API response
-                        logtime_str = login_data.get("logtime", "")
-                        try:
-                            logtime_parsed = datetime.strptime(logtime_str, "%y%m%d%H%M%S")
-                            st.session_state.login_time = logtime_parsed.strftime("%Y-%m-%d %H:%M:%S")
-                            st.session_state.token_expiry_ts = int(logtime_parsed.timestamp()) + login_data["expires_in"]
-                        except ValueError:
-                            st.session_state.login_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            st.session_state.token_expiry_ts = int(time.time()) + login_data["expires_in"]
-                        st.success("Đăng nhập thành công!")
-                        time.sleep(1)
+                        apply_login(api.login(username, password))
+                        # Chỉ giữ mật khẩu trong phiên khi người dùng cho phép tự đăng nhập lại
+                        if remember:
+                            st.session_state.saved_credentials = (username, password)
+                        # Thông báo hiện ở lần vẽ sau thay vì chờ 1 giây trước khi chạy lại
+                        st.session_state.sidebar_notice = "Đăng nhập thành công!"
                         st.rerun()
+                except SchedulerBusy as e:
+                    st.warning(f"⏳ {e}")
                 except Exception as e:
                     st.error(f"Lỗi đăng nhập: {str(e)}")
             else:
@@ -255,72 +930,24 @@ with st.sidebar:
         if 'student_id' in user_info:
             st.write(f"**Mã SV:** {user_info['student_id']}")
         if "token_expiry_ts" in st.session_state:
-            if "token_expiry_ts" in st.session_state:
-                components.html(f"""
-                    <html>
-                    <head>
-                        <link href="https://fonts.googleapis.com/css2?family=Source+Sans+Pro:wght@400;600&display=swap" rel="stylesheet">
-                        <style>
-                            body {{
-                                margin: 0;
-                                padding: 0;
-                                font-family: 'Source Sans Pro', sans-serif;
-                            }}
-                            #countdown-container {{
-                                font-size: 16px;
-                                font-weight: 600;
-                                color: #32CD32;
-                                # margin-top: 10px;
-                                text-align: left;
-                                padding-left: 0;
-                            }}
-                        </style>
-                    </head>
-                    <body>
-                        <div id="countdown-container">
-                            <span>Token còn lại:</span>
-                            <span id="countdown" style="font-family: 'Source Sans Pro', sans-serif;">--:--</span>
-                        </div>
-                        <script>
-                            function updateCountdown() {{
-                                var expiry = {st.session_state.token_expiry_ts} * 1000;
-                                var now = new Date().getTime();
-                                var distance = expiry - now;
-
-                                var countdownEl = document.getElementById("countdown");
-
-                                if (distance <= 0) {{
-                                    countdownEl.innerHTML = "Hết hạn";
-                                    countdownEl.style.color = "red";
-                                    clearInterval(x);
-                                    return;
-                                }}
-
-                                var minutes = Math.floor((distance % (1000 * 60 * 60)) / (1000 * 60));
-                                var seconds = Math.floor((distance % (1000 * 60)) / 1000);
-                                countdownEl.innerHTML =
-                                    ("0" + minutes).slice(-2) + ":" + ("0" + seconds).slice(-2);
-                            }}
-
-                            updateCountdown();
-                            var x = setInterval(updateCountdown, 1000);
-                        </script>
-                    </body>
-                    </html>
-                """, height=40)
+            token_countdown(st.session_state.token_expiry_ts)
         
         if st.button("Đăng xuất"):
             try:
                 with st.spinner("Đang đăng xuất..."):
                     api.logout(st.session_state.token)
+                    seat_poller.unwatch(st.session_state.watcher_id)
                     st.session_state.logged_in = False
                     st.session_state.user_info = None
                     st.session_state.token = None
                     st.session_state.courses_data = None
+                    st.session_state.course_changes = None
+                    st.session_state.pop('batch_report', None)
+                    st.session_state.pop('saved_credentials', None)
+                    st.session_state.pop('token_check', None)
                     if 'login_time' in st.session_state:
                         del st.session_state.login_time
-                    st.success("Đã đăng xuất thành công!")
-                    time.sleep(1)
+                    st.session_state.sidebar_notice = "Đã đăng xuất thành công!"
                     st.rerun()
             except Exception as e:
                 st.error(f"Lỗi đăng xuất: {str(e)}")
@@ -329,6 +956,8 @@ with st.sidebar:
                 st.session_state.user_info = None
                 st.session_state.token = None
                 st.session_state.courses_data = None
+                st.session_state.pop('saved_credentials', None)
+                st.session_state.pop('token_check', None)
                 if 'login_time' in st.session_state:
                     del st.session_state.login_time
 
@@ -342,9 +971,11 @@ if st.session_state.logged_in:
         if st.button("📋 Tải danh sách môn học đã đăng ký", use_container_width=True):
             try:
                 with st.spinner("Đang tải danh sách môn học..."):
-                    courses_data = api.get_registered_courses(st.session_state.token)
-                    st.session_state.courses_data = courses_data
+                    current = st.session_state.courses_data
+                    refresh_courses() if current and 'error' not in current else load_courses()
                     st.rerun()
+            except SchedulerBusy as e:
+                st.warning(f"⏳ {e}")
             except Exception as e:
                 st.error(f"Lỗi tải danh sách: {str(e)}")
     
@@ -383,187 +1014,89 @@ if st.session_state.logged_in:
         courses = st.session_state.courses_data["courses"]
         
         if courses:
-            for i, course in enumerate(courses, 1):
-                with st.expander(f"📖 {course['course_id']} - {course['course_name']}", expanded=True):
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.write(f"**Mã môn học:** {course['course_id']}")
-                        st.write(f"**Tên môn học:** {course['course_name']}")
-                        if course.get('english_name'):
-                            st.write(f"**Tên tiếng Anh:** {course['english_name']}")
-                        st.write(f"**Số tín chỉ:** {course['credits']}")
-                        st.write(f"**Trạng thái:** {course['status']}")
-                        if course.get('group_number'):
-                            st.write(f"**Nhóm:** {course['group_number']}")
-                        if course.get('registration_date'):
-                            st.write(f"**Ngày đăng ký:** {course['registration_date']}")
-                    
-                    with col2:
-                        st.write(f"**Giảng viên:** {course['lecturer']}")
-                        st.write(f"**Thời gian:** {course['schedule']}")
-                        if course.get('room'):
-                            st.write(f"**Phòng học:** {course['room']}")
-                        if course.get('class_name'):
-                            st.write(f"**Lớp:** {course['class_name']}")
-                        if course.get('group_id'):
-                            st.write(f"**Mã nhóm:** {course['group_id']}")
-                    
-                    # Hiển thị thời khóa biểu chi tiết
-                    if course.get('week_schedule'):
-                        st.write("**Thời khóa biểu chi tiết:**")
-                        schedule_parts = course['week_schedule'].split('<hr>')
-                        for part in schedule_parts:
-                            if part.strip():
-                                st.write(f"• {part.strip()}")
+            registered_courses_panel(courses, st.session_state.get('course_changes'))
         else:
             st.info("Không có môn học nào được đăng ký trong học kỳ này.")
 
         # Ensure session states
-        st.session_state.setdefault("selected_classes", [])
+        st.session_state.setdefault("selected_classes", Cart())
         st.session_state.setdefault("available_sections", [])
+        catalogue, section_index = None, None
 
-        # Automatically load class list and fill in ten_mon
-        if not st.session_state.available_sections:
-            with st.spinner("Đang tải danh sách lớp..."):
-                try:
-                    section_data = api.get_sections(st.session_state.token)
-                    ds_nhom_to = section_data.get("ds_nhom_to", [])
-                    ds_mon_hoc = section_data.get("ds_mon_hoc", [])
-                    mon_dict = {m["ma"].strip(): m["ten"] for m in ds_mon_hoc if m.get("ma") and m.get("ten")}
-                    for nhom in ds_nhom_to:
-                        ma_mon = nhom.get("ma_mon", "").strip()
-                        nhom["ten_mon"] = mon_dict.get(ma_mon, "")
-                    st.session_state.available_sections = ds_nhom_to
-                except Exception as e:
-                    st.error(f"Lỗi khi tải danh sách lớp: {str(e)}")
+        # Lấy danh sách lớp (đã gắn ten_mon) từ cache dùng chung; chỉ tham chiếu, không sao chép
+        with st.spinner("Đang tải danh sách lớp..."):
+            try:
+                token = st.session_state.token
+                with span("lấy danh sách lớp"):
+                    catalogue = catalogue_cache.get(lambda: api.get_section_table(token))
+                st.session_state.available_sections = catalogue.sections
+                section_index = catalogue.derived('search_index', SectionIndex)
+            except SchedulerBusy as e:
+                st.warning(f"⏳ {e}")
+            except Exception as e:
+                st.error(f"Lỗi khi tải danh sách lớp: {str(e)}")
 
         st.markdown("---")
         st.subheader("📝 Đăng ký lớp tín chỉ")
 
+        cache_stats = catalogue_cache.stats()
+        col1, col2 = st.columns([6, 1])
+        with col1:
+            if cache_stats['age'] is not None:
+                source = " (bản lưu trên máy chủ ứng dụng)" if cache_stats['source'] == 'disk' else ""
+                st.caption(
+                    f"🗂️ {cache_stats['sections']} lớp · cập nhật {format_age(cache_stats['age'])} trước{source} "
+                    f"(TTL {catalogue_cache.ttl:.0f} giây) · hit {cache_stats['hits']} · "
+                    f"miss {cache_stats['misses']} · gộp {cache_stats['coalesced']}"
+                    + (" · ⏳ đang làm mới nền" if cache_stats['refreshing'] else "")
+                )
+                if cache_stats['stale'] and not cache_stats['refreshing']:
+                    st.warning(
+                        "⚠️ Danh sách lớp đã cũ, số chỗ còn lại có thể không chính xác."
+                        + (f" Lần làm mới gần nhất lỗi: {cache_stats['last_error']}" if cache_stats['last_error'] else "")
+                    )
+        with col2:
+            if st.button("🔄 Làm mới", key="refresh_catalogue",
+                         help="Tải lại danh sách lớp từ server ở nền (dùng chung cho mọi phiên)"):
+                # Không bỏ bản đang giữ: mọi phiên vẫn dùng bản hiện tại cho tới khi tải xong
+                token = st.session_state.token
+                result = catalogue_cache.refresh(lambda: api.get_section_table(token))
+                st.toast({
+                    'started': "🔄 Đang tải lại danh sách lớp ở nền, bảng sẽ cập nhật ở lần thao tác tiếp theo",
+                    'running': "⏳ Danh sách lớp đang được làm mới",
+                    'recent': f"Danh sách lớp vừa cập nhật {format_age(cache_stats['age'] or 0)} trước, chưa cần tải lại",
+                    'backoff': "Lần làm mới trước bị lỗi, vui lòng thử lại sau ít phút",
+                }[result])
+
+        # Lịch cố định để kiểm tra trùng ngay tại máy: môn đã đăng ký + các lớp trong giỏ
+        clash_checker = ClashChecker()
+        for course in courses:
+            clash_checker.add(course.group_id, f"{course.code} (đã đăng ký)", course.slots, course.mask)
+        for cls in st.session_state.selected_classes:
+            clash_checker.add(cls.id, cls.label, cls.slots, cls.mask)
+
         # Live search
-        search_query = st.text_input("🔍 Tìm lớp học (mã môn, tên môn hoặc nhóm):")
-
-        if len(search_query.strip()) >= 3:
-            query = search_query.lower()
-            groups = defaultdict(lambda: defaultdict(list))
-
-            for s in st.session_state.available_sections:
-                combined = f"{s.get('ma_mon', '')} {s.get('ten_mon', '')} {s.get('nhom_to', '')}".lower()
-                if query in combined:
-                    ten_mon = s.get('ten_mon', 'Không rõ')
-                    ma_mon = s.get('ma_mon', 'N/A')
-                    groups[ten_mon][ma_mon].append(s)
-
-            for ten_mon, ma_mon_dict in list(groups.items())[:5]:
-                with st.expander(f"📚 {ten_mon}", expanded=False):
-                    for ma_mon, sections in ma_mon_dict.items():
-                        with st.expander(f"📘 {ma_mon}", expanded=False):
-                            for s in sections:
-                                label = f"{s['ma_mon']} - {ten_mon} (Nhóm {s['nhom_to']})"
-                                already_selected = any(cls['label'] == label for cls in st.session_state.selected_classes)
-                                if not already_selected:
-                                    if st.button(f"➕ {label}", key=f"add_{s['id_to_hoc']}"):
-                                        st.session_state.selected_classes.append({'id': s['id_to_hoc'], 'label': label})
-        else:
-            if search_query:
-                st.warning("Vui lòng nhập ít nhất 3 ký tự để tìm lớp.")
+        search_panel(catalogue, section_index, clash_checker)
+
+        # Giữ ấm kết nối và kiểm tra token trước giờ mở đăng ký
+        prepare_panel()
 
         # Show selected classes (cart)
-        if st.session_state.selected_classes:
-            st.markdown("### 🛒 Lớp đã chọn:")
-            for i, cls in enumerate(st.session_state.selected_classes):
-                col1, col2 = st.columns([6, 1])
-                with col1:
-                    st.markdown(f"- {cls['label']}")
-                with col2:
-                    if st.button("❌", key=f"remove_{i}"):
-                        st.session_state.selected_classes.pop(i)
-                        st.session_state["rerun_flag"] = True
-                        break
-
-            if st.button("✅ Đăng ký tất cả lớp đã chọn"):
-                with st.spinner("Đang thực hiện đăng ký..."):
-                    success, fail = 0, 0
-                    failed_labels = []  # <-- define this
-                    for cls in st.session_state.selected_classes:
-                        try:
-                            result = api.register_course(st.session_state.token, cls['id'])
-                            if result.get("data", {}).get("is_thanh_cong"):
-                                st.success(f"✅ {cls['label']}")
-                                success += 1
-                            else:
-                                st.error(f"❌ {cls['label']}: {result.get('data', {}).get('thong_bao_loi', 'Không rõ lỗi')}")
-                                fail += 1
-                                failed_labels.append(cls['label'])
-                        except Exception as e:
-                            st.error(f"⚠️ {cls['label']}: {str(e)}")
-                            fail += 1
-                            failed_labels.append(cls['label'])
-                    st.info(f"Hoàn tất: {success} thành công, {fail} thất bại.")
-                    st.session_state.selected_classes = [
-                        cls for cls in st.session_state.selected_classes
-                        if cls['label'] in failed_labels
-                    ]
-
-        # Rerun handler
-        if st.session_state.get("rerun_flag"):
-            del st.session_state["rerun_flag"]
-            st.rerun()
+        cart_panel(clash_checker)
 
+        # Thay đổi số chỗ của các lớp đang theo dõi, đẩy từ luồng quét chung
+        seat_watch_panel()
+
+        # Gợi ý thời khóa biểu: chọn môn, tìm các tổ hợp lớp không trùng lịch
+        if catalogue is not None:
+            with st.expander("🧩 Gợi ý thời khóa biểu", expanded=False):
+                planner_panel(catalogue, courses)
 
         # Xuất dữ liệu
         st.markdown("---")
         st.subheader("📊 Xuất dữ liệu")
         
-        # Tạo tabs cho các chức năng khác nhau
-        tab1, tab2, tab3 = st.tabs(["📋 Bảng dữ liệu", "📥 Tải xuống", "🔍 Dữ liệu Raw"])
-        
-        with tab1:
-            # Hiển thị bảng
-            if courses:
-                df = pd.DataFrame(courses)
-                st.dataframe(df, use_container_width=True)
-            else:
-                st.info("Không có dữ liệu để hiển thị")
-        
-        with tab2:
-            if courses:
-                df = pd.DataFrame(courses)
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Nút download CSV
-                    csv = df.to_csv(index=False, encoding='utf-8-sig')
-                    st.download_button(
-                        label="📥 Tải xuống CSV",
-                        data=csv,
-                        file_name=f"danh_sach_mon_hoc_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                        mime="text/csv",
-                        use_container_width=True
-                    )
-                
-                with col2:
-                    # Xuất JSON
-                    json_data = json.dumps(st.session_state.courses_data, 
-                                         ensure_ascii=False, indent=2)
-                    st.download_button(
-                        label="📥 Tải xuống JSON",
-                        data=json_data,
-                        file_name=f"danh_sach_mon_hoc_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                        mime="application/json",
-                        use_container_width=True
-                    )
-            else:
-                st.info("Không có dữ liệu để tải xuống")
-        
-        with tab3:
-            st.write("**Dữ liệu Raw từ API:**")
-            if 'raw_data' in st.session_state.courses_data:
-                st.json(st.session_state.courses_data['raw_data'])
-            else:
-                st.json(st.session_state.courses_data)
+        export_panel(st.session_state.courses_data)
 
 else:
     # Hiển thị thông báo khi chưa đăng nhập
@@ -594,4 +1127,10 @@ st.markdown(
     </div>
     """, 
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+rerun_ms = (time.perf_counter() - _run_started) * 1000
+st.session_state.setdefault('rerun_times', {})["Toàn trang"] = rerun_ms
+record_trace(profiling.finish_trace())
+if st.session_state.get('show_timing'):
+    st.caption(f"⏱️ Toàn trang: {rerun_ms:.1f} ms")
@@ -0,0 +1,23 @@
+"""Các thành phần dùng chung (không phụ thuộc giao diện) của ứng dụng QLDT"""
+import importlib
+
+# Tên hay dùng -> module chứa nó; chỉ nạp khi được truy cập nên `import qldt` không kéo theo requests hay pandas
+_LAZY = {
+    'QLDTApi': 'qldt.api',
+    'Transport': 'qldt.transport',
+    'SectionTable': 'qldt.columnar',
+    'build_courses_data': 'qldt.courses',
+    'update_courses_data': 'qldt.courses',
+    'parse_sections': 'qldt.streaming',
+}
+
+__all__ = sorted(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module 'qldt' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
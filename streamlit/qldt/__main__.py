@@ -0,0 +1,6 @@
+"""python -m qldt: xem qldt.cli"""
+import sys
+
+from qldt.cli import main
+
+sys.exit(main())
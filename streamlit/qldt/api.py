@@ -0,0 +1,156 @@
+"""Các API của FTUGate (QLDT) dùng trong ứng dụng; không phụ thuộc Streamlit nên dùng được cả trong benchmark"""
+import json
+import os
+import time
+from contextlib import nullcontext
+
+from qldt.courses import build_courses_data, update_courses_data
+from qldt.profiling import span
+from qldt.scheduler import CATALOGUE, COURSES, LOGIN, REGISTER
+from qldt.streaming import parse_sections
+
+# Đổi bằng QLDT_BASE_URL, ví dụ trỏ tới server giả lập trong benchmarks/mock_ftugate.py
+DEFAULT_BASE_URL = "https://ftugate.ftu.edu.vn"
+
+
+class QLDTApi:
+    def __init__(self, transport, scheduler=None, base_url=None):
+        self.base_url = (base_url or os.environ.get('QLDT_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')
+        self.transport = transport
+        # Mọi request ra ngoài đi qua bộ điều phối dùng chung (nếu có) theo loại ưu tiên
+        self.scheduler = scheduler
+        self.default_headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json, text/plain, */*',
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36',
+        }
+    
+    def _headers(self, token=None, content_type=None):
+        headers = self.default_headers.copy()
+        if token: headers['Authorization'] = f'Bearer {token}'
+        if content_type: headers['Content-Type'] = content_type
+        return headers
+
+    def _slot(self, priority):
+        return self.scheduler.slot(priority) if self.scheduler is not None else nullcontext()
+
+    def _post(self, path, data=None, json=None, token=None, content_type=None, priority=COURSES):
+        url = f"{self.base_url}{path}"
+        headers = self._headers(token, content_type)
+        with span(f"api {path.rsplit('/', 1)[-1]}"):
+            with self._slot(priority):
+                resp = self.transport.post(url, endpoint=path, data=data, json=json, headers=headers)
+            resp.raise_for_status()
+            return resp.json()
+    
+    def login(self, username, password):
+        """Đăng nhập vào hệ thống QLDT"""
+        return self._post(
+            '/api/auth/login',
+            data={'username':username, 'password':password, 'grant_type':'password'},
+            content_type='application/x-www-form-urlencoded',
+            priority=LOGIN
+        )
+    
+    def _fetch_registered(self, token):
+        data = self._post(
+            '/cq/hanoi/api/dkmh/w-locdskqdkmhsinhvien',
+            json={'is_CVHT': False, 'is_Clear': True},
+            token=token
+        )
+        
+        # Kiểm tra nếu data là string
+        if isinstance(data, str):
+            try:
+                data = json.loads(data)
+            except json.JSONDecodeError:
+                return None, {
+                    'courses': [],
+                    'total_credits': 0,
+                    'total_courses': 0,
+                    'raw_data': {'raw_response': data},
+                    'error': 'Dữ liệu trả về không đúng định dạng JSON'
+                }
+        return data, None
+
+    def get_registered_courses(self, token):
+        """Lấy danh sách môn học đã đăng ký"""
+        data, error = self._fetch_registered(token)
+        if error:
+            return error
+        with span("dựng danh sách môn"):
+            return build_courses_data(data)
+
+    def refresh_registered_courses(self, token, courses_data):
+        """Tải lại và chỉ dựng lại các môn thay đổi; trả về (courses_data mới, các thay đổi)"""
+        data, error = self._fetch_registered(token)
+        if error:
+            return error, None
+        with span("cập nhật danh sách môn"):
+            return update_courses_data(courses_data, data)
+    
+    SECTIONS_PATH = '/cq/hanoi/api/dkmh/w-locdsnhomto'
+    SECTIONS_QUERY = {
+        'is_CVHT': False,
+        'additional': {
+            'paging': {'limit': 99999, 'page': 1},
+            'ordering': [{'name': '', 'order_type': ''}]
+        }
+    }
+
+    def get_sections(self, token):
+        """Lấy danh sách nhóm tổ học và danh sách môn trong học kỳ"""
+        data = self._post(self.SECTIONS_PATH, json=self.SECTIONS_QUERY, token=token, priority=CATALOGUE)
+        return {
+            'ds_nhom_to': data.get('data', {}).get('ds_nhom_to', []),
+            'ds_mon_hoc': data.get('data', {}).get('ds_mon_hoc', [])
+        }
+    
+    def get_section_table(self, token):
+        """Như get_sections nhưng đọc dần phản hồi và ghi thẳng vào SectionTable, không dựng cả cây JSON"""
+        with span(f"api {self.SECTIONS_PATH.rsplit('/', 1)[-1]}"), self._slot(CATALOGUE):
+            return self.transport.post_stream(
+                f"{self.base_url}{self.SECTIONS_PATH}",
+                lambda resp, chunks: parse_sections(chunks),
+                endpoint=self.SECTIONS_PATH, json=self.SECTIONS_QUERY, headers=self._headers(token)
+            )
+    
+    def register_course(self, token, id_to_hoc):
+        """Đăng ký một môn học"""
+        return self._post(
+            '/cq/hanoi/api/dkmh/w-xulydkmhsinhvien',
+            json={'filter': {'id_to_hoc': id_to_hoc, 'is_checked': True, 'sv_nganh': 1}},
+            token=token,
+            priority=REGISTER
+        )
+    
+    # API cần xác thực nhẹ nhất đã biết: danh sách môn đã đăng ký của chính sinh viên (vài KB)
+    TOKEN_CHECK_PATH = '/cq/hanoi/api/dkmh/w-locdskqdkmhsinhvien'
+
+    def check_token(self, token):
+        """Gọi thử API cần xác thực nhẹ nhất: (token còn dùng được, ms); lỗi khác 401/403 được ném ra.
+
+        Xếp hàng ở mức ưu tiên thấp nhất nên không làm chậm request đăng ký; chỉ xem mã trạng thái.
+        """
+        t0 = time.perf_counter()
+        with span(f"api {self.TOKEN_CHECK_PATH.rsplit('/', 1)[-1]}"), self._slot(CATALOGUE):
+            resp = self.transport.post(
+                f"{self.base_url}{self.TOKEN_CHECK_PATH}", endpoint=self.TOKEN_CHECK_PATH,
+                json={'is_CVHT': False, 'is_Clear': True}, headers=self._headers(token)
+            )
+        valid = resp.status_code not in (401, 403)
+        if valid:
+            resp.raise_for_status()
+        return valid, (time.perf_counter() - t0) * 1000
+
+    def warm_up(self, connections=1):
+        """Mở sẵn/giữ ấm các kết nối keep-alive tới server qua proxy (xem Transport.warm)"""
+        with self._slot(LOGIN):
+            return self.transport.warm(f"{self.base_url}/", connections)
+
+    def logout(self, token):
+        """Đăng xuất khỏi hệ thống"""
+        try:
+            return self._post('/api/auth/logout', json={}, token=token)
+        except:
+            return {'success': True, 'message': 'Logged out (token may have expired)'}
@@ -0,0 +1,36 @@
+"""Hạn dùng của access token: đọc claim exp của JWT (không xác minh chữ ký) và phân loại thời gian còn lại"""
+import base64
+import json
+import time
+
+# Còn ít hơn ngần này (giây) thì coi là sắp hết hạn: đủ để đăng nhập lại trước khi mở đăng ký
+EXPIRY_MARGIN = 300
+
+
+def jwt_expiry(token):
+    """Thời điểm hết hạn (epoch) từ claim exp của JWT, None nếu token không phải JWT hoặc không có exp"""
+    parts = token.split('.') if isinstance(token, str) else []
+    if len(parts) != 3:
+        return None
+    payload = parts[1] + '=' * (-len(parts[1]) % 4)
+    try:
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+    except (ValueError, TypeError, AttributeError):
+        return None
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+def token_expiry(token, expiry_ts=None):
+    """Mốc hết hạn sớm nhất giữa claim exp và expiry_ts tính từ logtime + expires_in"""
+    known = [ts for ts in (jwt_expiry(token), expiry_ts) if ts is not None]
+    return min(known) if known else None
+
+
+def token_state(expiry, now=None, margin=EXPIRY_MARGIN):
+    """('valid' | 'expiring' | 'expired' | 'unknown', số giây còn lại hoặc None)"""
+    if expiry is None:
+        return 'unknown', None
+    remaining = expiry - (time.time() if now is None else now)
+    if remaining <= 0:
+        return 'expired', remaining
+    return ('expiring' if remaining < margin else 'valid'), remaining
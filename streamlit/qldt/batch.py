@@ -0,0 +1,73 @@
+"""Đăng ký hàng loạt: pool luồng có giới hạn, trả kết quả ngay khi từng request hoàn tất"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from qldt.stats import percentile
+
+# Giữ mức song song thấp để không dồn tải lên proxy và server đăng ký
+DEFAULT_WORKERS = 3
+MAX_WORKERS = 8
+
+
+def workers_from_env():
+    """Số luồng mặc định từ QLDT_REGISTER_WORKERS, giới hạn trong [1, MAX_WORKERS]"""
+    try:
+        workers = int(os.environ.get('QLDT_REGISTER_WORKERS', DEFAULT_WORKERS))
+    except ValueError:
+        workers = DEFAULT_WORKERS
+    return max(1, min(workers, MAX_WORKERS))
+
+
+def _register_one(register, token, index, cls):
+    t0 = time.perf_counter()
+    error = False
+    try:
+        result = register(token, cls['id'])
+        data = result.get('data', {})
+        ok = bool(data.get('is_thanh_cong'))
+        message = '' if ok else data.get('thong_bao_loi', 'Không rõ lỗi')
+    except Exception as e:
+        ok, message, error = False, str(e), True
+    return {
+        'index': index,
+        'id': cls['id'],
+        'label': cls['label'],
+        'ok': ok,
+        'error': error,
+        'message': message,
+        'elapsed_ms': (time.perf_counter() - t0) * 1000,
+    }
+
+
+def register_batch(register, token, classes, max_workers=DEFAULT_WORKERS):
+    """Đăng ký các lớp trong giỏ, sinh kết quả theo thứ tự hoàn thành.
+
+    max_workers=1 giữ đúng đường tuần tự cũ để so sánh.
+    """
+    classes = list(classes)
+    max_workers = max(1, min(max_workers, MAX_WORKERS, len(classes) or 1))
+    if max_workers == 1:
+        for index, cls in enumerate(classes):
+            yield _register_one(register, token, index, cls)
+        return
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='qldt-register') as pool:
+        futures = [pool.submit(_register_one, register, token, index, cls) for index, cls in enumerate(classes)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def summarize(results, total_ms, workers):
+    """Báo cáo theo đúng thứ tự giỏ kèm thống kê thời gian của lô"""
+    ordered = sorted(results, key=lambda r: r['index'])
+    timings = [r['elapsed_ms'] for r in ordered]
+    success = sum(1 for r in ordered if r['ok'])
+    return {
+        'results': ordered,
+        'success': success,
+        'fail': len(ordered) - success,
+        'workers': workers,
+        'p50_ms': percentile(timings, 50),
+        'p95_ms': percentile(timings, 95),
+        'total_ms': total_ms,
+    }
@@ -0,0 +1,89 @@
+"""Giỏ đăng ký: các lớp đã chọn theo thứ tự thêm vào, khóa theo id_to_hoc"""
+from qldt.timetable import schedule_mask
+
+
+def section_label(section, ten_mon=None):
+    """Nhãn hiển thị của một lớp: 'mã môn - tên môn (Nhóm n)'"""
+    return f"{section['ma_mon']} - {ten_mon or section.get('ten_mon', '')} (Nhóm {section['nhom_to']})"
+
+
+class CartEntry:
+    """Một lớp trong giỏ; nhãn, mã môn đã bỏ khoảng trắng và bitset lịch học tính sẵn khi thêm.
+
+    Truy cập được như dict (entry['id'], entry['label']) để dùng chung với qldt.batch.
+    """
+
+    __slots__ = ('id', 'label', 'code', 'slots', 'mask')
+
+    def __init__(self, id, label, ma_mon='', slots=(), mask=None):
+        self.id = id
+        self.label = label
+        self.code = (ma_mon or '').strip()
+        self.slots = tuple(slots)
+        self.mask = schedule_mask(self.slots) if mask is None else mask
+
+    @classmethod
+    def from_section(cls, section, ten_mon=None):
+        """Từ một dòng danh sách lớp (SectionRow): dùng lại slots và mask đã tính của bảng"""
+        return cls(section['id_to_hoc'], section_label(section, ten_mon), section['ma_mon'],
+                   section['slots'], section['mask'])
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __repr__(self):
+        return f"CartEntry({self.id!r}, {self.label!r})"
+
+
+class Cart:
+    """Các lớp đã chọn theo thứ tự thêm; kiểm tra, thêm và bỏ theo id_to_hoc trong O(1)"""
+
+    __slots__ = ('_entries',)
+
+    def __init__(self, entries=()):
+        self._entries = {}
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry):
+        """Thêm vào cuối giỏ; False nếu lớp đã có trong giỏ"""
+        if entry.id in self._entries:
+            return False
+        self._entries[entry.id] = entry
+        return True
+
+    def remove(self, id):
+        return self._entries.pop(id, None)
+
+    def remove_subjects(self, codes):
+        """Bỏ mọi lớp có mã môn (đã bỏ khoảng trắng) trong codes; trả về các lớp đã bỏ"""
+        codes = set(codes)
+        removed = [entry for entry in self._entries.values() if entry.code in codes]
+        for entry in removed:
+            del self._entries[entry.id]
+        return removed
+
+    def retain(self, ids):
+        """Chỉ giữ các lớp có id trong ids, giữ nguyên thứ tự"""
+        ids = set(ids)
+        self._entries = {key: entry for key, entry in self._entries.items() if key in ids}
+
+    def clear(self):
+        self._entries.clear()
+
+    def get(self, id, default=None):
+        return self._entries.get(id, default)
+
+    def __contains__(self, id):
+        return id in self._entries
+
+    def __iter__(self):
+        return iter(list(self._entries.values()))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"Cart({list(self._entries)!r})"
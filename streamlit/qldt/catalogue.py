@@ -0,0 +1,267 @@
+"""Bộ nhớ đệm danh sách lớp (w-locdsnhomto) dùng chung cho toàn tiến trình"""
+import os
+import random
+import threading
+import time
+
+from qldt.columnar import SectionTable
+
+DEFAULT_TTL = 300
+# Quá ngưỡng này thì bản cũ không được dùng tạm nữa, phiên phải chờ tải mới
+DEFAULT_MAX_STALE = 24 * 3600
+# Trễ ngẫu nhiên tối đa (giây) trước khi làm mới nền, để các tiến trình vừa deploy không cùng gọi server
+DEFAULT_REFRESH_JITTER = 5.0
+# Làm mới thủ công (nút của người dùng) bị bỏ qua khi bản hiện tại còn mới hơn mức này (giây)
+DEFAULT_MIN_REFRESH_AGE = 30.0
+
+
+class CatalogueSnapshot:
+    """Một phiên bản danh sách lớp (SectionTable đã gắn ten_mon); chỉ đọc, dùng chung giữa các phiên"""
+
+    def __init__(self, sections, version, fetched_at, fetch_ms, source='server', derived=None):
+        self.sections = sections
+        self.version = version
+        self.fetched_at = fetched_at
+        self.fetch_ms = fetch_ms
+        self.source = source
+        self._derived = dict(derived or {})
+        self._lock = threading.Lock()
+
+    def age(self):
+        return time.time() - self.fetched_at
+
+    def derived(self, name, build):
+        """Đối tượng dẫn xuất (chỉ mục, ...) dựng một lần từ sections cho snapshot này"""
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = build(self.sections)
+            return self._derived[name]
+
+    def derived_objects(self):
+        """Bản sao các đối tượng dẫn xuất đã dựng"""
+        with self._lock:
+            return dict(self._derived)
+
+
+class _Flight:
+    """Một lần tải đang chạy mà các phiên khác có thể chờ chung"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.snapshot = None
+        self.error = None
+
+
+class CatalogueCache:
+    """Cache có TTL; N phiên cùng lúc cache miss chỉ gây ra một request (single-flight).
+
+    Có store (qldt.snapshot.SnapshotStore) thì bản mới nhất được lưu xuống đĩa và nạp lại
+    khi khởi động. Bản đã hết TTL nhưng chưa quá max_stale vẫn được trả ngay trong khi
+    một luồng nền tải bản mới (stale-while-revalidate).
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, store=None, max_stale=DEFAULT_MAX_STALE,
+                 refresh_jitter=DEFAULT_REFRESH_JITTER, min_refresh_age=DEFAULT_MIN_REFRESH_AGE):
+        self.ttl = ttl
+        self.store = store
+        self.max_stale = max_stale
+        self.refresh_jitter = refresh_jitter
+        self.min_refresh_age = min_refresh_age
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._flight = None
+        self._version = 0
+        # Không nhận bản trên đĩa cũ hơn mốc này (sau invalidate)
+        self._not_before = 0.0
+        self._retry_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale_hits = 0
+        self.errors = 0
+        self.invalidations = 0
+        self.store_errors = 0
+        self.last_error = None
+        if store is not None:
+            self._load_from_store()
+
+    @classmethod
+    def from_env(cls, store=None):
+        """Tạo cache với TTL (giây) từ QLDT_CATALOGUE_TTL và QLDT_CATALOGUE_MAX_STALE"""
+        return cls(
+            ttl=float(os.environ.get('QLDT_CATALOGUE_TTL', DEFAULT_TTL)),
+            store=store,
+            max_stale=float(os.environ.get('QLDT_CATALOGUE_MAX_STALE', DEFAULT_MAX_STALE)),
+        )
+
+    def _fresh(self, snapshot):
+        return snapshot is not None and snapshot.age() < self.ttl
+
+    def _load_from_store(self):
+        """Nạp bản trên đĩa nếu mới hơn bản đang giữ; trả về True nếu đã nạp"""
+        current = self._snapshot
+        fetched_at = self.store.fetched_at()
+        if fetched_at is None or fetched_at <= max(self._not_before, current.fetched_at if current else 0.0):
+            return False
+        t0 = time.perf_counter()
+        loaded = self.store.load()
+        if loaded is None:
+            return False
+        sections, fetched_at = loaded
+        load_ms = (time.perf_counter() - t0) * 1000
+        with self._lock:
+            self._version += 1
+            self._snapshot = CatalogueSnapshot(sections, self._version, fetched_at, load_ms, source='disk')
+        return True
+
+    def get(self, fetch):
+        """Trả về snapshot còn hạn, hoặc gọi fetch() đúng một lần.
+
+        fetch() trả về kết quả get_sections (dict) hoặc SectionTable đã dựng sẵn (get_section_table).
+        Bản hết hạn nhưng chưa quá max_stale được trả ngay, fetch() chạy ở luồng nền.
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            if self._fresh(snapshot):
+                self.hits += 1
+                return snapshot
+            if snapshot is not None and snapshot.age() < self.max_stale:
+                self.stale_hits += 1
+                if self._flight is None and time.time() >= self._retry_at:
+                    flight = self._flight = _Flight()
+                    self.misses += 1
+                    threading.Thread(
+                        target=self._refresh, args=(fetch, flight, self.refresh_jitter),
+                        name='catalogue-refresh', daemon=True
+                    ).start()
+                return snapshot
+            flight = self._flight
+            leader = flight is None
+            if leader:
+                flight = self._flight = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            self._refresh(fetch, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.snapshot
+
+    def _refresh(self, fetch, flight, jitter=0.0):
+        try:
+            if jitter:
+                time.sleep(random.uniform(0, jitter))
+            # Tiến trình khác dùng chung tệp có thể vừa tải xong
+            if self.store is not None and self._load_from_store() and self._fresh(self._snapshot):
+                flight.snapshot = self._snapshot
+                return
+            t0 = time.perf_counter()
+            data = fetch()
+            if isinstance(data, SectionTable):
+                sections = data
+            else:
+                sections = SectionTable.from_records(data.get("ds_nhom_to", []), data.get("ds_mon_hoc", []))
+            flight.snapshot = self.put(sections, (time.perf_counter() - t0) * 1000)
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self.errors += 1
+                self.last_error = str(e)
+                # Lỗi khi làm mới thì đợi một lúc mới thử lại, phiên vẫn dùng bản cũ
+                self._retry_at = time.time() + min(self.ttl, 60)
+        finally:
+            with self._lock:
+                self._flight = None
+            flight.done.set()
+
+    def put(self, sections, fetch_ms=0.0, persist=True):
+        """Đặt bản mới vừa tải (SectionTable) làm snapshot hiện tại; trả về snapshot.
+
+        Bản mới chỉ khác bản đang giữ ở số chỗ thì dùng chung các cột còn lại và các đối tượng
+        dẫn xuất (chỉ mục tìm kiếm, ...) của bản cũ, không phải dựng lại. persist=False (bộ quét
+        chỗ trống) chỉ ghi đĩa khi danh sách lớp thay đổi. Việc lưu xuống đĩa chạy ở luồng nền
+        nên các phiên đang chờ lượt tải không phải chờ ghi SQLite.
+        """
+        fetched_at = time.time()
+        current = self.current()
+        seats_only = current is not None and current.sections.same_rows(sections)
+        derived = None
+        if seats_only:
+            sections = current.sections.with_seats(sections)
+            derived = current.derived_objects()
+        with self._lock:
+            self._version += 1
+            snapshot = self._snapshot = CatalogueSnapshot(sections, self._version, fetched_at, fetch_ms,
+                                                          derived=derived)
+        if self.store is not None and (persist or not seats_only):
+            threading.Thread(target=self._save, args=(sections, fetched_at),
+                             name='catalogue-save', daemon=True).start()
+        return snapshot
+
+    def _save(self, sections, fetched_at):
+        # Bộ quét chỗ trống và lượt làm mới có thể cùng lưu: store ghi lần lượt và bỏ bản cũ hơn
+        try:
+            self.store.save(sections, fetched_at)
+        except Exception as e:
+            with self._lock:
+                self.store_errors += 1
+                self.last_error = f"Lưu bản danh sách lớp: {e}"
+
+    def current(self):
+        """Snapshot đang giữ (có thể đã hết hạn), không tính vào hit/miss"""
+        with self._lock:
+            return self._snapshot
+
+    def refresh(self, fetch):
+        """Làm mới theo yêu cầu của người dùng mà không bỏ bản đang giữ.
+
+        Trả về 'recent' (bản hiện tại mới hơn min_refresh_age, bỏ qua), 'running' (đang có lượt
+        tải, dùng chung), 'backoff' (lượt trước lỗi, chưa tới lúc thử lại) hoặc 'started' (đã
+        chạy fetch() ở luồng nền; các phiên vẫn dùng bản cũ tới khi tải xong).
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.age() < self.min_refresh_age:
+                return 'recent'
+            if self._flight is not None:
+                self.coalesced += 1
+                return 'running'
+            if time.time() < self._retry_at:
+                return 'backoff'
+            flight = self._flight = _Flight()
+            self.misses += 1
+        threading.Thread(target=self._refresh, args=(fetch, flight), name='catalogue-refresh', daemon=True).start()
+        return 'started'
+
+    def invalidate(self):
+        """Bỏ snapshot hiện tại (cả bản trên đĩa); lần get() tiếp theo sẽ chờ tải lại"""
+        with self._lock:
+            self._snapshot = None
+            self._not_before = time.time()
+            self._retry_at = 0.0
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            snapshot = self._snapshot
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'stale_hits': self.stale_hits,
+                'store_errors': self.store_errors,
+                'last_error': self.last_error,
+                'refreshing': self._flight is not None,
+                'source': snapshot.source if snapshot else None,
+                'stale': snapshot is not None and not self._fresh(snapshot),
+                'errors': self.errors,
+                'invalidations': self.invalidations,
+                'version': snapshot.version if snapshot else None,
+                'age': snapshot.age() if snapshot else None,
+                'sections': len(snapshot.sections) if snapshot else 0,
+                'fetch_ms': snapshot.fetch_ms if snapshot else None,
+            }
@@ -0,0 +1,118 @@
+"""Dòng lệnh không cần Streamlit: tải danh sách môn đã đăng ký hoặc danh sách lớp rồi ghi thẳng ra tệp.
+
+    cd streamlit
+    python -m qldt --username 2112xxxxxx courses -o mon_hoc.csv
+    QLDT_TOKEN=... python -m qldt catalogue --format parquet -o danh_sach_lop.parquet
+    python -m qldt --base-url http://127.0.0.1:8765 --username sv courses --format json
+
+Mật khẩu lấy từ QLDT_PASSWORD hoặc được hỏi khi chạy; proxy, timeout, địa chỉ server
+theo cùng các biến môi trường và mặc định với ứng dụng (QLDT_PROXY, QLDT_BASE_URL, ...), nên
+mặc định cũng đi qua proxy của ứng dụng (qldt.transport.DEFAULT_PROXY); --proxy '' để đi thẳng.
+"""
+import argparse
+import getpass
+import os
+import sys
+import time
+
+from qldt.api import QLDTApi
+from qldt.export import FORMATS, SECTION_FORMATS, available
+from qldt.transport import DEFAULT_PROXY, Transport
+
+COMMANDS = {
+    'courses': FORMATS,
+    'catalogue': SECTION_FORMATS,
+}
+
+
+def _format(args, formats):
+    """--format, hoặc đoán từ phần mở rộng của -o, mặc định csv"""
+    if args.format:
+        return args.format
+    extension = os.path.splitext(args.output)[1].lstrip('.').lower() if args.output != '-' else ''
+    by_extension = {fmt.extension: name for name, fmt in formats.items()}
+    return by_extension.get(extension, 'csv')
+
+
+def _open_output(path):
+    if path == '-':
+        return sys.stdout.buffer, False
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return open(path, 'wb'), True
+
+
+def _log(message):
+    print(message, file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m qldt', description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', help='địa chỉ server (mặc định QLDT_BASE_URL hoặc ftugate.ftu.edu.vn)')
+    parser.add_argument('--proxy', help=f"proxy HTTP(S), '' để không dùng (mặc định QLDT_PROXY hoặc {DEFAULT_PROXY})")
+    parser.add_argument('--username', default=os.environ.get('QLDT_USERNAME'), help='tên đăng nhập (QLDT_USERNAME)')
+    parser.add_argument('--token', default=os.environ.get('QLDT_TOKEN'),
+                        help='dùng access token có sẵn thay vì đăng nhập (QLDT_TOKEN)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='không in thông tin ra stderr')
+    sub = parser.add_subparsers(dest='command', required=True)
+    for command, formats, help_text in (
+        ('courses', FORMATS, 'danh sách môn đã đăng ký (w-locdskqdkmhsinhvien)'),
+        ('catalogue', SECTION_FORMATS, 'danh sách nhóm tổ của học kỳ (w-locdsnhomto)'),
+    ):
+        cmd = sub.add_parser(command, help=help_text)
+        cmd.add_argument('--format', choices=list(formats), help='mặc định theo phần mở rộng của -o, hoặc csv')
+        cmd.add_argument('-o', '--output', default='-', help="tệp kết quả, '-' là stdout (mặc định)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    log = (lambda message: None) if args.quiet else _log
+    formats = COMMANDS[args.command]
+    name = _format(args, formats)
+    if not available(name, formats):
+        log(f"Định dạng {name} cần cài một trong: {', '.join(formats[name].requires)}")
+        return 2
+    if not args.token and not args.username:
+        log("Cần --username (hoặc QLDT_USERNAME) hoặc --token (hoặc QLDT_TOKEN)")
+        return 2
+
+    if args.proxy is not None:
+        os.environ['QLDT_PROXY'] = args.proxy
+    api = QLDTApi(Transport.from_env(), base_url=args.base_url)
+    token = args.token
+    logged_in = False
+    t0 = time.perf_counter()
+    try:
+        if not token:
+            password = os.environ.get('QLDT_PASSWORD') or getpass.getpass(f"Mật khẩu {args.username}: ")
+            token = api.login(args.username, password)['access_token']
+            logged_in = True
+        if args.command == 'courses':
+            data = api.get_registered_courses(token)
+            if 'error' in data:
+                log(f"Lỗi: {data['error']}")
+                return 1
+            summary = f"{data['total_courses']} môn, {data['total_credits']} tín chỉ"
+        else:
+            data = api.get_section_table(token)
+            summary = f"{len(data)} nhóm tổ"
+        fetch_ms = (time.perf_counter() - t0) * 1000
+
+        out, close = _open_output(args.output)
+        try:
+            formats[name].writer(data, out)
+            out.flush()
+        finally:
+            if close:
+                out.close()
+    except Exception as e:
+        log(f"Lỗi: {e}")
+        return 1
+    finally:
+        if logged_in:
+            api.logout(token)
+    log(f"{summary} -> {args.output if args.output != '-' else 'stdout'} ({name}, tải {fetch_ms:.0f} ms, "
+        f"tổng {(time.perf_counter() - t0) * 1000:.0f} ms)")
+    return 0
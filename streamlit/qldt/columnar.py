@@ -0,0 +1,243 @@
+"""Danh sách lớp dạng cột: chỉ đọc, chuỗi lặp lại được mã hóa thành category, dùng chung giữa các phiên"""
+import copy
+import json
+import marshal
+import sys
+from array import array
+
+from qldt.profiling import span
+from qldt.timetable import schedule_mask
+from qldt.tkb import Slot, join_slots, parse_tkb
+
+# Các trường của ds_nhom_to mà ứng dụng dùng tới; phần còn lại của mỗi dòng bị bỏ
+CATEGORICAL_COLUMNS = ('ma_mon', 'nhom_to', 'to', 'so_tc', 'lop')
+STRING_COLUMNS = ('id_to_hoc',)
+INT_COLUMNS = ('sl_cp', 'sl_cl')
+# Số chỗ đổi sau mỗi lần quét; các cột còn lại gần như cố định trong cả đợt đăng ký
+SEAT_COLUMNS = ('sl_cp', 'sl_cl')
+COLUMNS = ('id_to_hoc', 'ma_mon', 'ten_mon', 'nhom_to', 'to', 'so_tc', 'lop', 'sl_cp', 'sl_cl', 'tkb', 'slots', 'mask')
+
+_MISSING = -1
+
+
+class Categorical:
+    """Cột chuỗi có nhiều giá trị trùng: mã số nguyên + danh sách giá trị duy nhất đã intern"""
+
+    def __init__(self):
+        self.values = []
+        self.codes = array('I')
+        self._lookup = {}
+
+    def append(self, value):
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(sys.intern(value) if isinstance(value, str) else value)
+        self.codes.append(code)
+
+    def __getitem__(self, i):
+        return self.values[self.codes[i]]
+
+    def __len__(self):
+        return len(self.codes)
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return _MISSING
+
+
+class SectionRow:
+    """Dòng chỉ đọc của SectionTable, truy cập như dict (s['ma_mon'], s.get('ten_mon'))"""
+
+    __slots__ = ('_table', '_i')
+
+    def __init__(self, table, i):
+        self._table = table
+        self._i = i
+
+    def __getitem__(self, key):
+        value = self._table.value(key, self._i)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = self._table.value(key, self._i) if key in self._table.columns else None
+        return default if value is None else value
+
+    def keys(self):
+        return [k for k in COLUMNS if self._table.value(k, self._i) is not None]
+
+    def to_dict(self):
+        return {k: self[k] for k in self.keys()}
+
+    @property
+    def index(self):
+        return self._i
+
+
+class SectionTable:
+    """Danh sách nhóm tổ dạng cột, đã gắn ten_mon; hành xử như một dãy SectionRow"""
+
+    def __init__(self):
+        self.columns = {}
+        for name in CATEGORICAL_COLUMNS:
+            self.columns[name] = Categorical()
+        for name in STRING_COLUMNS:
+            self.columns[name] = []
+        for name in INT_COLUMNS:
+            self.columns[name] = array('i')
+        # tkb chỉ lưu dạng đã phân tích (tuple Slot, dùng chung giữa các lớp cùng lịch);
+        # chuỗi tkb được dựng lại từ các buổi học khi cần
+        self.columns['slots'] = []
+        self.columns['tkb'] = None
+        # Bitset tiết học trong tuần để kiểm tra trùng lịch (qldt.timetable)
+        self.columns['mask'] = []
+        # ten_mon phụ thuộc hoàn toàn vào ma_mon nên lưu theo category của ma_mon
+        self.columns['ten_mon'] = None
+        self._subject_names = []
+
+    @classmethod
+    def from_records(cls, ds_nhom_to, ds_mon_hoc):
+        """Dựng bảng từ ds_nhom_to và gắn ten_mon từ ds_mon_hoc (theo ma_mon đã bỏ khoảng trắng)"""
+        table = cls()
+        for nhom in ds_nhom_to:
+            table.append(nhom)
+        table.set_subjects(ds_mon_hoc)
+        return table
+
+    def append(self, nhom):
+        cols = self.columns
+        for name in CATEGORICAL_COLUMNS:
+            value = nhom.get(name)
+            cols[name].append(None if value is None else str(value))
+        for name in STRING_COLUMNS:
+            value = nhom.get(name)
+            cols[name].append(None if value is None else sys.intern(str(value)))
+        for name in INT_COLUMNS:
+            cols[name].append(_to_int(nhom.get(name)))
+        slots = parse_tkb(nhom.get('tkb') or '')
+        cols['slots'].append(slots)
+        cols['mask'].append(schedule_mask(slots))
+
+    def set_subjects(self, ds_mon_hoc):
+        with span("gắn tên môn (mon_dict)"):
+            mon_dict = {m["ma"].strip(): m["ten"] for m in ds_mon_hoc if m.get("ma") and m.get("ten")}
+            self._subject_names = [
+                sys.intern(mon_dict.get((ma_mon or "").strip(), "")) for ma_mon in self.columns['ma_mon'].values
+            ]
+
+    def export_columns(self):
+        """Các cột dưới dạng bytes (mảng số thô hoặc JSON) để lưu xuống đĩa, xem qldt.snapshot.
+
+        Lịch học lưu một lần cho mỗi tuple Slot dùng chung, các dòng chỉ giữ mã lịch.
+        """
+        out = {}
+        for name in CATEGORICAL_COLUMNS:
+            column = self.columns[name]
+            out[f'{name}.values'] = json.dumps(column.values, ensure_ascii=False).encode('utf-8')
+            out[f'{name}.codes'] = column.codes.tobytes()
+        for name in STRING_COLUMNS:
+            out[name] = json.dumps(self.columns[name], ensure_ascii=False).encode('utf-8')
+        for name in INT_COLUMNS:
+            out[name] = self.columns[name].tobytes()
+        schedule_ids = {}
+        schedules, masks, codes = [], [], array('I')
+        for slots, mask in zip(self.columns['slots'], self.columns['mask']):
+            code = schedule_ids.get(id(slots))
+            if code is None:
+                code = schedule_ids[id(slots)] = len(schedules)
+                schedules.append(slots)
+                masks.append(mask)
+            codes.append(code)
+        # marshal: tuple lồng nhau ghi/đọc nhanh hơn JSON nhiều lần (định dạng phụ thuộc phiên bản Python)
+        out['schedules'] = marshal.dumps(tuple(tuple(tuple(slot) for slot in slots) for slots in schedules))
+        out['schedules.masks'] = marshal.dumps(masks)
+        out['schedules.codes'] = codes.tobytes()
+        out['ten_mon'] = json.dumps(self._subject_names, ensure_ascii=False).encode('utf-8')
+        return out
+
+    @classmethod
+    def from_exported(cls, data):
+        """Dựng lại bảng từ kết quả export_columns() mà không phải phân tích lại tkb"""
+        table = cls()
+        for name in CATEGORICAL_COLUMNS:
+            column = table.columns[name]
+            column.values = [sys.intern(v) if isinstance(v, str) else v for v in json.loads(data[f'{name}.values'])]
+            column.codes.frombytes(data[f'{name}.codes'])
+            column._lookup = {v: i for i, v in enumerate(column.values)}
+        for name in STRING_COLUMNS:
+            table.columns[name] = [sys.intern(v) if isinstance(v, str) else v for v in json.loads(data[name])]
+        for name in INT_COLUMNS:
+            table.columns[name].frombytes(data[name])
+        make = Slot._make
+        schedules = [tuple(map(make, slots)) for slots in marshal.loads(data['schedules'])]
+        masks = marshal.loads(data['schedules.masks'])
+        codes = array('I')
+        codes.frombytes(data['schedules.codes'])
+        table.columns['slots'] = [schedules[code] for code in codes]
+        table.columns['mask'] = [masks[code] for code in codes]
+        table._subject_names = [sys.intern(name) for name in json.loads(data['ten_mon'])]
+        return table
+
+    def same_rows(self, other):
+        """True nếu other có đúng các dòng như bảng này theo cùng thứ tự, chỉ có thể khác số chỗ"""
+        if len(self) != len(other) or self._subject_names != other._subject_names:
+            return False
+        for name in CATEGORICAL_COLUMNS:
+            mine, theirs = self.columns[name], other.columns[name]
+            if mine.codes != theirs.codes or mine.values != theirs.values:
+                return False
+        return all(self.columns[name] == other.columns[name] for name in STRING_COLUMNS + ('mask', 'slots'))
+
+    def with_seats(self, other):
+        """Bảng mới dùng chung mọi cột với bảng này, chỉ lấy số chỗ của other (cần same_rows)"""
+        table = copy.copy(self)
+        table.columns = dict(self.columns)
+        for name in SEAT_COLUMNS:
+            table.columns[name] = other.columns[name]
+        return table
+
+    def rows_by_subject(self):
+        """ma_mon (đã bỏ khoảng trắng) -> danh sách chỉ số dòng"""
+        codes = self.columns['ma_mon']
+        by_code = {}
+        for i, code in enumerate(codes.codes):
+            by_code.setdefault(code, []).append(i)
+        subjects = {}
+        for code, rows in by_code.items():
+            subjects.setdefault((codes.values[code] or '').strip(), []).extend(rows)
+        return subjects
+
+    def value(self, key, i):
+        if key == 'ten_mon':
+            return self._subject_names[self.columns['ma_mon'].codes[i]]
+        if key == 'tkb':
+            return join_slots(self.columns['slots'][i])
+        column = self.columns[key]
+        value = column[i]
+        if key in INT_COLUMNS and value == _MISSING:
+            return None
+        return value
+
+    def __len__(self):
+        return len(self.columns['id_to_hoc'])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [SectionRow(self, j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return SectionRow(self, i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield SectionRow(self, i)
+
+    def __bool__(self):
+        return len(self) > 0
@@ -0,0 +1,161 @@
+"""Danh sách môn đã đăng ký (w-locdskqdkmhsinhvien): dựng course_info và cập nhật gia tăng theo group_id"""
+import sys
+
+from qldt.timetable import schedule_mask
+from qldt.tkb import parse_tkb, summarize_slots
+
+
+# Các trường của một môn, theo đúng thứ tự khi xuất dữ liệu
+COURSE_FIELDS = (
+    'course_id', 'course_name', 'credits', 'lecturer', 'schedule', 'room', 'semester', 'status',
+    'group_id', 'class_name', 'week_schedule', 'slots', 'group_number', 'registration_date', 'english_name',
+)
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Course:
+    """Một môn đã đăng ký, truy cập như dict (course['course_id'], course.get('slots')).
+
+    Ngoài COURSE_FIELDS còn có các trường tính sẵn một lần: code (mã môn đã bỏ khoảng trắng)
+    và mask (bitset lịch học, qldt.timetable).
+    """
+
+    __slots__ = COURSE_FIELDS + ('code', 'mask')
+
+    def __init__(self, **fields):
+        for name in COURSE_FIELDS:
+            setattr(self, name, fields.get(name, ''))
+        self.slots = tuple(self.slots or ())
+        self.code = self.course_id.strip()
+        self.mask = schedule_mask(self.slots)
+
+    def __getitem__(self, key):
+        if key not in COURSE_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in COURSE_FIELDS else default
+
+    def __contains__(self, key):
+        return key in COURSE_FIELDS
+
+    def keys(self):
+        return COURSE_FIELDS
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in COURSE_FIELDS]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"Course({self.code!r}, group_id={self.group_id!r})"
+
+
+def course_info(course_record):
+    """Một môn đã đăng ký (Course) từ một phần tử ds_kqdkmh"""
+    to_hoc = course_record['to_hoc']
+
+    # Phân tích thời khóa biểu một lần; giảng viên và thời gian chính lấy từ buổi học đã phân tích
+    tkb = to_hoc.get('tkb', '')
+    slots = parse_tkb(tkb)
+    lecturer, schedule = summarize_slots(slots)
+
+    # Chuỗi lặp lại nhiều giữa các môn (trạng thái, lớp, giảng viên...) được intern
+    return Course(
+        course_id=_intern(to_hoc.get('ma_mon', '')),
+        course_name=_intern(to_hoc.get('ten_mon', '')),
+        credits=int(to_hoc.get('so_tc', 0)) if to_hoc.get('so_tc', '').isdigit() else 0,
+        lecturer=_intern(lecturer),
+        schedule=schedule,
+        room='',  # Không có thông tin phòng học rõ ràng trong dữ liệu
+        semester='',  # Có thể lấy từ ngày học
+        status=_intern(course_record.get('trang_thai_mon', '')),
+        group_id=_intern(to_hoc.get('id_to_hoc', '')),
+        class_name=_intern(to_hoc.get('lop', '')),
+        week_schedule=tkb,  # Lưu toàn bộ thời khóa biểu
+        slots=slots,  # Các buổi học đã phân tích (qldt.tkb.Slot)
+        group_number=_intern(to_hoc.get('nhom_to', '')),
+        registration_date=course_record.get('ngay_dang_ky', ''),
+        english_name=to_hoc.get('ten_mon_eg', '').strip(),
+    )
+
+
+def _records(data_section):
+    records = data_section.get('ds_kqdkmh') if isinstance(data_section, dict) else None
+    if not isinstance(records, list):
+        return []
+    return [r for r in records if isinstance(r, dict) and isinstance(r.get('to_hoc'), dict)]
+
+
+def _total_credits(courses):
+    return sum(course['credits'] for course in courses if isinstance(course['credits'], (int, float)))
+
+
+def _unchanged(course, record):
+    # Các trường có thể đổi khi môn vẫn giữ nguyên nhóm tổ
+    to_hoc = record['to_hoc']
+    return (course['status'] == record.get('trang_thai_mon', '')
+            and course['registration_date'] == record.get('ngay_dang_ky', '')
+            and course['week_schedule'] == to_hoc.get('tkb', ''))
+
+
+def build_courses_data(data):
+    """courses_data đầy đủ từ phản hồi (đã parse JSON) của w-locdskqdkmhsinhvien"""
+    data_section = data.get('data', {}) if isinstance(data, dict) else {}
+    courses = [course_info(record) for record in _records(data_section)]
+    return {
+        'courses': courses,
+        'total_credits': _total_credits(courses),
+        'total_courses': len(courses),
+        'total_items': data_section.get('total_items', len(courses)),
+        'min_credits': data_section.get('so_tin_chi_min', 0),
+        'raw_data': data
+    }
+
+
+def update_courses_data(courses_data, data):
+    """Áp phản hồi mới lên courses_data hiện có, so khớp theo group_id.
+
+    Môn không đổi giữ nguyên Course cũ (không phân tích lại tkb); chỉ môn mới hoặc đổi
+    trạng thái mới được dựng lại. Trả về (courses_data mới, {'added', 'removed', 'changed'})
+    với danh sách course_info của từng loại; tổng tín chỉ tính lại từ phần chênh lệch.
+    """
+    data_section = data.get('data', {}) if isinstance(data, dict) else {}
+    old_courses = courses_data.get('courses', [])
+    by_group = {}
+    for course in old_courses:
+        by_group.setdefault(course['group_id'], []).append(course)
+    courses = []
+    added, changed = [], []
+    credits = courses_data.get('total_credits', _total_credits(old_courses))
+    for record in _records(data_section):
+        group_id = record['to_hoc'].get('id_to_hoc', '')
+        same_group = by_group.get(group_id)
+        course = same_group.pop(0) if same_group else None
+        if course is not None and _unchanged(course, record):
+            courses.append(course)
+            continue
+        new = course_info(record)
+        credits += new['credits'] - (course['credits'] if course is not None else 0)
+        (added if course is None else changed).append(new)
+        courses.append(new)
+    removed = [course for same_group in by_group.values() for course in same_group]
+    credits -= _total_credits(removed)
+
+    updated = dict(courses_data)
+    updated.pop('error', None)
+    updated.update({
+        'courses': courses,
+        'total_credits': credits,
+        'total_courses': len(courses),
+        'total_items': data_section.get('total_items', len(courses)),
+        'min_credits': data_section.get('so_tin_chi_min', courses_data.get('min_credits', 0)),
+        'raw_data': data,
+    })
+    changes = {'added': added, 'removed': removed, 'changed': changed}
+    return updated, changes
@@ -0,0 +1,257 @@
+"""Xuất danh sách môn đã đăng ký: chỉ dựng khi được yêu cầu, ghi nhớ theo hash nội dung"""
+import csv
+import hashlib
+import importlib.util
+import io
+import json
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime, timedelta, timezone
+
+# Giữ trong RAM tới ngần này byte, lớn hơn thì tràn ra tệp tạm trên đĩa
+SPOOL_SIZE = 1 << 20
+
+# Các trường không đưa vào tệp xuất: slots đã có dạng chuỗi trong week_schedule
+_EXCLUDED_FIELDS = ('slots',)
+
+# Giờ bắt đầu từng tiết (tiết 1 .. 16), mỗi tiết 45 phút; chỉ dùng cho lịch iCalendar
+PERIOD_STARTS = (
+    '07:00', '07:50', '08:40', '09:30', '10:20', '11:10',
+    '12:30', '13:20', '14:10', '15:00', '15:50', '16:40',
+    '17:30', '18:20', '19:10', '20:00',
+)
+PERIOD_MINUTES = 45
+
+ExportFormat = namedtuple('ExportFormat', 'label extension mime writer requires')
+
+
+def courses_frame(courses_data):
+    # pandas chỉ nạp khi thật sự dựng bảng: import qldt.export (CLI, benchmark) không phải trả giá đó
+    import pandas as pd
+    courses = courses_data.get('courses', [])
+    return pd.DataFrame([{k: v for k, v in c.items() if k not in _EXCLUDED_FIELDS} for c in courses])
+
+
+def _export_payload(courses_data):
+    # raw_data (toàn bộ phản hồi API) chỉ xem ở tab Raw, không đưa vào tệp JSON
+    payload = {k: v for k, v in courses_data.items() if k != 'raw_data'}
+    payload['courses'] = [
+        {k: v for k, v in c.items() if k not in _EXCLUDED_FIELDS} for c in courses_data.get('courses', [])
+    ]
+    return payload
+
+
+def _text(out, encoding='utf-8'):
+    return io.TextIOWrapper(out, encoding=encoding, newline='')
+
+
+def write_csv(courses_data, out):
+    # utf-8-sig để Excel nhận đúng tiếng Việt
+    text = _text(out, 'utf-8-sig')
+    courses_frame(courses_data).to_csv(text, index=False)
+    text.detach()
+
+
+def write_json(courses_data, out):
+    # json.dump ghi từng đoạn nhỏ ra tệp thay vì dựng cả chuỗi trong bộ nhớ
+    text = _text(out)
+    json.dump(_export_payload(courses_data), text, ensure_ascii=False, indent=2)
+    text.detach()
+
+
+def write_parquet(courses_data, out):
+    courses_frame(courses_data).to_parquet(out, index=False)
+
+
+def write_xlsx(courses_data, out):
+    courses_frame(courses_data).to_excel(out, index=False, sheet_name='Mon hoc')
+
+
+def _ics_escape(value):
+    return str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _ics_line(text, key, value):
+    # Gấp dòng theo RFC 5545 §3.1: mỗi dòng tối đa 75 octet (không kể CRLF), dòng tiếp theo bắt đầu
+    # bằng một dấu cách nên chỉ còn 74 octet nội dung; không cắt giữa một ký tự UTF-8
+    line = f"{key}:{value}".encode('utf-8')
+    limit = 75
+    while len(line) > limit:
+        cut = limit
+        while line[cut] & 0xC0 == 0x80:
+            cut -= 1
+        text.write(line[:cut].decode('utf-8') + '\r\n ')
+        line = line[cut:]
+        limit = 74
+    text.write(line.decode('utf-8') + '\r\n')
+
+
+def _period_time(period, end=False):
+    period = min(max(period, 1), len(PERIOD_STARTS))
+    start = datetime.strptime(PERIOD_STARTS[period - 1], '%H:%M')
+    return (start + timedelta(minutes=PERIOD_MINUTES)).time() if end else start.time()
+
+
+def write_ics(courses_data, out):
+    """Mỗi buổi học là một sự kiện lặp hằng tuần từ start_date tới end_date (giờ địa phương)"""
+    text = _text(out)
+    text.write('BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//QLDT//Danh sach mon hoc//VI\r\n')
+    text.write('CALSCALE:GREGORIAN\r\nX-WR-TIMEZONE:Asia/Ho_Chi_Minh\r\n')
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    for course in courses_data.get('courses', []):
+        for n, slot in enumerate(course.get('slots', ())):
+            if slot.weekday is None or slot.start_period is None or not (slot.start_date and slot.end_date):
+                continue
+            first = date.fromisoformat(slot.start_date)
+            first += timedelta(days=(slot.weekday - 2 - first.weekday()) % 7)
+            until = date.fromisoformat(slot.end_date)
+            if first > until:
+                continue
+            start = datetime.combine(first, _period_time(slot.start_period))
+            end = datetime.combine(first, _period_time(slot.end_period, end=True))
+            text.write('BEGIN:VEVENT\r\n')
+            _ics_line(text, 'UID', f"{course.get('group_id') or course.get('course_id', '')}-{n}@qldt")
+            _ics_line(text, 'DTSTAMP', stamp)
+            _ics_line(text, 'DTSTART', start.strftime('%Y%m%dT%H%M%S'))
+            _ics_line(text, 'DTEND', end.strftime('%Y%m%dT%H%M%S'))
+            _ics_line(text, 'RRULE', f"FREQ=WEEKLY;UNTIL={until.strftime('%Y%m%d')}T235959")
+            summary = f"{course.get('course_id', '').strip()} - {course.get('course_name', '')}"
+            _ics_line(text, 'SUMMARY', _ics_escape(summary))
+            if slot.room:
+                _ics_line(text, 'LOCATION', _ics_escape(slot.room))
+            _ics_line(text, 'DESCRIPTION', _ics_escape(slot.text))
+            text.write('END:VEVENT\r\n')
+    text.write('END:VCALENDAR\r\n')
+    text.detach()
+
+
+FORMATS = OrderedDict([
+    ('csv', ExportFormat('CSV', 'csv', 'text/csv', write_csv, ())),
+    ('json', ExportFormat('JSON', 'json', 'application/json', write_json, ())),
+    ('xlsx', ExportFormat(
+        'Excel', 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        write_xlsx, ('openpyxl', 'xlsxwriter'),
+    )),
+    ('parquet', ExportFormat('Parquet', 'parquet', 'application/vnd.apache.parquet', write_parquet,
+                             ('pyarrow', 'fastparquet'))),
+    ('ics', ExportFormat('Lịch (iCalendar)', 'ics', 'text/calendar', write_ics, ())),
+])
+
+
+# Danh sách lớp (SectionTable) cho CLI: mỗi nhóm tổ một dòng, lịch học ở dạng chuỗi tkb
+SECTION_FIELDS = ('id_to_hoc', 'ma_mon', 'ten_mon', 'nhom_to', 'to', 'so_tc', 'lop', 'sl_cp', 'sl_cl', 'tkb')
+
+
+def section_records(table):
+    """Từng nhóm tổ dạng dict (mã môn đã bỏ khoảng trắng), sinh dần thay vì dựng cả danh sách"""
+    for i in range(len(table)):
+        record = {key: table.value(key, i) for key in SECTION_FIELDS}
+        record['ma_mon'] = (record['ma_mon'] or '').strip()
+        yield record
+
+
+def write_sections_csv(table, out):
+    # Ghi bằng csv của thư viện chuẩn: không cần pandas cho định dạng phổ biến nhất
+    text = _text(out, 'utf-8-sig')
+    writer = csv.DictWriter(text, SECTION_FIELDS)
+    writer.writeheader()
+    writer.writerows(section_records(table))
+    text.detach()
+
+
+def write_sections_json(table, out):
+    text = _text(out)
+    text.write('[')
+    for n, record in enumerate(section_records(table)):
+        # Một lần ghi cho mỗi dòng: json.dump ghi từng mẩu nhỏ, chậm hơn nhiều với hàng chục nghìn dòng
+        text.write((',\n' if n else '\n') + json.dumps(record, ensure_ascii=False))
+    text.write('\n]\n')
+    text.detach()
+
+
+def write_sections_parquet(table, out):
+    import pandas as pd
+    pd.DataFrame.from_records(section_records(table), columns=SECTION_FIELDS).to_parquet(out, index=False)
+
+
+SECTION_FORMATS = OrderedDict([
+    ('csv', ExportFormat('CSV', 'csv', 'text/csv', write_sections_csv, ())),
+    ('json', ExportFormat('JSON', 'json', 'application/json', write_sections_json, ())),
+    ('parquet', ExportFormat('Parquet', 'parquet', 'application/vnd.apache.parquet', write_sections_parquet,
+                             ('pyarrow', 'fastparquet'))),
+])
+
+
+def available(name, formats=FORMATS):
+    """Định dạng dùng được nếu không cần thư viện ngoài hoặc có ít nhất một thư viện hỗ trợ"""
+    requires = formats[name].requires
+    return not requires or any(importlib.util.find_spec(module) for module in requires)
+
+
+def content_hash(courses_data):
+    """Hash nội dung phần được xuất (không gồm raw_data)"""
+    digest = hashlib.sha256()
+    payload = _export_payload(courses_data)
+    payload['slots'] = [c.get('slots', ()) for c in courses_data.get('courses', [])]
+    digest.update(json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ExportCache:
+    """Tệp đã xuất theo (hash nội dung, định dạng), giữ tối đa max_entries tệp gần nhất.
+
+    Mỗi tệp được ghi dần vào SpooledTemporaryFile: nhỏ thì nằm trong RAM, lớn thì
+    tràn ra đĩa, không bao giờ dựng cả tệp thành một chuỗi.
+    """
+
+    def __init__(self, max_entries=8, spool_size=SPOOL_SIZE):
+        self.max_entries = max_entries
+        self.spool_size = spool_size
+        self._files = OrderedDict()
+        self._hashes = {}
+        self._lock = threading.RLock()
+        self.builds = 0
+        self.hits = 0
+
+    def key(self, courses_data):
+        # Cùng đối tượng courses_data thì không cần hash lại
+        cached = self._hashes.get(id(courses_data))
+        if cached is None or cached[0] is not courses_data:
+            cached = (courses_data, content_hash(courses_data))
+            self._hashes = {id(courses_data): cached}
+        return cached[1]
+
+    def open(self, courses_data, name):
+        """File object (đã về đầu tệp) chứa dữ liệu xuất ở định dạng name"""
+        with self._lock:
+            key = (self.key(courses_data), name)
+            spool = self._files.get(key)
+            if spool is not None:
+                self._files.move_to_end(key)
+                self.hits += 1
+            else:
+                spool = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
+                FORMATS[name].writer(courses_data, spool)
+                self._files[key] = spool
+                self.builds += 1
+                while len(self._files) > self.max_entries:
+                    self._files.popitem(last=False)[1].close()
+            spool.seek(0)
+            return spool
+
+    def read(self, courses_data, name):
+        # Streamlit chỉ nhận bytes/BytesIO/tệp thật nên đọc ra đúng một lần lúc gửi cho trình duyệt
+        with self._lock:
+            return self.open(courses_data, name).read()
+
+    def opener(self, courses_data, name):
+        """Hàm không tham số trả về dữ liệu xuất; dùng cho nút tải xuống dựng tệp khi bấm"""
+        return lambda: self.read(courses_data, name)
+
+    def clear(self):
+        with self._lock:
+            for spool in self._files.values():
+                spool.close()
+            self._files.clear()
+            self._hashes = {}
@@ -0,0 +1,47 @@
+"""Ước lượng bộ nhớ: kích thước sâu của đối tượng và RSS của tiến trình"""
+import os
+import sys
+from array import array
+
+
+def deep_sizeof(obj, exclude=()):
+    """Tổng sys.getsizeof của obj và mọi đối tượng nó tham chiếu, bỏ qua id trong exclude"""
+    seen = set(exclude)
+    stack = [obj]
+    total = 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, (str, bytes, bytearray, int, float, bool, array)) or o is None:
+            continue
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        else:
+            if hasattr(o, '__dict__'):
+                stack.append(vars(o))
+            for slot in getattr(type(o), '__slots__', ()):
+                if hasattr(o, slot):
+                    stack.append(getattr(o, slot))
+    return total
+
+
+def process_rss():
+    """RSS hiện tại của tiến trình (byte), None nếu không đọc được"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss là đỉnh RSS: KB trên Linux, byte trên macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
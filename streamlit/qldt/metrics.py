@@ -0,0 +1,157 @@
+"""Xuất số liệu dạng văn bản Prometheus: ghi định kỳ ra tệp (textfile collector) và/hoặc phục vụ /metrics"""
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_INTERVAL = 15.0
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def histogram_family(name, help_text, stats, first_label, second_label):
+    """Các dòng của một họ histogram từ qldt.stats.LatencyStats (nhãn lấy từ khóa (endpoint, phase)).
+
+    Ứng dụng đo bằng ms; biên bucket và tổng được đổi sang giây theo quy ước của Prometheus.
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for first, second, hist in stats.histograms():
+        base = {first_label: first, second_label: second}
+        cumulative = 0
+        for bound, count in zip(hist.buckets, hist.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(**base, le=_number(bound / 1000))} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(**base, le='+Inf')} {hist.count}")
+        lines.append(f"{name}_sum{_labels(**base)} {_number(hist.sum / 1000)}")
+        lines.append(f"{name}_count{_labels(**base)} {hist.count}")
+    return lines
+
+
+def simple_family(name, help_text, kind, samples):
+    """Họ counter/gauge từ danh sách (dict nhãn, giá trị); bỏ qua giá trị None"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        if value is not None:
+            lines.append(f"{name}{_labels(**labels) if labels else ''} {_number(value)}")
+    return lines
+
+
+def metrics_text(transport=None, scheduler=None, spans=None, catalogue=None, poller=None):
+    """Toàn bộ số liệu của tiến trình dạng văn bản Prometheus (thời gian tính bằng giây)"""
+    lines = []
+    if transport is not None:
+        lines += histogram_family('qldt_http_request_duration_seconds',
+                                  'Thời gian request tới QLDT theo endpoint và giai đoạn',
+                                  transport.stats, 'endpoint', 'phase')
+        lines += simple_family('qldt_http_errors_total', 'Số request lỗi theo endpoint', 'counter',
+                               [({'endpoint': ep}, n) for ep, n in sorted(transport.stats.errors.items())])
+    if scheduler is not None:
+        lines += histogram_family('qldt_scheduler_duration_seconds',
+                                  'Thời gian chờ lượt (wait) và giữ lượt (service) theo loại request',
+                                  scheduler.stats, 'class', 'phase')
+        counts = scheduler.counters()
+        for index, (name, help_text, kind) in enumerate((
+            ('qldt_scheduler_queued', 'Số request đang chờ lượt', 'gauge'),
+            ('qldt_scheduler_in_flight', 'Số request đang chạy', 'gauge'),
+            ('qldt_scheduler_admitted_total', 'Số request đã được cấp lượt', 'counter'),
+            ('qldt_scheduler_rejected_total', 'Số request bị từ chối (SchedulerBusy)', 'counter'),
+        )):
+            lines += simple_family(name, help_text, kind,
+                                   [({'class': priority}, values[index]) for priority, values in counts.items()])
+    if spans is not None:
+        lines += histogram_family('qldt_span_duration_seconds',
+                                  'Thời gian chạy lại (kind=rerun) và từng giai đoạn (kind=span)',
+                                  spans, 'span', 'kind')
+    if catalogue is not None:
+        stats = catalogue.stats()
+        lines += simple_family('qldt_catalogue_requests_total', 'Số lần lấy danh sách lớp theo kết quả', 'counter',
+                               [({'result': key}, stats[key]) for key in ('hits', 'misses', 'coalesced', 'stale_hits')])
+        lines += simple_family('qldt_catalogue_errors_total', 'Số lần tải danh sách lớp lỗi', 'counter',
+                               [({}, stats['errors'])])
+        lines += simple_family('qldt_catalogue_sections', 'Số lớp trong bản đang giữ', 'gauge',
+                               [({}, stats['sections'])])
+        lines += simple_family('qldt_catalogue_age_seconds', 'Tuổi của bản danh sách lớp đang giữ', 'gauge',
+                               [({}, stats['age'])])
+    if poller is not None:
+        stats = poller.stats()
+        lines += simple_family('qldt_seat_polls_total', 'Số lượt quét chỗ trống theo kết quả', 'counter',
+                               [({'result': 'ok'}, stats['polls']), ({'result': 'error'}, stats['errors'])])
+        lines += simple_family('qldt_seat_watchers', 'Số phiên đang theo dõi chỗ trống', 'gauge',
+                               [({}, stats['watchers'])])
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsExporter:
+    """Ghi collect() ra tệp mỗi interval giây (ghi tệp tạm rồi đổi tên) và/hoặc phục vụ GET /metrics trên port"""
+
+    def __init__(self, collect, path=None, port=None, interval=DEFAULT_INTERVAL, host='127.0.0.1'):
+        self.collect = collect
+        self.path = path
+        self.interval = max(float(interval), 1.0)
+        self.server = None
+        self.last_error = None
+        if path:
+            threading.Thread(target=self._write_loop, name='qldt-metrics-file', daemon=True).start()
+        if port:
+            self.server = ThreadingHTTPServer((host, int(port)), self._handler())
+            threading.Thread(target=self.server.serve_forever, name='qldt-metrics-http', daemon=True).start()
+
+    @classmethod
+    def from_env(cls, collect):
+        """QLDT_METRICS_PATH (tệp), QLDT_METRICS_PORT (/metrics trên QLDT_METRICS_HOST); None nếu không cấu hình"""
+        path = os.environ.get('QLDT_METRICS_PATH')
+        port = os.environ.get('QLDT_METRICS_PORT')
+        if not path and not port:
+            return None
+        return cls(
+            collect, path=path, port=port,
+            interval=float(os.environ.get('QLDT_METRICS_INTERVAL', DEFAULT_INTERVAL)),
+            host=os.environ.get('QLDT_METRICS_HOST', '127.0.0.1'),
+        )
+
+    def write(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.collect())
+        os.replace(tmp_path, self.path)
+
+    def _write_loop(self):
+        while True:
+            try:
+                self.write()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            time.sleep(self.interval)
+
+    def _handler(self):
+        collect = self.collect
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = collect().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
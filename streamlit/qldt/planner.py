@@ -0,0 +1,108 @@
+"""Sinh các phương án thời khóa biểu không trùng lịch từ danh sách lớp ứng viên"""
+import time
+
+from qldt.timetable import DAYS, PERIODS_PER_DAY, slots_clash
+
+_DAY_BITS = (1 << PERIODS_PER_DAY) - 1
+
+
+class Option:
+    """Một lớp ứng viên của một môn"""
+
+    __slots__ = ('key', 'label', 'slots', 'mask', 'row')
+
+    def __init__(self, key, label, slots, mask, row=None):
+        self.key = key
+        self.label = label
+        self.slots = slots
+        self.mask = mask
+        self.row = row
+
+
+def _compatible(option, mask, chosen):
+    if not option.mask & mask:
+        return True
+    # Bitset trùng tiết: kiểm tra thêm khoảng ngày học với từng lớp đã chọn
+    return not any(option.mask & other.mask and slots_clash(option.slots, other.slots) for other in chosen)
+
+
+def plan_timetables(candidates, fixed=(), time_budget=1.0, max_results=200):
+    """Tìm tổ hợp mỗi môn một lớp, không trùng lịch với nhau và với các lớp cố định.
+
+    candidates: {ma_mon: [Option, ...]}; fixed: các Option đã có (môn đã đăng ký, giỏ).
+    Quay lui với cắt tỉa bằng bitset, mỗi bước chọn môn còn ít lựa chọn hợp lệ nhất.
+    Trả về (danh sách phương án {ma_mon: Option}, True nếu đã duyệt hết không gian).
+    """
+    deadline = time.perf_counter() + time_budget
+    fixed = list(fixed)
+    base_mask = 0
+    for option in fixed:
+        base_mask |= option.mask
+    results = []
+    state = {'complete': True}
+
+    def search(remaining, mask, chosen, picked):
+        if len(results) >= max_results or time.perf_counter() > deadline:
+            state['complete'] = False
+            return
+        if not remaining:
+            results.append(dict(picked))
+            return
+        # Môn bị ràng buộc nhiều nhất trước; môn nào hết lựa chọn thì cắt nhánh ngay
+        best, best_options = None, None
+        for subject in remaining:
+            options = [o for o in candidates[subject] if _compatible(o, mask, chosen)]
+            if best_options is None or len(options) < len(best_options):
+                best, best_options = subject, options
+                if not options:
+                    return
+        rest = [s for s in remaining if s != best]
+        for option in best_options:
+            picked[best] = option
+            chosen.append(option)
+            search(rest, mask | option.mask, chosen, picked)
+            chosen.pop()
+            del picked[best]
+            if not state['complete']:
+                return
+
+    search(list(candidates), base_mask, fixed, {})
+    return results, state['complete']
+
+
+def schedule_metrics(mask):
+    """Số ngày lên trường, số ngày học tiết 1, tổng số tiết trống xen giữa trong ngày"""
+    days = early = gaps = 0
+    for day in range(DAYS):
+        bits = (mask >> (day * PERIODS_PER_DAY)) & _DAY_BITS
+        if not bits:
+            continue
+        days += 1
+        early += bits & 1
+        first = (bits & -bits).bit_length() - 1
+        last = bits.bit_length() - 1
+        gaps += (last - first + 1) - bin(bits).count('1')
+    return {'days': days, 'early': early, 'gaps': gaps}
+
+
+RANKINGS = {
+    'days': 'Ít ngày lên trường nhất',
+    'early': 'Tránh tiết 1',
+    'gaps': 'Ít tiết trống xen giữa',
+}
+
+
+def rank_plans(plans, fixed=(), by='days'):
+    """Sắp các phương án theo tiêu chí (trên toàn bộ lịch, gồm cả lớp cố định); trả về [(metrics, plan)]"""
+    base_mask = 0
+    for option in fixed:
+        base_mask |= option.mask
+    order = [by] + [k for k in RANKINGS if k != by]
+    ranked = []
+    for plan in plans:
+        mask = base_mask
+        for option in plan.values():
+            mask |= option.mask
+        ranked.append((schedule_metrics(mask), plan))
+    ranked.sort(key=lambda item: tuple(item[0][k] for k in order))
+    return ranked
@@ -0,0 +1,77 @@
+"""Đo thời gian theo span: chi tiết của từng lần chạy lại (theo luồng) và histogram tổng hợp cho cả tiến trình"""
+import threading
+import time
+from contextlib import contextmanager
+
+from qldt.stats import LatencyStats
+
+# Histogram cho cả tiến trình: (tên, 'rerun') cho cả lần chạy lại, (tên, 'span') cho từng giai đoạn
+STATS = LatencyStats()
+
+_local = threading.local()
+
+
+class Trace:
+    """Các span của một lần chạy lại: (tên, độ sâu, bắt đầu (ms từ đầu lần chạy), thời lượng ms)"""
+
+    __slots__ = ('name', 'at', 'started', 'spans', 'depth', 'total_ms')
+
+    def __init__(self, name):
+        self.name = name
+        self.at = time.time()
+        self.started = time.perf_counter()
+        self.spans = []
+        self.depth = 0
+        self.total_ms = None
+
+
+def start_trace(name):
+    """Bắt đầu ghi span cho luồng hiện tại; thay thế trace dở dang (lần chạy trước bị ngắt) nếu có"""
+    _local.trace = trace = Trace(name)
+    return trace
+
+
+def current_trace():
+    return getattr(_local, 'trace', None)
+
+
+def finish_trace():
+    """Kết thúc trace của luồng hiện tại và trả về nó (None nếu chưa bắt đầu)"""
+    trace = current_trace()
+    if trace is None:
+        return None
+    _local.trace = None
+    trace.total_ms = (time.perf_counter() - trace.started) * 1000
+    STATS.observe(trace.name, 'rerun', trace.total_ms)
+    return trace
+
+
+@contextmanager
+def span(name):
+    """Đo khối with: luôn vào histogram tổng hợp, và vào trace của luồng nếu đang có"""
+    trace = current_trace()
+    t0 = time.perf_counter()
+    if trace is not None:
+        trace.depth += 1
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        STATS.observe(name, 'span', elapsed_ms)
+        if trace is not None:
+            trace.depth -= 1
+            trace.spans.append((name, trace.depth, (t0 - trace.started) * 1000, elapsed_ms))
+
+
+def trace_rows(trace):
+    """Các span theo thứ tự bắt đầu, thụt lề theo độ sâu, kèm tỉ lệ so với cả lần chạy"""
+    total = trace.total_ms or 0.0
+    return [
+        {
+            'giai đoạn': '  ' * depth + name,
+            'bắt đầu (ms)': start,
+            'ms': ms,
+            '%': ms / total * 100 if total else None,
+        }
+        for name, depth, start, ms in sorted(trace.spans, key=lambda s: (s[2], s[1]))
+    ]
@@ -0,0 +1,133 @@
+"""Điều phối request ra ngoài cho cả tiến trình: ưu tiên theo loại, giới hạn số request đồng thời tới proxy, hàng đợi có giới hạn"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from qldt.stats import LatencyStats
+
+# Loại request theo thứ tự ưu tiên giảm dần
+REGISTER = 'register'
+LOGIN = 'login'
+COURSES = 'courses'
+CATALOGUE = 'catalogue'
+PRIORITIES = (REGISTER, LOGIN, COURSES, CATALOGUE)
+
+DEFAULT_CONCURRENCY = 6
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_MAX_WAIT = 20.0
+
+
+class SchedulerBusy(Exception):
+    """Không nhận thêm request: hàng đợi của loại này đã đầy hoặc chờ quá max_wait"""
+
+    def __init__(self, priority, reason, queued):
+        self.priority = priority
+        self.reason = reason  # 'queue_full' hoặc 'timeout'
+        self.queued = queued
+        what = 'hàng đợi đã đầy' if reason == 'queue_full' else 'chờ quá lâu'
+        super().__init__(f"Hệ thống đang bận ({what}, {queued} request '{priority}' đang chờ), vui lòng thử lại sau")
+
+
+class RequestScheduler:
+    """Cấp lượt gửi request theo ưu tiên, dùng chung cho mọi phiên.
+
+    Loại ưu tiên cao hơn đang chờ thì loại thấp hơn không được cấp lượt. Mỗi loại có
+    trần số lượt riêng, giảm dần theo ưu tiên (tải danh sách lớp tối đa một nửa), nên
+    luôn còn lượt trống cho đăng ký ngay cả khi nhiều phiên cùng tải danh sách lớp.
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, queue_size=DEFAULT_QUEUE_SIZE, max_wait=DEFAULT_MAX_WAIT):
+        self.concurrency = max(int(concurrency), 1)
+        self.queue_size = max(int(queue_size), 1)
+        self.max_wait = float(max_wait)
+        self.limits = {
+            REGISTER: self.concurrency,
+            LOGIN: max(self.concurrency - 1, 1),
+            COURSES: max(self.concurrency - 1, 1),
+            CATALOGUE: max(self.concurrency // 2, 1),
+        }
+        self._cond = threading.Condition()
+        self._queues = {priority: deque() for priority in PRIORITIES}
+        self._in_flight = {priority: 0 for priority in PRIORITIES}
+        self._admitted = {priority: 0 for priority in PRIORITIES}
+        self._rejected = {priority: 0 for priority in PRIORITIES}
+        # 'wait': thời gian xếp hàng, 'service': thời gian giữ lượt (gửi và đọc hết phản hồi)
+        self.stats = LatencyStats()
+
+    @classmethod
+    def from_env(cls):
+        """Cấu hình từ QLDT_MAX_INFLIGHT, QLDT_QUEUE_SIZE, QLDT_MAX_WAIT (giây)"""
+        return cls(
+            concurrency=int(os.environ.get('QLDT_MAX_INFLIGHT', DEFAULT_CONCURRENCY)),
+            queue_size=int(os.environ.get('QLDT_QUEUE_SIZE', DEFAULT_QUEUE_SIZE)),
+            max_wait=float(os.environ.get('QLDT_MAX_WAIT', DEFAULT_MAX_WAIT)),
+        )
+
+    def _can_run(self, priority, ticket):
+        if self._queues[priority][0] is not ticket:
+            return False
+        for higher in PRIORITIES[:PRIORITIES.index(priority)]:
+            if self._queues[higher]:
+                return False
+        return sum(self._in_flight.values()) < self.limits[priority]
+
+    @contextmanager
+    def slot(self, priority):
+        """Chờ tới lượt của loại priority rồi giữ lượt trong khối with; SchedulerBusy nếu không được nhận"""
+        ticket = object()
+        t0 = time.perf_counter()
+        with self._cond:
+            queue = self._queues[priority]
+            if len(queue) >= self.queue_size:
+                self._rejected[priority] += 1
+                raise SchedulerBusy(priority, 'queue_full', len(queue))
+            queue.append(ticket)
+            deadline = time.monotonic() + self.max_wait
+            try:
+                while not self._can_run(priority, ticket):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._rejected[priority] += 1
+                        raise SchedulerBusy(priority, 'timeout', len(queue) - 1)
+                    self._cond.wait(remaining)
+            finally:
+                queue.remove(ticket)
+                # Vị trí đầu hàng hoặc lượt ưu tiên vừa đổi: cho các luồng khác kiểm tra lại
+                self._cond.notify_all()
+            self._in_flight[priority] += 1
+            self._admitted[priority] += 1
+        t1 = time.perf_counter()
+        self.stats.observe(priority, 'wait', (t1 - t0) * 1000)
+        try:
+            yield
+        finally:
+            self.stats.observe(priority, 'service', (time.perf_counter() - t1) * 1000)
+            with self._cond:
+                self._in_flight[priority] -= 1
+                self._cond.notify_all()
+
+    def counters(self):
+        """{loại: (đang chờ, đang chạy, đã nhận, bị từ chối)}"""
+        with self._cond:
+            return {priority: (len(self._queues[priority]), self._in_flight[priority],
+                               self._admitted[priority], self._rejected[priority])
+                    for priority in PRIORITIES}
+
+    def snapshot(self):
+        """Mỗi loại một dòng: đang chờ, đang chạy, đã nhận, bị từ chối, p50/p95 chờ và phục vụ (ms)"""
+        counts = self.counters()
+        latency = {(row['endpoint'], row['phase']): row for row in self.stats.snapshot()}
+        rows = []
+        for priority in PRIORITIES:
+            queued, in_flight, admitted, rejected = counts[priority]
+            wait = latency.get((priority, 'wait'), {})
+            service = latency.get((priority, 'service'), {})
+            rows.append({
+                'loại': priority, 'trần': self.limits[priority], 'đang chờ': queued, 'đang chạy': in_flight,
+                'đã nhận': admitted, 'từ chối': rejected,
+                'chờ p50': wait.get('p50'), 'chờ p95': wait.get('p95'),
+                'phục vụ p50': service.get('p50'), 'phục vụ p95': service.get('p95'),
+            })
+        return rows
@@ -0,0 +1,110 @@
+"""Chỉ mục tìm kiếm lớp học: trigram trên chuỗi đã bỏ dấu tiếng Việt, xếp hạng top-k"""
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+
+def fold(text):
+    """Chữ thường, bỏ dấu tiếng Việt, gộp khoảng trắng ('Kinh  Tế' -> 'kinh te')"""
+    text = unicodedata.normalize('NFD', text.lower()).replace('đ', 'd')
+    return ' '.join(''.join(c for c in text if not unicodedata.combining(c)).split())
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SectionIndex:
+    """Chỉ mục trigram dựng một lần cho mỗi phiên bản danh sách lớp, dùng chung giữa các phiên.
+
+    Các dòng được đánh số lại theo (mã môn, tên, nhóm) nên duyệt id tăng dần chính là
+    thứ tự hiển thị; việc xếp hạng chỉ cần dừng khi đủ top-k thay vì chấm điểm mọi kết quả.
+    """
+
+    def __init__(self, sections):
+        self.sections = sections
+        keyed = []
+        for i, s in enumerate(sections):
+            code = fold(s.get('ma_mon', ''))
+            doc = f"{code} {fold(s.get('ten_mon', ''))} {fold(str(s.get('nhom_to', '')))}"
+            keyed.append((code, doc, i))
+        keyed.sort()
+        self._rows = array('I', (i for _, _, i in keyed))
+        self._docs = [doc for _, doc, _ in keyed]
+        # Các dòng cùng mã môn nằm liền nhau: mã môn -> [start, end)
+        self._code_bounds = {}
+        postings = defaultdict(list)
+        for pos, (code, doc, _) in enumerate(keyed):
+            start, _ = self._code_bounds.get(code, (pos, pos))
+            self._code_bounds[code] = (start, pos + 1)
+            for gram in _trigrams(doc):
+                postings[gram].append(pos)
+        self._codes = sorted(self._code_bounds)
+        self._postings = {gram: array('I', ids) for gram, ids in postings.items()}
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _candidates(self, grams, within):
+        if not grams:
+            return within if within is not None else range(len(self._docs))
+        lists = sorted((self._postings.get(g, ()) for g in grams), key=len)
+        ids = set(lists[0])
+        if within is not None:
+            ids &= within
+        for ids_list in lists[1:]:
+            # Khi tập ứng viên đã nhỏ, kiểm tra chuỗi con trực tiếp rẻ hơn giao thêm danh sách dài
+            if len(ids_list) > 4 * len(ids):
+                break
+            ids.intersection_update(ids_list)
+        return ids
+
+    def _code_span(self, prefix, exact=False):
+        """Khoảng vị trí các dòng có mã môn bằng (hoặc bắt đầu bằng) prefix"""
+        if exact:
+            return range(*self._code_bounds.get(prefix, (0, 0)))
+        lo = bisect_left(self._codes, prefix)
+        hi = bisect_left(self._codes, prefix + '\uffff')
+        if lo == hi:
+            return range(0)
+        return range(self._code_bounds[self._codes[lo]][0], self._code_bounds[self._codes[hi - 1]][1])
+
+    def search(self, query, limit=50, within=None):
+        """Trả về (top-k chỉ số dòng gốc đã xếp hạng, tập vị trí khớp dùng cho lần thu hẹp sau).
+
+        Khớp cả cụm như ô tìm kiếm cũ (không phân biệt dấu); nếu không có kết quả thì
+        khớp từng từ. Thứ tự: trùng mã môn, mã môn bắt đầu bằng truy vấn, cụm từ ở đầu
+        một từ, cụm từ ở giữa, khớp từng từ. within là tập trả về của truy vấn trước khi
+        truy vấn mới chỉ gõ thêm ký tự. limit=None xếp hạng toàn bộ các dòng khớp.
+        """
+        query = fold(query)
+        tokens = query.split()
+        if not tokens:
+            return [], set()
+        docs = self._docs
+        hits = {pos for pos in self._candidates(_trigrams(query), within) if query in docs[pos]}
+        if not hits and len(tokens) > 1:
+            # Tập within chỉ đúng cho khớp cả cụm, nên khớp từng từ thì tìm lại từ đầu
+            grams = set().union(*(_trigrams(t) for t in tokens))
+            hits = {pos for pos in self._candidates(grams, None) if all(t in docs[pos] for t in tokens)}
+
+        if limit is None:
+            limit = len(hits)
+        ranked, taken = [], set()
+
+        def take(positions, matches=None):
+            for pos in positions:
+                if len(ranked) >= limit:
+                    return
+                if pos in hits and pos not in taken and (matches is None or matches(docs[pos])):
+                    ranked.append(pos)
+                    taken.add(pos)
+
+        compact = query.replace(' ', '')
+        take(self._code_span(compact, exact=True))
+        take(self._code_span(compact))
+        ordered = sorted(hits)
+        take(ordered, lambda doc: doc.startswith(query) or f" {query}" in doc)
+        take(ordered)
+        return [self._rows[pos] for pos in ranked], hits
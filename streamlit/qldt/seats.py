@@ -0,0 +1,188 @@
+"""Một luồng nền duy nhất theo dõi số chỗ còn lại, chỉ đẩy phần thay đổi tới các phiên đang theo dõi lớp đó"""
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+DEFAULT_INTERVAL = 60.0
+# Không cho cấu hình nhanh hơn ngưỡng này: mỗi lần quét là một request 99999 dòng lên server
+MIN_INTERVAL = 15.0
+# Phiên không lấy thay đổi trong ngần này lần quét thì coi như đã đóng
+IDLE_POLLS = 10
+QUEUE_SIZE = 200
+
+# status: 'open' còn chỗ, 'full' hết chỗ, 'gone' lớp không còn trong danh sách, None nếu server không trả số chỗ
+SeatChange = namedtuple('SeatChange', 'id_to_hoc old_cp old_cl new_cp new_cl status at')
+
+
+def seat_status(cl):
+    if cl is None:
+        return None
+    return 'open' if cl > 0 else 'full'
+
+
+def row_index(table):
+    """id_to_hoc -> chỉ số dòng; dùng với CatalogueSnapshot.derived('row_index', row_index)"""
+    return {id_to_hoc: i for i, id_to_hoc in enumerate(table.columns['id_to_hoc'])}
+
+
+def seat_deltas(old, new, ids):
+    """Các SeatChange giữa hai CatalogueSnapshot cho những id_to_hoc trong ids"""
+    old_rows = old.derived('row_index', row_index)
+    new_rows = new.derived('row_index', row_index)
+    now = time.time()
+    changes = []
+    for id_to_hoc in ids:
+        i, j = old_rows.get(id_to_hoc), new_rows.get(id_to_hoc)
+        if i is None:
+            continue
+        old_cp, old_cl = old.sections.value('sl_cp', i), old.sections.value('sl_cl', i)
+        if j is None:
+            changes.append(SeatChange(id_to_hoc, old_cp, old_cl, None, None, 'gone', now))
+            continue
+        new_cp, new_cl = new.sections.value('sl_cp', j), new.sections.value('sl_cl', j)
+        if (old_cp, old_cl) != (new_cp, new_cl):
+            changes.append(SeatChange(id_to_hoc, old_cp, old_cl, new_cp, new_cl, seat_status(new_cl), now))
+    return changes
+
+
+class _Watcher:
+    __slots__ = ('ids', 'token', 'queue', 'seen_at')
+
+    def __init__(self):
+        self.ids = set()
+        self.token = None
+        self.queue = deque(maxlen=QUEUE_SIZE)
+        self.seen_at = time.time()
+
+
+class SeatPoller:
+    """Quét danh sách lớp định kỳ cho cả tiến trình (không phải mỗi sinh viên một lần).
+
+    Bản mới được đặt vào CatalogueCache nên tìm kiếm của mọi phiên cũng dùng luôn.
+    Luồng nền chỉ chạy khi có phiên theo dõi ít nhất một lớp và tự dừng khi hết.
+    """
+
+    def __init__(self, cache, fetch, interval=DEFAULT_INTERVAL):
+        self.cache = cache
+        self.fetch = fetch  # fetch(token) -> SectionTable
+        self.interval = max(float(interval), MIN_INTERVAL)
+        self._lock = threading.Lock()
+        self._watchers = {}
+        self._thread = None
+        self.polls = 0
+        self.errors = 0
+        self.changes = 0
+        self.last_poll_at = None
+        self.last_poll_ms = None
+        self.last_error = None
+
+    @classmethod
+    def from_env(cls, cache, fetch):
+        """Chu kỳ quét (giây) từ QLDT_SEAT_POLL_INTERVAL, tối thiểu MIN_INTERVAL"""
+        return cls(cache, fetch, interval=float(os.environ.get('QLDT_SEAT_POLL_INTERVAL', DEFAULT_INTERVAL)))
+
+    def watch(self, session_id, id_to_hoc, token):
+        with self._lock:
+            watcher = self._watchers.setdefault(session_id, _Watcher())
+            watcher.ids.add(id_to_hoc)
+            watcher.token = token
+            watcher.seen_at = time.time()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='seat-poller', daemon=True)
+                self._thread.start()
+
+    def unwatch(self, session_id, id_to_hoc=None):
+        """Bỏ theo dõi một lớp, hoặc mọi lớp của phiên nếu id_to_hoc là None"""
+        with self._lock:
+            watcher = self._watchers.get(session_id)
+            if watcher is None:
+                return
+            if id_to_hoc is None:
+                watcher.ids.clear()
+            else:
+                watcher.ids.discard(id_to_hoc)
+            if not watcher.ids:
+                del self._watchers[session_id]
+
+    def watched(self, session_id):
+        with self._lock:
+            watcher = self._watchers.get(session_id)
+            return set(watcher.ids) if watcher else set()
+
+    def drain(self, session_id, token=None):
+        """Lấy (và xóa) các thay đổi đang chờ của phiên; đồng thời đánh dấu phiên còn hoạt động"""
+        with self._lock:
+            watcher = self._watchers.get(session_id)
+            if watcher is None:
+                return []
+            watcher.seen_at = time.time()
+            if token:
+                watcher.token = token
+            changes = list(watcher.queue)
+            watcher.queue.clear()
+            return changes
+
+    def next_poll_in(self):
+        if self.last_poll_at is None:
+            return None
+        return max(self.last_poll_at + self.interval - time.time(), 0.0)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'watchers': len(self._watchers),
+                'sections': len(set().union(*(w.ids for w in self._watchers.values()))) if self._watchers else 0,
+                'polls': self.polls,
+                'errors': self.errors,
+                'changes': self.changes,
+                'interval': self.interval,
+                'last_poll_ms': self.last_poll_ms,
+                'last_error': self.last_error,
+            }
+
+    def _run(self):
+        while True:
+            # Giữ đúng chu kỳ kể cả khi luồng vừa được khởi động lại
+            wait = self.next_poll_in()
+            if wait:
+                time.sleep(wait)
+            with self._lock:
+                now = time.time()
+                for session_id in [s for s, w in self._watchers.items()
+                                   if now - w.seen_at > IDLE_POLLS * self.interval]:
+                    del self._watchers[session_id]
+                if not self._watchers:
+                    self._thread = None
+                    return
+                # Token của phiên hoạt động gần nhất
+                token = max(self._watchers.values(), key=lambda w: w.seen_at).token
+            self.poll(token)
+
+    def poll(self, token):
+        """Một lần quét: tải bản mới, so với bản đang giữ và đẩy thay đổi cho từng phiên"""
+        t0 = time.perf_counter()
+        try:
+            sections = self.fetch(token)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                self.last_error = str(e)
+                self.last_poll_at = time.time()
+            return
+        old = self.cache.current()
+        # Chỉ số chỗ đổi thì không ghi lại cả bản trên đĩa
+        new = self.cache.put(sections, (time.perf_counter() - t0) * 1000, persist=False)
+        with self._lock:
+            self.polls += 1
+            self.last_poll_at = time.time()
+            self.last_poll_ms = (time.perf_counter() - t0) * 1000
+            self.last_error = None
+            if old is None:
+                return
+            watched = set().union(*(w.ids for w in self._watchers.values()))
+            by_id = {change.id_to_hoc: change for change in seat_deltas(old, new, watched)}
+            self.changes += len(by_id)
+            for watcher in self._watchers.values():
+                for id_to_hoc in watcher.ids & by_id.keys():
+                    watcher.queue.append(by_id[id_to_hoc])
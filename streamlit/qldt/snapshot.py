@@ -0,0 +1,117 @@
+"""Lưu danh sách lớp ra SQLite để sau khi khởi động lại không phải chờ tải từ server"""
+import gc
+import marshal
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from array import array
+
+from qldt.columnar import SectionTable
+
+# Tăng khi đổi cách lưu cột; mảng số lưu dạng bytes thô và lịch học dạng marshal nên
+# thứ tự byte, kích thước phần tử và phiên bản marshal cũng phải khớp
+SCHEMA_VERSION = 1
+_FORMAT = f"{SCHEMA_VERSION}:{sys.byteorder}:{array('I').itemsize}:{array('i').itemsize}:{marshal.version}"
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE columns (name TEXT PRIMARY KEY, data BLOB NOT NULL);
+"""
+
+
+def default_path():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'qldt', 'catalogue.sqlite3')
+
+
+class SnapshotStore:
+    """Một tệp SQLite chứa bản danh sách lớp mới nhất, mỗi cột của SectionTable là một blob.
+
+    Ghi ra tệp tạm (tên riêng cho mỗi lần ghi) rồi đổi tên nên tiến trình khác không bao giờ
+    đọc phải bản ghi dở. Các lần ghi trong cùng tiến trình (bộ quét chỗ trống, làm mới nền) chạy
+    lần lượt và bản cũ hơn bản đã có trên đĩa thì bị bỏ qua.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._save_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Đường dẫn từ QLDT_SNAPSHOT_PATH; đặt rỗng để tắt lưu xuống đĩa (trả về None)"""
+        path = os.environ.get('QLDT_SNAPSHOT_PATH', default_path())
+        return cls(path) if path else None
+
+    def _read(self, query):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            try:
+                meta = dict(conn.execute('SELECT key, value FROM meta'))
+                if meta.get('format') != _FORMAT:
+                    return None
+                return meta, query(conn)
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+
+    def fetched_at(self):
+        """Thời điểm tải của bản đã lưu (epoch), None nếu chưa có hoặc không đọc được"""
+        found = self._read(lambda conn: None)
+        return float(found[0]['fetched_at']) if found else None
+
+    def load(self):
+        """(SectionTable, fetched_at) từ bản đã lưu, hoặc None"""
+        found = self._read(lambda conn: dict(conn.execute('SELECT name, data FROM columns')))
+        if found is None:
+            return None
+        meta, columns = found
+        # Dựng hàng chục nghìn tuple liên tiếp: tắt GC tạm thời để không bị quét lặp đi lặp lại
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            table = SectionTable.from_exported(columns)
+        except (KeyError, ValueError, TypeError, EOFError):
+            return None
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return table, float(meta['fetched_at'])
+
+    def save(self, table, fetched_at=None):
+        """Ghi toàn bộ bảng ra tệp tạm rồi thay thế tệp cũ trong một bước; False nếu trên đĩa đã có bản mới hơn"""
+        fetched_at = fetched_at or time.time()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._save_lock:
+            on_disk = self.fetched_at()
+            if on_disk is not None and on_disk >= fetched_at:
+                return False
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + '.', suffix='.tmp',
+                                            dir=directory or None)
+            os.close(fd)
+            try:
+                conn = sqlite3.connect(tmp_path)
+                try:
+                    conn.executescript(_SCHEMA)
+                    conn.executemany('INSERT INTO columns VALUES (?, ?)', table.export_columns().items())
+                    conn.executemany('INSERT INTO meta VALUES (?, ?)', [
+                        ('format', _FORMAT),
+                        ('fetched_at', repr(fetched_at)),
+                        ('rows', str(len(table))),
+                    ])
+                    conn.commit()
+                finally:
+                    conn.close()
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        return True
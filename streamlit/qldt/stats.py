@@ -0,0 +1,90 @@
+"""Thống kê độ trễ: histogram theo bucket và phân vị, an toàn đa luồng"""
+import math
+import threading
+from collections import deque
+
+# Biên trên các bucket (ms), theo kiểu histogram của Prometheus
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+def percentile(values, p):
+    """Phân vị p (0-100) theo nội suy tuyến tính, None nếu không có dữ liệu"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lo, hi = math.floor(k), math.ceil(k)
+    if lo == hi:
+        return ordered[lo]
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+class Histogram:
+    """Histogram tích lũy theo bucket, kèm cửa sổ mẫu gần nhất để tính phân vị"""
+
+    def __init__(self, buckets=BUCKETS_MS, window=512):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+
+    def summary(self):
+        samples = list(self.samples)
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': percentile(samples, 50),
+            'p95': percentile(samples, 95),
+            'max': max(samples) if samples else None,
+        }
+
+
+class LatencyStats:
+    """Tập histogram độ trễ theo (endpoint, giai đoạn)"""
+
+    def __init__(self, buckets=BUCKETS_MS, window=512):
+        self._buckets = buckets
+        self._window = window
+        self._lock = threading.Lock()
+        self._hists = {}
+        self.errors = {}
+
+    def observe(self, endpoint, phase, ms):
+        with self._lock:
+            hist = self._hists.get((endpoint, phase))
+            if hist is None:
+                hist = self._hists[(endpoint, phase)] = Histogram(self._buckets, self._window)
+            hist.observe(ms)
+
+    def error(self, endpoint):
+        with self._lock:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def histograms(self):
+        """Bản sao (endpoint, phase, Histogram) để xuất số liệu"""
+        with self._lock:
+            return [(ep, phase, hist) for (ep, phase), hist in sorted(self._hists.items())]
+
+    def snapshot(self):
+        """Danh sách dòng tóm tắt, sắp theo endpoint rồi giai đoạn"""
+        with self._lock:
+            rows = []
+            for (endpoint, phase), hist in sorted(self._hists.items()):
+                row = {'endpoint': endpoint, 'phase': phase}
+                row.update(hist.summary())
+                if phase == 'total':
+                    row['errors'] = self.errors.get(endpoint, 0)
+                rows.append(row)
+            return rows
@@ -0,0 +1,135 @@
+"""Đọc dần phản hồi JSON lớn (w-locdsnhomto): chỉ giữ các trường cần, ghi thẳng vào SectionTable.
+
+Không dựng toàn bộ cây đối tượng của phản hồi: mỗi lần chỉ một phần tử của
+ds_nhom_to / ds_mon_hoc tồn tại dưới dạng dict, rồi được chuyển ngay vào bảng cột.
+Mỗi phần tử được giải mã bằng json.JSONDecoder.raw_decode (C) trên một bộ đệm trượt.
+"""
+import codecs
+import json
+
+from qldt.columnar import SectionTable
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '0123456789.eE+-'
+_COMPACT_AT = 1 << 16
+
+
+class _Reader:
+    """Bộ đệm văn bản trên một dãy đoạn bytes; bỏ phần đã đọc để bộ đệm không phình ra"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def more(self):
+        if self.eof:
+            return False
+        if self.pos >= _COMPACT_AT:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self.buf += self._decoder.decode(chunk)
+                return True
+        self.buf += self._decoder.decode(b'', final=True)
+        self.eof = True
+        return True
+
+    def peek(self):
+        """Ký tự khác khoảng trắng tiếp theo ('' nếu hết dữ liệu)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self, decoder=json.JSONDecoder()):
+        """Giải mã trọn một giá trị JSON tại vị trí hiện tại, đọc thêm dữ liệu nếu chưa đủ"""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.more():
+                    continue
+                raise
+            # Số có thể bị cắt giữa hai đoạn ("1." | "5", "2e" | "-3", "12" | "34"): raw_decode trả về phần
+            # đầu hợp lệ, nên còn dữ liệu mà phần sau có thể nối tiếp số thì đọc thêm rồi giải mã lại
+            if (type(value) in (int, float) and not self.eof
+                    and (end == len(self.buf) or self.buf[end] in _NUMBER_CHARS)):
+                self.more()
+                continue
+            self.pos = end
+            return value
+
+
+def _walk(reader, path, targets):
+    """Duyệt object tại reader; sinh (đường dẫn, phần tử) cho các mảng có đường dẫn trong targets"""
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.pos += 1
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        child = path + (key,)
+        if child in targets and reader.peek() == '[':
+            reader.pos += 1
+            if reader.peek() == ']':
+                reader.pos += 1
+            else:
+                while True:
+                    yield child, reader.value()
+                    sep = reader.peek()
+                    reader.pos += 1
+                    if sep == ']':
+                        break
+                    if sep != ',':
+                        raise json.JSONDecodeError("Expecting ',' delimiter", reader.buf, reader.pos - 1)
+        elif any(t[:len(child)] == child for t in targets) and reader.peek() == '{':
+            yield from _walk(reader, child, targets)
+        else:
+            reader.value()
+        sep = reader.peek()
+        reader.pos += 1
+        if sep == '}':
+            return
+        if sep != ',':
+            raise json.JSONDecodeError("Expecting ',' delimiter", reader.buf, reader.pos - 1)
+
+
+def iter_arrays(chunks, targets):
+    """Sinh (đường dẫn, phần tử) cho mọi phần tử của các mảng có đường dẫn (tuple khóa) trong targets"""
+    reader = _Reader(chunks)
+    yield from _walk(reader, (), set(targets))
+    if reader.peek():
+        raise json.JSONDecodeError("Extra data", reader.buf, reader.pos)
+
+
+NHOM_TO_PATH = ('data', 'ds_nhom_to')
+MON_HOC_PATH = ('data', 'ds_mon_hoc')
+
+
+def parse_sections(chunks):
+    """Dựng SectionTable từ các đoạn bytes của phản hồi w-locdsnhomto"""
+    table = SectionTable()
+    subjects = []
+    for path, item in iter_arrays(chunks, (NHOM_TO_PATH, MON_HOC_PATH)):
+        if not isinstance(item, dict):
+            continue
+        if path == NHOM_TO_PATH:
+            table.append(item)
+        elif item.get('ma') and item.get('ten'):
+            subjects.append({'ma': item['ma'], 'ten': item['ten']})
+    table.set_subjects(subjects)
+    return table
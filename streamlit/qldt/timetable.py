@@ -0,0 +1,76 @@
+"""Phát hiện trùng lịch: mỗi lớp được mã hóa thành bitset (thứ x tiết) trong tuần"""
+from functools import lru_cache
+
+PERIODS_PER_DAY = 16
+DAYS = 7  # Thứ 2 .. Chủ nhật
+
+
+def slot_mask(slot):
+    """Bitset các tiết của một buổi học; 0 nếu không rõ thứ hoặc tiết"""
+    if slot.weekday is None or slot.start_period is None:
+        return 0
+    day = slot.weekday - 2
+    start = max(slot.start_period, 1)
+    end = min(slot.end_period, PERIODS_PER_DAY)
+    if not 0 <= day < DAYS or end < start:
+        return 0
+    width = end - start + 1
+    return ((1 << width) - 1) << (day * PERIODS_PER_DAY + start - 1)
+
+
+@lru_cache(maxsize=65536)
+def schedule_mask(slots):
+    """Bitset của cả lịch học (tuple Slot); các lớp trùng chuỗi tkb dùng chung kết quả"""
+    mask = 0
+    for slot in slots:
+        mask |= slot_mask(slot)
+    return mask
+
+
+def _dates_overlap(a, b):
+    # Thiếu ngày thì coi như học cả học kỳ
+    if not (a.start_date and a.end_date and b.start_date and b.end_date):
+        return True
+    return a.start_date <= b.end_date and b.start_date <= a.end_date
+
+
+def slots_clash(a, b):
+    """Kiểm tra chính xác hai lịch: cùng tiết trong tuần và khoảng ngày học giao nhau"""
+    for sa in a:
+        ma = slot_mask(sa)
+        if not ma:
+            continue
+        for sb in b:
+            if ma & slot_mask(sb) and _dates_overlap(sa, sb):
+                return True
+    return False
+
+
+class ClashChecker:
+    """Tập lịch cố định (môn đã đăng ký, lớp trong giỏ) để kiểm tra nhanh các lớp ứng viên.
+
+    Phép AND trên bitset loại ngay phần lớn các cặp; chỉ các cặp trùng tiết mới được
+    kiểm tra thêm khoảng ngày học.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self.mask = 0
+
+    def add(self, key, label, slots, mask=None):
+        slots = tuple(slots)
+        if mask is None:
+            mask = schedule_mask(slots)
+        self._entries.append((key, label, mask, slots))
+        self.mask |= mask
+
+    def clashes(self, slots, exclude=None, mask=None):
+        """Nhãn các lịch trùng với slots, bỏ qua mục có key == exclude; mask tính sẵn thì truyền vào"""
+        if mask is None:
+            mask = schedule_mask(tuple(slots))
+        if not mask & self.mask:
+            return []
+        return [
+            label for key, label, other, other_slots in self._entries
+            if key != exclude and mask & other and slots_clash(slots, other_slots)
+        ]
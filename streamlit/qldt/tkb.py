@@ -0,0 +1,84 @@
+"""Phân tích chuỗi thời khóa biểu (tkb) của to_hoc thành các buổi học có cấu trúc"""
+import re
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+# weekday: 2..7 là Thứ 2..Thứ 7, 8 là Chủ nhật; ngày dạng 'YYYY-MM-DD' để so sánh và xuất JSON trực tiếp
+Slot = namedtuple('Slot', 'weekday start_period end_period start_date end_date weeks room lecturer text')
+
+_WEEKDAY_WORDS = {
+    'hai': 2, 'ba': 3, 'tư': 4, 'tu': 4, 'bốn': 4, 'năm': 5, 'nam': 5,
+    'sáu': 6, 'sau': 6, 'bảy': 7, 'bay': 7,
+}
+_WEEKDAY_RE = re.compile(r'\b(?:thứ|thu)\s*([2-7]|hai|ba|tư|tu|bốn|năm|nam|sáu|sau|bảy|bay)\b|\b(chủ\s*nhật|cn)\b', re.I)
+_PERIOD_RE = re.compile(r'tiết\s*(\d+)(?:\s*(?:-|–|->|đến)\s*(?:tiết\s*)?(\d+))?', re.I)
+_DATE_RANGE_RE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{2,4})\s*(?:-|–|->|đến)\s*(\d{1,2})/(\d{1,2})/(\d{2,4})', re.I)
+_WEEKS_RE = re.compile(r'tuần\s*([\d\s\-–,;]+\d)', re.I)
+_ROOM_RE = re.compile(r'(?:phòng|\bP\.)\s*([^,<]+)', re.I)
+_LECTURER_RE = re.compile(r'GV\.?\s+([^,<]+)')
+
+
+@lru_cache(maxsize=4096)
+def _iso_date(day, month, year):
+    year = int(year)
+    if year < 100:
+        year += 2000
+    return sys.intern(f"{year:04d}-{int(month):02d}-{int(day):02d}")
+
+
+def parse_slot(fragment):
+    """Phân tích một buổi học (một đoạn giữa các thẻ <hr>); các trường lặp lại được intern"""
+    text = fragment.strip()
+    weekday = start = end = start_date = end_date = None
+
+    m = _WEEKDAY_RE.search(text)
+    if m:
+        if m.group(2):
+            weekday = 8
+        else:
+            word = m.group(1).lower()
+            weekday = int(word) if word.isdigit() else _WEEKDAY_WORDS[word]
+
+    m = _PERIOD_RE.search(text)
+    if m:
+        start = int(m.group(1))
+        end = int(m.group(2)) if m.group(2) else start
+        if end < start:
+            start, end = end, start
+
+    # Kiểm tra nhanh bằng chuỗi con trước khi chạy regex tốn kém
+    m = _DATE_RANGE_RE.search(text) if '/' in text else None
+    if m:
+        start_date = _iso_date(*m.group(1, 2, 3))
+        end_date = _iso_date(*m.group(4, 5, 6))
+
+    m = _WEEKS_RE.search(text) if 'uần' in text or 'UẦN' in text else None
+    weeks = sys.intern(m.group(1).strip()) if m else ''
+    m = _ROOM_RE.search(text)
+    room = sys.intern(m.group(1).strip()) if m else ''
+    m = _LECTURER_RE.search(text)
+    lecturer = sys.intern(m.group(1).strip()) if m else ''
+    return Slot(weekday, start, end, start_date, end_date, weeks, room, lecturer, text)
+
+
+@lru_cache(maxsize=65536)
+def parse_tkb(tkb):
+    """Chuỗi tkb -> tuple các Slot; kết quả được cache nên các lớp trùng lịch dùng chung một tuple"""
+    if not tkb:
+        return ()
+    return tuple(parse_slot(part) for part in tkb.split('<hr>') if part.strip())
+
+
+def join_slots(slots):
+    """Dựng lại chuỗi tkb từ các buổi học (mỗi đoạn đã bỏ khoảng trắng thừa)"""
+    return '<hr>'.join(s.text for s in slots)
+
+
+def summarize_slots(slots):
+    """(giảng viên, thời gian chính) theo đúng cách hiển thị cũ: buổi đầu tiên, bỏ phần ',GV ...'"""
+    lecturer = next((s.lecturer for s in slots if s.lecturer), '')
+    schedule = ''
+    if slots and 'tiết' in slots[0].text:
+        schedule = slots[0].text.split(',GV')[0]
+    return lecturer, schedule
@@ -0,0 +1,191 @@
+"""Tầng vận chuyển HTTP cho QLDTApi: pool kết nối keep-alive dùng chung, timeout và đo độ trễ"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import DefaultCookiePolicy
+
+import certifi
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from qldt.stats import LatencyStats
+
+# Thời gian từng giai đoạn của request đang chạy trên luồng hiện tại (giây)
+_phases = threading.local()
+
+# Proxy mặc định của cả ứng dụng lẫn dòng lệnh; đổi bằng QLDT_PROXY (rỗng để đi thẳng)
+DEFAULT_PROXY = 'http://113.160.132.195:8080'
+
+SETUP_PHASES = ('connect', 'proxy_connect', 'tls')
+# Kích thước đoạn body khi đọc dần (post_stream)
+STREAM_CHUNK = 64 * 1024
+
+
+def _record_phase(name, seconds):
+    current = getattr(_phases, 'current', None)
+    if current is not None:
+        current[name] = current.get(name, 0.0) + seconds
+
+
+class _TimedConnectionMixin:
+    """Đo thời gian mở TCP (gồm DNS), CONNECT qua proxy và bắt tay TLS"""
+
+    def _new_conn(self):
+        t0 = time.perf_counter()
+        sock = super()._new_conn()
+        _record_phase('connect', time.perf_counter() - t0)
+        return sock
+
+    def _tunnel(self):
+        t0 = time.perf_counter()
+        super()._tunnel()
+        _record_phase('proxy_connect', time.perf_counter() - t0)
+
+    def connect(self):
+        current = getattr(_phases, 'current', None)
+        before = sum(current.get(k, 0.0) for k in SETUP_PHASES) if current is not None else 0.0
+        t0 = time.perf_counter()
+        super().connect()
+        elapsed = time.perf_counter() - t0
+        if current is not None and isinstance(self, HTTPSConnection):
+            spent = sum(current.get(k, 0.0) for k in SETUP_PHASES) - before
+            _record_phase('tls', max(elapsed - spent, 0.0))
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+_TIMED_POOLS = {'http': _TimedHTTPConnectionPool, 'https': _TimedHTTPSConnectionPool}
+
+
+class _TimedAdapter(HTTPAdapter):
+    """HTTPAdapter dùng các connection có đo thời gian, kể cả khi đi qua proxy"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _TIMED_POOLS
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        manager.pool_classes_by_scheme = _TIMED_POOLS
+        return manager
+
+
+class Transport:
+    """Session requests dùng chung cho mọi phiên Streamlit.
+
+    Pool urllib3 an toàn đa luồng; cookie bị chặn hoàn toàn để phiên của
+    sinh viên này không lẫn sang sinh viên khác (xác thực chỉ qua Bearer token).
+    """
+
+    def __init__(self, proxy=None, connect_timeout=5.0, read_timeout=30.0,
+                 compress=True, pool_size=16, verify=None):
+        self.session = requests.Session()
+        self.session.trust_env = False
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = _TimedAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if proxy:
+            self.session.proxies = {'http': proxy, 'https': proxy}
+        self.session.verify = verify or certifi.where()
+        self.timeout = (connect_timeout, read_timeout)
+        self.compress = compress
+        self.stats = LatencyStats()
+
+    @classmethod
+    def from_env(cls, proxy=DEFAULT_PROXY):
+        """Tạo Transport từ biến môi trường QLDT_PROXY (mặc định DEFAULT_PROXY), QLDT_CONNECT_TIMEOUT, QLDT_READ_TIMEOUT, QLDT_GZIP"""
+        return cls(
+            proxy=os.environ.get('QLDT_PROXY', proxy),
+            connect_timeout=float(os.environ.get('QLDT_CONNECT_TIMEOUT', 5)),
+            read_timeout=float(os.environ.get('QLDT_READ_TIMEOUT', 30)),
+            compress=os.environ.get('QLDT_GZIP', '1').lower() not in ('0', 'false', 'no'),
+            pool_size=int(os.environ.get('QLDT_POOL_SIZE', 16)),
+        )
+
+    def post(self, url, endpoint=None, headers=None, **kwargs):
+        """Gửi POST qua pool, đọc hết body và ghi nhận độ trễ theo endpoint"""
+        def read(resp):
+            resp.content  # đọc hết body để tính cả thời gian tải
+            return resp
+        return self._send(url, endpoint, headers, read, kwargs)
+
+    def post_stream(self, url, consume, endpoint=None, headers=None, chunk_size=STREAM_CHUNK, **kwargs):
+        """Gửi POST và đưa body cho consume(resp, chunks) theo từng đoạn (đã giải nén), trả về kết quả của consume.
+
+        Body không bao giờ nằm trọn trong bộ nhớ; thời gian đọc và xử lý body được tính vào 'total'.
+        """
+        def read(resp):
+            with resp:
+                resp.raise_for_status()
+                return consume(resp, resp.iter_content(chunk_size))
+        return self._send(url, endpoint, headers, read, dict(kwargs, stream=True))
+
+    def warm(self, url, connections=1, endpoint='warm'):
+        """Mở sẵn (hoặc giữ ấm) tới `connections` kết nối trong pool bằng các HEAD song song.
+
+        Không quan tâm mã trạng thái; trả về mỗi kết nối một dict: 'new' (phải mở kết nối mới),
+        'setup_ms' (TCP + CONNECT proxy + TLS) và 'rtt_ms' (tổng thời gian của HEAD).
+        """
+        def read(resp):
+            phases = dict(_phases.current or {})
+            return {
+                'new': any(k in phases for k in SETUP_PHASES),
+                'setup_ms': sum(phases.get(k, 0.0) for k in SETUP_PHASES) * 1000,
+            }
+
+        def one(_):
+            t0 = time.perf_counter()
+            result = self._send(url, endpoint, None, read, {}, method='HEAD')
+            result['rtt_ms'] = (time.perf_counter() - t0) * 1000
+            return result
+
+        connections = max(int(connections), 1)
+        if connections == 1:
+            return [one(0)]
+        with ThreadPoolExecutor(max_workers=connections, thread_name_prefix='qldt-warm') as pool:
+            return list(pool.map(one, range(connections)))
+
+    def _send(self, url, endpoint, headers, read, kwargs, method='POST'):
+        endpoint = endpoint or url
+        headers = dict(headers or {})
+        headers['Accept-Encoding'] = 'gzip, deflate' if self.compress else 'identity'
+        _phases.current = phases = {}
+        t0 = time.perf_counter()
+        try:
+            resp = self.session.request(method, url, headers=headers, timeout=self.timeout, **kwargs)
+            result = read(resp)
+        except Exception:
+            self.stats.error(endpoint)
+            raise
+        finally:
+            _phases.current = None
+        total = time.perf_counter() - t0
+        # Lỗi phía server có body nên read() không ném lỗi; vẫn phải tính là request lỗi
+        if resp.status_code >= 500:
+            self.stats.error(endpoint)
+
+        setup = sum(phases.get(k, 0.0) for k in SETUP_PHASES)
+        for phase in SETUP_PHASES:
+            if phase in phases:
+                self.stats.observe(endpoint, phase, phases[phase] * 1000)
+        self.stats.observe(endpoint, 'ttfb', max(resp.elapsed.total_seconds() - setup, 0.0) * 1000)
+        self.stats.observe(endpoint, 'total', total * 1000)
+        return result
@@ -0,0 +1,27 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'streamlit'))
+
+import pytest  # noqa: E402
+
+from qldt.columnar import SectionTable  # noqa: E402
+
+
+def section_records(n, sl_cl=0, seats=None):
+    """(ds_nhom_to, ds_mon_hoc) nhỏ: n lớp của 3 môn, mỗi lớp một buổi khác nhau; seats: {dòng: sl_cl}"""
+    ds_nhom_to = [{'id_to_hoc': str(1000 + i), 'ma_mon': f"MH{i % 3}", 'nhom_to': f"{i // 3 + 1:02d}", 'to': '',
+                   'so_tc': '3', 'lop': 'K62', 'sl_cp': 60, 'sl_cl': sl_cl,
+                   'tkb': f"Thứ {i % 6 + 2},tiết {i % 4 * 3 + 1}-{i % 4 * 3 + 3},Phòng A{i},01/09/25 đến 15/12/25"}
+                  for i in range(n)]
+    for i, cl in (seats or {}).items():
+        ds_nhom_to[i]['sl_cl'] = cl
+    ds_mon_hoc = [{'ma': f"MH{k}", 'ten': f"Môn học {k}"} for k in range(3)]
+    return ds_nhom_to, ds_mon_hoc
+
+
+@pytest.fixture
+def make_table():
+    def make(n=6, sl_cl=0, seats=None):
+        return SectionTable.from_records(*section_records(n, sl_cl, seats))
+    return make
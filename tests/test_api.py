@@ -0,0 +1,54 @@
+"""QLDTApi.check_token: mã trạng thái quyết định kết quả, request xếp hàng ở mức ưu tiên thấp nhất"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from qldt.api import QLDTApi
+from qldt.scheduler import CATALOGUE, PRIORITIES, RequestScheduler
+from qldt.transport import Transport
+
+# token -> mã trạng thái server trả về
+STATUS = {'good': 200, 'expired': 401, 'broken': 500}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0) or 0))
+        token = self.headers.get('Authorization', '').removeprefix('Bearer ')
+        status = STATUS.get(token, 401) if self.path == QLDTApi.TOKEN_CHECK_PATH else 404
+        body = b'{"data": {"ds_kqdkmh": []}}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    yield QLDTApi(Transport(), RequestScheduler(concurrency=2), base_url=f"http://{host}:{port}")
+    server.shutdown()
+    server.server_close()
+
+
+def test_check_token_status(api):
+    valid, ms = api.check_token('good')
+    assert valid and ms > 0
+    assert api.check_token('expired')[0] is False
+    with pytest.raises(requests.HTTPError):
+        api.check_token('broken')
+
+
+def test_check_token_uses_lowest_priority(api):
+    api.check_token('good')
+    admitted = {priority: api.scheduler.counters()[priority][2] for priority in PRIORITIES}
+    assert PRIORITIES[-1] == CATALOGUE
+    assert admitted == {priority: int(priority == CATALOGUE) for priority in PRIORITIES}
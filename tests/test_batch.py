@@ -0,0 +1,74 @@
+"""register_batch: mỗi lớp một kết quả, song song có giới hạn, báo cáo theo thứ tự giỏ"""
+import threading
+import time
+
+from qldt.batch import DEFAULT_WORKERS, MAX_WORKERS, register_batch, summarize, workers_from_env
+
+CLASSES = [{'id': str(i), 'label': f"Lớp {i}"} for i in range(8)]
+
+
+def fake_register(outcomes, delay=0.0):
+    """register(token, id) giả: 'ok', 'fail' (server từ chối) hoặc 'raise'; ghi số request đồng thời lớn nhất"""
+    state = {'running': 0, 'peak': 0, 'calls': []}
+    lock = threading.Lock()
+
+    def register(token, id):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+            state['calls'].append((token, id))
+        try:
+            time.sleep(delay)
+            outcome = outcomes.get(id, 'ok')
+            if outcome == 'raise':
+                raise RuntimeError('mất kết nối')
+            if outcome == 'fail':
+                return {'data': {'is_thanh_cong': False, 'thong_bao_loi': 'Lớp đã đủ số lượng'}}
+            return {'data': {'is_thanh_cong': True}}
+        finally:
+            with lock:
+                state['running'] -= 1
+
+    return register, state
+
+
+def test_results_classified_per_class():
+    register, state = fake_register({'1': 'fail', '2': 'raise'})
+    results = {r['id']: r for r in register_batch(register, 'tok', CLASSES[:4], max_workers=3)}
+    assert sorted(results) == ['0', '1', '2', '3']
+    assert results['0']['ok'] and not results['0']['error'] and results['0']['message'] == ''
+    assert not results['1']['ok'] and not results['1']['error'] and results['1']['message'] == 'Lớp đã đủ số lượng'
+    assert not results['2']['ok'] and results['2']['error'] and results['2']['message'] == 'mất kết nối'
+    assert results['3']['label'] == 'Lớp 3'
+    assert sorted(state['calls']) == [('tok', str(i)) for i in range(4)]
+
+
+def test_concurrency_is_bounded():
+    register, state = fake_register({}, delay=0.02)
+    results = list(register_batch(register, 'tok', CLASSES, max_workers=3))
+    assert len(results) == len(CLASSES)
+    assert 1 < state['peak'] <= 3
+
+
+def test_single_worker_is_sequential_in_cart_order():
+    register, state = fake_register({})
+    results = list(register_batch(register, 'tok', CLASSES, max_workers=1))
+    assert state['peak'] == 1
+    assert [r['index'] for r in results] == list(range(len(CLASSES)))
+
+
+def test_summary_in_cart_order():
+    register, _ = fake_register({'3': 'fail', '5': 'raise'}, delay=0.001)
+    report = summarize(register_batch(register, 'tok', CLASSES, max_workers=4), 12.5, 4)
+    assert [r['id'] for r in report['results']] == [c['id'] for c in CLASSES]
+    assert (report['success'], report['fail'], report['workers'], report['total_ms']) == (6, 2, 4, 12.5)
+    assert report['p50_ms'] is not None and report['p95_ms'] >= report['p50_ms']
+
+
+def test_workers_from_env(monkeypatch):
+    monkeypatch.setenv('QLDT_REGISTER_WORKERS', '100')
+    assert workers_from_env() == MAX_WORKERS
+    monkeypatch.setenv('QLDT_REGISTER_WORKERS', '0')
+    assert workers_from_env() == 1
+    monkeypatch.setenv('QLDT_REGISTER_WORKERS', 'abc')
+    assert workers_from_env() == DEFAULT_WORKERS
@@ -0,0 +1,70 @@
+"""Cart khóa theo id_to_hoc, CartEntry và Course truy cập như dict"""
+import pytest
+
+from qldt.cart import Cart, CartEntry, section_label
+from qldt.courses import COURSE_FIELDS, course_info
+from qldt.timetable import schedule_mask
+from qldt.tkb import parse_tkb
+
+
+def entry(id, code='MH0', tkb='Thứ 2,tiết 1-3'):
+    return CartEntry(id, f"Lớp {id}", code, parse_tkb(tkb))
+
+
+def test_cart_keeps_insertion_order_and_rejects_duplicates():
+    cart = Cart([entry('3'), entry('1'), entry('2')])
+    assert not cart.add(entry('1'))
+    assert cart.add(entry('4'))
+    assert [e.id for e in cart] == ['3', '1', '2', '4']
+    assert len(cart) == 4 and '2' in cart and '9' not in cart
+    assert cart.get('1').label == 'Lớp 1' and cart.get('9') is None
+
+
+def test_cart_remove_retain_clear():
+    cart = Cart([entry(str(i)) for i in range(5)])
+    assert cart.remove('2').id == '2' and cart.remove('2') is None
+    cart.retain(['4', '0', '9'])
+    assert [e.id for e in cart] == ['0', '4']
+    cart.clear()
+    assert len(cart) == 0 and list(cart) == []
+
+
+def test_cart_remove_subjects():
+    cart = Cart([entry('1', 'MH0'), entry('2', 'MH1'), entry('3', 'MH0'), entry('4', 'MH2')])
+    removed = cart.remove_subjects(['MH0', 'MH2'])
+    assert [e.id for e in removed] == ['1', '3', '4']
+    assert [e.id for e in cart] == ['2']
+
+
+def test_cart_iteration_allows_removal():
+    cart = Cart([entry(str(i)) for i in range(4)])
+    for e in cart:
+        if e.id in ('1', '2'):
+            cart.remove(e.id)
+    assert [e.id for e in cart] == ['0', '3']
+
+
+def test_cart_entry_fields(make_table):
+    section = make_table()[4]
+    e = CartEntry.from_section(section, 'Tên riêng')
+    assert (e['id'], e['label'], e.code) == (section['id_to_hoc'], section_label(section, 'Tên riêng'), 'MH1')
+    assert e.slots is section['slots'] and e.mask == section['mask']
+    assert e.label == f"MH1 - Tên riêng (Nhóm {section['nhom_to']})"
+    with pytest.raises(KeyError):
+        e['ma_mon']
+    padded = CartEntry('9', 'x', '  MH5 ', parse_tkb('Thứ 3,tiết 4-6'))
+    assert padded.code == 'MH5' and padded.mask == schedule_mask(padded.slots) != 0
+
+
+def test_course_is_dict_like():
+    course = course_info({'to_hoc': {'ma_mon': ' KTE201 ', 'ten_mon': 'Kinh tế vĩ mô', 'so_tc': '3',
+                                     'id_to_hoc': '77', 'nhom_to': '02', 'tkb': 'Thứ 5,tiết 7-9,GV Trần An'},
+                          'trang_thai_mon': 'Đăng ký'})
+    assert list(course.keys()) == list(COURSE_FIELDS)
+    assert course['credits'] == 3 and course['group_id'] == '77' and course['lecturer'] == 'Trần An'
+    assert course.code == 'KTE201' and course.mask == schedule_mask(course['slots'])
+    assert course.get('code') is None and 'code' not in course and 'status' in course
+    assert course.to_dict() == dict(course.items()) and set(course.to_dict()) == set(COURSE_FIELDS)
+    with pytest.raises(KeyError):
+        course['mask']
+    assert not hasattr(course, '__dict__')
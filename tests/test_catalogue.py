@@ -0,0 +1,138 @@
+"""CatalogueCache: single-flight khi cache miss, trả bản cũ trong lúc làm mới nền"""
+import threading
+import time
+
+from qldt.catalogue import CatalogueCache
+
+
+def counting_fetch(table, delay=0.0, gate=None):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        if gate is not None:
+            gate.wait(5)
+        time.sleep(delay)
+        return table
+    return fetch, calls
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_misses_share_one_fetch(make_table):
+    cache = CatalogueCache(ttl=60)
+    fetch, calls = counting_fetch(make_table(), delay=0.05)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(fetch))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    stats = cache.stats()
+    assert (stats['misses'], stats['coalesced'], stats['sections']) == (1, 7, 6)
+
+
+def test_fresh_snapshot_is_a_hit(make_table):
+    cache = CatalogueCache(ttl=60)
+    fetch, calls = counting_fetch(make_table())
+    first = cache.get(fetch)
+    assert cache.get(fetch) is first
+    assert len(calls) == 1 and cache.stats()['hits'] == 1
+
+
+def test_records_are_projected(make_table):
+    cache = CatalogueCache(ttl=60)
+    snapshot = cache.get(lambda: {'ds_nhom_to': [{'id_to_hoc': '1', 'ma_mon': 'MH0', 'nhom_to': '01'}],
+                                  'ds_mon_hoc': [{'ma': 'MH0', 'ten': 'Môn học 0'}]})
+    assert snapshot.sections[0]['ten_mon'] == 'Môn học 0'
+
+
+def test_stale_snapshot_served_while_refreshing(make_table):
+    cache = CatalogueCache(ttl=0.05, refresh_jitter=0)
+    old = cache.get(counting_fetch(make_table(3))[0])
+    time.sleep(0.06)
+    gate = threading.Event()
+    fetch, calls = counting_fetch(make_table(5), gate=gate)
+
+    # Hết TTL: cả hai lần gọi trả ngay bản cũ, chỉ một lượt tải nền
+    assert cache.get(fetch) is old
+    assert cache.get(fetch) is old
+    assert cache.stats()['refreshing'] and cache.stats()['stale_hits'] == 2
+    gate.set()
+    wait_until(lambda: cache.current() is not old)
+    assert len(calls) == 1
+    assert len(cache.current().sections) == 5 and cache.current().version == old.version + 1
+
+
+def test_cold_error_reaches_every_waiter():
+    cache = CatalogueCache(ttl=60)
+    gate = threading.Event()
+
+    def fetch():
+        gate.wait(5)
+        raise RuntimeError('server lỗi')
+
+    errors = []
+
+    def get():
+        try:
+            cache.get(fetch)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: cache.stats()['coalesced'] == 3)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert errors == ['server lỗi'] * 4
+    assert cache.stats()['errors'] == 1 and cache.current() is None
+
+
+def test_manual_refresh_states(make_table):
+    cache = CatalogueCache(ttl=60, min_refresh_age=0.05)
+    old = cache.get(counting_fetch(make_table(3))[0])
+    assert cache.refresh(counting_fetch(make_table())[0]) == 'recent'
+    time.sleep(0.06)
+
+    gate = threading.Event()
+    fetch, calls = counting_fetch(make_table(4), gate=gate)
+    assert cache.refresh(fetch) == 'started'
+    assert cache.refresh(fetch) == 'running'
+    assert cache.get(fetch) is old
+    gate.set()
+    wait_until(lambda: cache.current() is not old)
+    assert len(calls) == 1 and len(cache.current().sections) == 4
+
+    def failing():
+        raise RuntimeError('lỗi')
+
+    time.sleep(0.06)
+    cache.refresh(failing)
+    wait_until(lambda: not cache.stats()['refreshing'])
+    assert cache.refresh(fetch) == 'backoff'
+
+
+def test_invalidate_forces_reload(make_table):
+    cache = CatalogueCache(ttl=60)
+    fetch, calls = counting_fetch(make_table())
+    first = cache.get(fetch)
+    cache.invalidate()
+    assert cache.current() is None
+    assert cache.get(fetch) is not first and len(calls) == 2
+
+
+def test_expired_beyond_max_stale_waits(make_table):
+    cache = CatalogueCache(ttl=0, max_stale=0)
+    fetch, calls = counting_fetch(make_table())
+    first = cache.get(fetch)
+    assert cache.get(fetch) is not first and len(calls) == 2
@@ -0,0 +1,52 @@
+"""update_courses_data: phân loại thêm/bỏ/đổi và tổng tín chỉ khớp với dựng lại từ đầu"""
+from qldt.courses import build_courses_data, update_courses_data
+
+
+def record(group_id, code, credits, status='Đăng ký', tkb='Thứ 2,tiết 1-3,Phòng A101'):
+    return {'to_hoc': {'id_to_hoc': group_id, 'ma_mon': code, 'ten_mon': code, 'so_tc': str(credits),
+                       'nhom_to': '01', 'lop': 'K62', 'tkb': tkb},
+            'trang_thai_mon': status, 'ngay_dang_ky': '2025-08-01'}
+
+
+def response(*records):
+    return {'data': {'ds_kqdkmh': list(records), 'total_items': len(records), 'so_tin_chi_min': 14}}
+
+
+def ids(courses):
+    return sorted(course['group_id'] for course in courses)
+
+
+def test_diff_added_removed_changed():
+    old = build_courses_data(response(record('1', 'KTE201', 3), record('2', 'TAN101', 2), record('3', 'PLU111', 3)))
+    new_data = response(
+        record('1', 'KTE201', 3),                                # giữ nguyên
+        record('2', 'TAN101', 2, status='Hủy đăng ký'),          # đổi trạng thái
+        record('4', 'TMA301', 4),                                # thêm
+        record('5', 'TOA105', 3, tkb='Thứ 5,tiết 7-9'),          # thêm
+    )
+    updated, changes = update_courses_data(old, new_data)
+
+    assert ids(changes['added']) == ['4', '5']
+    assert ids(changes['removed']) == ['3']
+    assert ids(changes['changed']) == ['2']
+    assert updated['courses'][0] is old['courses'][0]
+    rebuilt = build_courses_data(new_data)
+    assert updated['total_credits'] == rebuilt['total_credits'] == 12
+    assert updated['total_courses'] == 4
+    assert [c.to_dict() for c in updated['courses']] == [c.to_dict() for c in rebuilt['courses']]
+
+
+def test_no_changes_keeps_courses():
+    data = response(record('1', 'KTE201', 3), record('2', 'TAN101', 2))
+    old = build_courses_data(data)
+    updated, changes = update_courses_data(old, data)
+    assert changes == {'added': [], 'removed': [], 'changed': []}
+    assert all(a is b for a, b in zip(updated['courses'], old['courses']))
+    assert updated['total_credits'] == 5
+
+
+def test_changed_credits_adjust_total():
+    old = build_courses_data(response(record('1', 'KTE201', 3), record('2', 'TAN101', 2)))
+    updated, changes = update_courses_data(old, response(record('2', 'TAN101', 2, tkb='Thứ 3,tiết 4-6')))
+    assert ids(changes['changed']) == ['2'] and ids(changes['removed']) == ['1']
+    assert updated['total_credits'] == 2
@@ -0,0 +1,36 @@
+"""Xuất iCalendar: gấp dòng đúng RFC 5545"""
+import io
+
+from qldt.courses import build_courses_data
+from qldt.export import write_ics
+
+LONG_TKB = ('Thứ 2,tiết 1-3,Phòng Hội trường lớn tầng 5 nhà A – cơ sở Láng Thượng,'
+            'GV Nguyễn Thị Ánh Tuyết Trương Đức Hoàng Phương Thảo Nguyễn Văn Ấn,01/09/25 đến 15/12/25')
+
+
+def ics_text():
+    data = {'data': {'ds_kqdkmh': [{
+        'to_hoc': {'ma_mon': 'KTE201', 'ten_mon': 'Kinh tế vĩ mô – chương trình chất lượng cao', 'so_tc': '3',
+                   'id_to_hoc': '1001', 'nhom_to': '01', 'lop': 'K62', 'tkb': LONG_TKB},
+        'trang_thai_mon': 'Đăng ký', 'ngay_dang_ky': '2025-08-01',
+    }]}}
+    out = io.BytesIO()
+    write_ics(build_courses_data(data), out)
+    return out.getvalue()
+
+
+def test_folded_lines_are_at_most_75_octets():
+    raw = ics_text()
+    lines = raw.split(b'\r\n')
+    assert any(line.startswith(b' ') for line in lines)
+    assert all(len(line) <= 75 for line in lines)
+    # Mỗi dòng vẫn là UTF-8 hợp lệ (không cắt giữa ký tự)
+    for line in lines:
+        line.decode('utf-8')
+
+
+def test_unfolding_restores_description():
+    unfolded = ics_text().decode('utf-8').replace('\r\n ', '')
+    description = next(line for line in unfolded.split('\r\n') if line.startswith('DESCRIPTION:'))
+    assert 'Nguyễn Thị Ánh Tuyết' in description
+    assert 'Láng Thượng' in description
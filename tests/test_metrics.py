@@ -0,0 +1,42 @@
+"""metrics_text: histogram xuất theo giây, bucket cộng dồn"""
+from qldt.metrics import metrics_text
+from qldt.scheduler import RequestScheduler
+from qldt.stats import LatencyStats
+
+
+class FakeTransport:
+    def __init__(self):
+        self.stats = LatencyStats()
+
+
+def samples(text):
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if not line.startswith('#'))
+
+
+def test_histograms_exported_in_seconds():
+    transport = FakeTransport()
+    for ms in (3, 40, 2000):
+        transport.stats.observe('/login', 'total', ms)
+    transport.stats.error('/login')
+    text = metrics_text(transport=transport)
+    found = samples(text)
+    name = 'qldt_http_request_duration_seconds'
+    labels = 'endpoint="/login",phase="total"'
+    assert '# TYPE qldt_http_request_duration_seconds histogram' in text
+    assert found[f'{name}_bucket{{{labels},le="0.005"}}'] == '1'
+    assert found[f'{name}_bucket{{{labels},le="0.05"}}'] == '2'
+    assert found[f'{name}_bucket{{{labels},le="2.5"}}'] == '3'
+    assert found[f'{name}_bucket{{{labels},le="+Inf"}}'] == '3'
+    assert float(found[f'{name}_sum{{{labels}}}']) == 2.043
+    assert found[f'{name}_count{{{labels}}}'] == '3'
+    assert found['qldt_http_errors_total{endpoint="/login"}'] == '1'
+    assert 'milliseconds' not in text
+
+
+def test_scheduler_families():
+    scheduler = RequestScheduler(concurrency=2)
+    with scheduler.slot('register'):
+        pass
+    found = samples(metrics_text(scheduler=scheduler))
+    assert found['qldt_scheduler_admitted_total{class="register"}'] == '1'
+    assert found['qldt_scheduler_duration_seconds_count{class="register",phase="wait"}'] == '1'
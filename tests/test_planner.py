@@ -0,0 +1,76 @@
+"""plan_timetables: mọi phương án hợp lệ, khớp với phép duyệt vét cạn"""
+import itertools
+import random
+
+from qldt.cart import Cart, CartEntry
+from qldt.planner import Option, plan_timetables
+from qldt.timetable import ClashChecker, schedule_mask, slots_clash
+from qldt.tkb import parse_tkb
+
+# Nửa đầu, nửa sau và cả học kỳ: các lớp trùng tiết nhưng khác khoảng ngày không bị coi là trùng lịch
+DATE_RANGES = ['01/09/25 đến 20/10/25', '21/10/25 đến 15/12/25', '01/09/25 đến 15/12/25']
+
+
+def option(key, tkb):
+    slots = parse_tkb(tkb)
+    return Option(key, key, slots, schedule_mask(slots))
+
+
+def random_tkb(rng):
+    parts = []
+    for _ in range(rng.randint(1, 2)):
+        start = rng.randint(1, 10)
+        parts.append(f"Thứ {rng.randint(2, 4)},tiết {start}-{start + rng.randint(1, 2)},Phòng A{rng.randint(1, 9)},"
+                     f"{rng.choice(DATE_RANGES)}")
+    return '<hr>'.join(parts)
+
+
+def brute_force(candidates, fixed):
+    subjects = list(candidates)
+    plans = set()
+    for combo in itertools.product(*(candidates[s] for s in subjects)):
+        chosen = list(fixed) + list(combo)
+        if not any(slots_clash(a.slots, b.slots) for a, b in itertools.combinations(chosen, 2)):
+            plans.add(tuple(sorted(zip(subjects, (o.key for o in combo)))))
+    return plans
+
+
+def test_plans_match_brute_force():
+    rng = random.Random(7)
+    for _ in range(40):
+        candidates = {f"M{s}": [option(f"M{s}-{k}", random_tkb(rng)) for k in range(rng.randint(1, 4))]
+                      for s in range(rng.randint(1, 4))}
+        fixed = [option('fixed', random_tkb(rng))] if rng.random() < 0.5 else []
+        plans, complete = plan_timetables(candidates, fixed, time_budget=60, max_results=10 ** 6)
+        assert complete
+        found = [tuple(sorted((s, o.key) for s, o in plan.items())) for plan in plans]
+        assert len(found) == len(set(found))
+        assert set(found) == brute_force(candidates, fixed)
+
+
+def test_max_results_marks_incomplete():
+    candidates = {f"M{s}": [option(f"M{s}-{d}", f"Thứ {d},tiết {s * 3 + 1}-{s * 3 + 2}") for d in range(2, 8)]
+                  for s in range(3)}
+    plans, complete = plan_timetables(candidates, max_results=5)
+    assert len(plans) == 5 and not complete
+
+
+def test_plan_replaces_cart_entries_of_same_subject():
+    cart = Cart([CartEntry('old-A', 'A cũ', 'MHA', parse_tkb('Thứ 2,tiết 1-3')),
+                 CartEntry('other', 'Môn khác', 'MHC', parse_tkb('Thứ 6,tiết 1-3'))])
+    candidates = {'MHA': [option('A-2', 'Thứ 2,tiết 2-4')], 'MHB': [option('B-1', 'Thứ 3,tiết 1-3')]}
+    # Như planner_panel: lớp trong giỏ thuộc môn đang xếp không phải lịch cố định
+    fixed = [Option(e.id, e.label, e.slots, e.mask) for e in cart if e.code not in candidates]
+    plans, _ = plan_timetables(candidates, fixed)
+    plan = plans[0]
+
+    removed = cart.remove_subjects(plan)
+    for ma, chosen in plan.items():
+        cart.add(CartEntry(chosen.key, chosen.label, ma, chosen.slots, chosen.mask))
+
+    assert [e.id for e in removed] == ['old-A']
+    assert [e.id for e in cart] == ['other', 'A-2', 'B-1']
+    checker = ClashChecker()
+    for entry in cart:
+        assert checker.clashes(entry.slots) == []
+        checker.add(entry.id, entry.label, entry.slots)
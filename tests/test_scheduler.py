@@ -0,0 +1,86 @@
+"""RequestScheduler: cấp lượt theo ưu tiên, cùng loại theo thứ tự đến"""
+import threading
+import time
+
+import pytest
+
+from qldt.scheduler import CATALOGUE, COURSES, LOGIN, REGISTER, RequestScheduler, SchedulerBusy
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_higher_priority_admitted_first():
+    scheduler = RequestScheduler(concurrency=1, max_wait=10)
+    order = []
+    release = threading.Event()
+
+    def hold():
+        with scheduler.slot(CATALOGUE):
+            release.wait()
+
+    def request(priority, name):
+        with scheduler.slot(priority):
+            order.append(name)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    wait_until(lambda: scheduler.counters()[CATALOGUE][1] == 1)
+
+    threads = []
+    for priority, name in [(CATALOGUE, 'catalogue'), (COURSES, 'courses-1'), (LOGIN, 'login'),
+                           (COURSES, 'courses-2'), (REGISTER, 'register')]:
+        queued = scheduler.counters()[priority][0]
+        thread = threading.Thread(target=request, args=(priority, name))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: scheduler.counters()[priority][0] == queued + 1)
+
+    release.set()
+    for thread in [holder] + threads:
+        thread.join(5)
+    assert order == ['register', 'login', 'courses-1', 'courses-2', 'catalogue']
+
+
+def test_catalogue_capped_below_concurrency():
+    scheduler = RequestScheduler(concurrency=4, max_wait=0.05)
+    with scheduler.slot(CATALOGUE), scheduler.slot(CATALOGUE):
+        with pytest.raises(SchedulerBusy) as excinfo:
+            with scheduler.slot(CATALOGUE):
+                pass
+        assert excinfo.value.reason == 'timeout'
+        # Vẫn còn lượt cho đăng ký
+        with scheduler.slot(REGISTER):
+            pass
+
+
+def test_queue_full_rejected():
+    scheduler = RequestScheduler(concurrency=1, queue_size=1, max_wait=5)
+    release = threading.Event()
+
+    def hold():
+        with scheduler.slot(COURSES):
+            release.wait()
+
+    def waiter():
+        with scheduler.slot(COURSES):
+            pass
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    wait_until(lambda: scheduler.counters()[COURSES][1] == 1)
+    queued = threading.Thread(target=waiter)
+    queued.start()
+    wait_until(lambda: scheduler.counters()[COURSES][0] == 1)
+    with pytest.raises(SchedulerBusy) as excinfo:
+        with scheduler.slot(COURSES):
+            pass
+    assert excinfo.value.reason == 'queue_full'
+    release.set()
+    holder.join(5)
+    queued.join(5)
+    assert scheduler.counters()[COURSES] == (0, 0, 2, 1)
@@ -0,0 +1,65 @@
+"""SectionIndex: kết quả tìm kiếm khớp với phép quét tuần tự"""
+import random
+
+from qldt.search import SectionIndex, fold
+
+NAMES = ['Kinh tế vĩ mô', 'Kinh tế vi mô', 'Tiếng Anh thương mại', 'Luật kinh doanh quốc tế',
+         'Đàm phán quốc tế', 'Marketing căn bản', 'Quản trị học', 'Toán cao cấp', 'Triết học Mác - Lênin']
+QUERIES = ['kinh te', 'KINH TẾ', 'vi mo', 'vĩ', 'quốc tế', 'dam phan', 'KTE', 'kte2', 'KTE201', 'tan',
+           'anh thuong', 'te kinh', 'mác lênin', 'marketing 03', 'xyz', 'ma', 'mô kinh']
+
+
+def make_sections(n=400, seed=1):
+    rng = random.Random(seed)
+    sections = []
+    for i in range(n):
+        name = rng.choice(NAMES)
+        code = f"{rng.choice(['KTE', 'TAN', 'PLU', 'TMA', 'TOA'])}{rng.randint(100, 320)}"
+        sections.append({'id_to_hoc': str(i), 'ma_mon': code, 'ten_mon': name, 'nhom_to': f"{rng.randint(1, 12):02d}"})
+    return sections
+
+
+def naive(sections, query):
+    """Quét từng dòng: khớp cả cụm, nếu không dòng nào khớp thì khớp từng từ"""
+    query = fold(query)
+    docs = [f"{fold(s['ma_mon'])} {fold(s['ten_mon'])} {fold(s['nhom_to'])}" for s in sections]
+    hits = {i for i, doc in enumerate(docs) if query in doc}
+    if not hits and len(query.split()) > 1:
+        hits = {i for i, doc in enumerate(docs) if all(t in doc for t in query.split())}
+    return hits
+
+
+def test_search_matches_naive_scan():
+    sections = make_sections()
+    index = SectionIndex(sections)
+    for query in QUERIES:
+        ranked, _ = index.search(query, limit=None)
+        assert len(ranked) == len(set(ranked))
+        assert set(ranked) == naive(sections, query), query
+
+
+def test_limit_keeps_ranking_prefix():
+    index = SectionIndex(make_sections())
+    for query in QUERIES:
+        ranked, _ = index.search(query, limit=None)
+        assert index.search(query, limit=10)[0] == ranked[:10]
+
+
+def test_exact_code_ranks_first():
+    sections = make_sections()
+    index = SectionIndex(sections)
+    code = sections[0]['ma_mon']
+    ranked, _ = index.search(code.lower(), limit=None)
+    exact = sum(1 for s in sections if s['ma_mon'] == code)
+    assert all(sections[i]['ma_mon'] == code for i in ranked[:exact])
+
+
+def test_narrowing_within_previous_hits():
+    sections = make_sections()
+    index = SectionIndex(sections)
+    within = None
+    for end in range(1, len('kinh te vi') + 1):
+        typed = 'kinh te vi'[:end]
+        ranked, hits = index.search(typed, limit=None, within=within)
+        assert set(ranked) == naive(sections, typed), typed
+        within = hits
@@ -0,0 +1,121 @@
+"""SeatPoller: mỗi phiên chỉ nhận thay đổi số chỗ của lớp mình theo dõi; quét không dựng lại chỉ mục"""
+import threading
+import time
+
+from qldt.catalogue import CatalogueCache
+from qldt.search import SectionIndex
+from qldt.seats import QUEUE_SIZE, SeatPoller
+from qldt.snapshot import SnapshotStore
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+class CountingStore(SnapshotStore):
+    def __init__(self, path):
+        super().__init__(path)
+        self.saves = 0
+        self.saved = threading.Event()
+
+    def save(self, table, fetched_at=None):
+        self.saves += 1
+        try:
+            return super().save(table, fetched_at)
+        finally:
+            self.saved.set()
+
+
+def started_poller(make_table, store=None):
+    """Cache đã có bản đầu (sl_cl = 0), hai phiên theo dõi hai lớp khác nhau, lượt quét đầu đã chạy xong"""
+    cache = CatalogueCache(ttl=60, store=store)
+    cache.put(make_table())
+    if store is not None:
+        wait_until(lambda: store.saves == 1)
+    source = {'table': make_table(), 'tokens': []}
+
+    def fetch(token):
+        source['tokens'].append(token)
+        return source['table']
+
+    poller = SeatPoller(cache, fetch, interval=3600)
+    poller.watch('s1', '1000', 'tok-1')
+    poller.watch('s2', '1001', 'tok-2')
+    wait_until(lambda: poller.stats()['polls'] == 1)
+    return cache, poller, source
+
+
+def test_changes_go_only_to_watching_sessions(make_table):
+    cache, poller, source = started_poller(make_table)
+    assert poller.drain('s1') == [] and poller.drain('s2') == []
+
+    source['table'] = make_table(seats={0: 4, 2: 9})
+    poller.poll('tok-2')
+    changes = poller.drain('s1')
+    assert [(c.id_to_hoc, c.old_cl, c.new_cl, c.status) for c in changes] == [('1000', 0, 4, 'open')]
+    assert poller.drain('s1') == [] and poller.drain('s2') == []
+    assert cache.current().sections[0]['sl_cl'] == 4
+    assert poller.stats()['changes'] == 1
+
+    source['table'] = make_table(seats={0: 4, 1: 2})
+    poller.poll('tok-2')
+    assert poller.drain('s1') == []
+    assert [(c.id_to_hoc, c.new_cl, c.status) for c in poller.drain('s2')] == [('1001', 2, 'open')]
+
+
+def test_removed_section_is_reported_gone(make_table):
+    _, poller, source = started_poller(make_table)
+    source['table'] = make_table(1)
+    poller.poll('tok')
+    assert poller.drain('s1') == []
+    [change] = poller.drain('s2')
+    assert (change.id_to_hoc, change.new_cl, change.status) == ('1001', None, 'gone')
+
+
+def test_queue_is_bounded(make_table):
+    _, poller, source = started_poller(make_table)
+    for n in range(QUEUE_SIZE + 5):
+        source['table'] = make_table(seats={0: n + 1})
+        poller.poll('tok')
+    changes = poller.drain('s1')
+    assert len(changes) == QUEUE_SIZE and changes[-1].new_cl == QUEUE_SIZE + 5
+
+
+def test_unwatch(make_table):
+    _, poller, source = started_poller(make_table)
+    poller.watch('s1', '1002', 'tok-1')
+    poller.unwatch('s1', '1000')
+    assert poller.watched('s1') == {'1002'}
+    poller.unwatch('s2')
+    assert poller.watched('s2') == set() and poller.stats()['watchers'] == 1
+    source['table'] = make_table(seats={1: 5, 2: 5})
+    poller.poll('tok')
+    assert [c.id_to_hoc for c in poller.drain('s1')] == ['1002']
+    assert poller.drain('s2') == []
+
+
+def test_seat_only_poll_keeps_derived_and_skips_disk(tmp_path, make_table):
+    store = CountingStore(str(tmp_path / 'catalogue.sqlite3'))
+    cache, poller, source = started_poller(make_table, store)
+    before = cache.current()
+    index = before.derived('search_index', SectionIndex)
+
+    source['table'] = make_table(seats={0: 7})
+    poller.poll('tok')
+    after = cache.current()
+    assert after.version > before.version
+    assert after.derived('search_index', SectionIndex) is index
+    assert after.sections[0]['sl_cl'] == 7 and before.sections[0]['sl_cl'] == 0
+    assert after.sections.columns['slots'] is before.sections.columns['slots']
+    time.sleep(0.05)
+    assert store.saves == 1
+
+    # Danh sách lớp đổi: dựng lại chỉ mục và ghi đĩa
+    store.saved.clear()
+    source['table'] = make_table(7)
+    poller.poll('tok')
+    assert cache.current().derived('search_index', SectionIndex) is not index
+    assert store.saved.wait(5) and store.saves == 2
@@ -0,0 +1,93 @@
+"""SnapshotStore: lưu rồi nạp lại đúng bảng; CatalogueCache không bắt các phiên chờ ghi đĩa"""
+import os
+import sqlite3
+import threading
+import time
+
+from qldt.catalogue import CatalogueCache
+from qldt.snapshot import SnapshotStore
+
+
+def rows(table):
+    return [row.to_dict() for row in table]
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_round_trip(tmp_path, make_table):
+    store = SnapshotStore(str(tmp_path / 'qldt' / 'catalogue.sqlite3'))
+    assert store.load() is None and store.fetched_at() is None
+    table = make_table(30, sl_cl=5)
+    assert store.save(table, 1000.5)
+    loaded, fetched_at = store.load()
+    assert fetched_at == store.fetched_at() == 1000.5
+    assert rows(loaded) == rows(table)
+    assert [row['ten_mon'] for row in loaded][:3] == ['Môn học 0', 'Môn học 1', 'Môn học 2']
+    assert loaded.columns['mask'] == table.columns['mask']
+    assert os.listdir(tmp_path / 'qldt') == ['catalogue.sqlite3']
+
+
+def test_older_save_is_skipped(tmp_path, make_table):
+    store = SnapshotStore(str(tmp_path / 'catalogue.sqlite3'))
+    assert store.save(make_table(4), 2000.0)
+    assert not store.save(make_table(9), 1999.0)
+    assert not store.save(make_table(9), 2000.0)
+    assert len(store.load()[0]) == 4
+    assert store.save(make_table(9), 2001.0) and len(store.load()[0]) == 9
+
+
+def test_unknown_format_is_ignored(tmp_path, make_table):
+    store = SnapshotStore(str(tmp_path / 'catalogue.sqlite3'))
+    store.save(make_table(), 1.0)
+    conn = sqlite3.connect(store.path)
+    conn.execute("UPDATE meta SET value = 'khác' WHERE key = 'format'")
+    conn.commit()
+    conn.close()
+    assert store.load() is None and store.fetched_at() is None
+
+
+def test_cache_loads_store_on_start(tmp_path, make_table):
+    store = SnapshotStore(str(tmp_path / 'catalogue.sqlite3'))
+    store.save(make_table(7), time.time())
+    cache = CatalogueCache(ttl=60, store=store)
+
+    def fetch():
+        raise AssertionError('không được tải')
+
+    snapshot = cache.get(fetch)
+    assert snapshot.source == 'disk' and len(snapshot.sections) == 7
+
+
+class SlowStore(SnapshotStore):
+    """Ghi đĩa bị chặn tới khi release được set"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.release = threading.Event()
+
+    def save(self, table, fetched_at=None):
+        self.release.wait(5)
+        return super().save(table, fetched_at)
+
+
+def test_waiters_do_not_wait_for_disk_write(tmp_path, make_table):
+    store = SlowStore(str(tmp_path / 'catalogue.sqlite3'))
+    cache = CatalogueCache(ttl=60, store=store)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(lambda: make_table(5))))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    # Mọi phiên đã có snapshot trong khi tệp vẫn chưa được ghi
+    assert len(results) == 4 and all(r is results[0] for r in results)
+    assert store.fetched_at() is None
+    store.release.set()
+    wait_until(lambda: store.fetched_at() == results[0].fetched_at)
+    assert len(store.load()[0]) == 5 and cache.stats()['store_errors'] == 0
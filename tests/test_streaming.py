@@ -0,0 +1,50 @@
+"""Đọc dần phản hồi w-locdsnhomto: kết quả phải giống hệt json.loads ở mọi cách chia đoạn"""
+import json
+
+from qldt.columnar import SectionTable
+from qldt.streaming import MON_HOC_PATH, NHOM_TO_PATH, iter_arrays, parse_sections
+
+PAYLOAD = json.dumps({
+    'data': {
+        'x': 1.5,
+        'y': -2.5e-3,
+        'z': [12345, 6E+2, -0.0, True, None],
+        'meta': {'ratio': 0.75, 'note': 'Học kỳ 1 – năm 2025'},
+        'ds_nhom_to': [
+            {'id_to_hoc': '1001', 'ma_mon': 'KTE201 ', 'nhom_to': '01', 'to': '', 'so_tc': '3', 'lop': 'K62',
+             'sl_cp': 60, 'sl_cl': 12, 'diem': 8.25, 'he_so': 1e3,
+             'tkb': 'Thứ 2,tiết 1-3,Phòng A101,GV Nguyễn Văn A,01/09/25 đến 15/12/25'},
+            {'id_to_hoc': '1002', 'ma_mon': 'ENG101', 'nhom_to': '02', 'to': '1', 'so_tc': '2', 'lop': 'K63',
+             'sl_cp': 45, 'sl_cl': 0, 'diem': -1.5E-2, 'he_so': 2.0,
+             'tkb': 'Thứ 5,tiết 7-9,Phòng B202,GV Trần Thị B,01/09/25 đến 15/12/25'},
+        ],
+        'ds_mon_hoc': [{'ma': 'KTE201', 'ten': 'Kinh tế vĩ mô', 'tc': 3.0}, {'ma': 'ENG101', 'ten': 'Tiếng Anh'}],
+        'total': 2.0e0,
+    },
+}, ensure_ascii=False).encode('utf-8')
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_iter_arrays_matches_json_loads_at_every_chunk_size():
+    data = json.loads(PAYLOAD)['data']
+    expected = [(NHOM_TO_PATH, item) for item in data['ds_nhom_to']] + \
+               [(MON_HOC_PATH, item) for item in data['ds_mon_hoc']]
+    for size in range(1, len(PAYLOAD) + 1):
+        assert list(iter_arrays(chunked(PAYLOAD, size), (NHOM_TO_PATH, MON_HOC_PATH))) == expected, size
+
+
+def test_number_split_after_dot():
+    chunks = [b'{"data":{"x":1.', b'5, "ds_nhom_to":[2.', b'5e', b'-1]}}']
+    assert list(iter_arrays(chunks, (NHOM_TO_PATH,))) == [(NHOM_TO_PATH, 0.25)]
+
+
+def test_parse_sections_matches_from_records_at_every_chunk_size():
+    data = json.loads(PAYLOAD)['data']
+    expected = SectionTable.from_records(data['ds_nhom_to'], data['ds_mon_hoc'])
+    rows = [row.to_dict() for row in expected]
+    for size in range(1, len(PAYLOAD) + 1):
+        table = parse_sections(chunked(PAYLOAD, size))
+        assert [row.to_dict() for row in table] == rows, size
@@ -0,0 +1,82 @@
+"""schedule_mask, slots_clash và ClashChecker so với phép kiểm tra từng tiết"""
+import random
+
+from qldt.timetable import PERIODS_PER_DAY, ClashChecker, schedule_mask, slots_clash
+from qldt.tkb import parse_tkb
+
+DATE_RANGES = ['01/09/25 đến 20/10/25', '21/10/25 đến 15/12/25', '01/09/25 đến 15/12/25', '']
+
+
+def periods(slots):
+    """Tập (thứ, tiết) của một lịch"""
+    return {(slot.weekday, p) for slot in slots if slot.weekday and slot.start_period
+            for p in range(slot.start_period, min(slot.end_period, PERIODS_PER_DAY) + 1)}
+
+
+def naive_clash(a, b):
+    for sa in a:
+        for sb in b:
+            if not periods((sa,)) & periods((sb,)):
+                continue
+            if not (sa.start_date and sb.start_date) or (sa.start_date <= sb.end_date and sb.start_date <= sa.end_date):
+                return True
+    return False
+
+
+def random_tkb(rng):
+    parts = []
+    for _ in range(rng.randint(1, 3)):
+        start = rng.randint(1, 14)
+        day = rng.choice(['Thứ 2', 'Thứ 3', 'Thứ 7', 'Chủ nhật'])
+        parts.append(f"{day},tiết {start}-{start + rng.randint(0, 3)},{rng.choice(DATE_RANGES)}")
+    return '<hr>'.join(parts)
+
+
+def test_mask_bits():
+    assert schedule_mask(parse_tkb('Thứ 2,tiết 1-3')) == 0b111
+    assert schedule_mask(parse_tkb('Thứ 3,tiết 2')) == 1 << (PERIODS_PER_DAY + 1)
+    assert schedule_mask(parse_tkb('Chủ nhật,tiết 1')) == 1 << (6 * PERIODS_PER_DAY)
+    assert schedule_mask(parse_tkb('Thứ 2,tiết 15-20')) == 0b11 << 14
+    assert schedule_mask(parse_tkb('Phòng A101')) == 0
+    assert schedule_mask(parse_tkb('Thứ 2,tiết 1-2<hr>Thứ 2,tiết 4')) == 0b1011
+
+
+def test_mask_overlap_matches_period_sets():
+    rng = random.Random(3)
+    for _ in range(500):
+        a, b = parse_tkb(random_tkb(rng)), parse_tkb(random_tkb(rng))
+        assert bin(schedule_mask(a)).count('1') == len(periods(a))
+        assert bool(schedule_mask(a) & schedule_mask(b)) == bool(periods(a) & periods(b))
+        assert slots_clash(a, b) == naive_clash(a, b)
+
+
+def test_disjoint_date_ranges_do_not_clash():
+    first_half = parse_tkb('Thứ 2,tiết 1-3,01/09/25 đến 20/10/25')
+    second_half = parse_tkb('Thứ 2,tiết 2-4,21/10/25 đến 15/12/25')
+    undated = parse_tkb('Thứ 2,tiết 3')
+    assert schedule_mask(first_half) & schedule_mask(second_half)
+    assert not slots_clash(first_half, second_half)
+    assert slots_clash(first_half, undated) and slots_clash(undated, second_half)
+
+
+def test_clash_checker_matches_pairwise_check():
+    rng = random.Random(5)
+    for _ in range(100):
+        fixed = [(str(k), f"Lớp {k}", parse_tkb(random_tkb(rng))) for k in range(rng.randint(0, 4))]
+        checker = ClashChecker()
+        for key, label, slots in fixed:
+            checker.add(key, label, slots)
+        candidate = parse_tkb(random_tkb(rng))
+        expected = [label for _, label, slots in fixed if naive_clash(candidate, slots)]
+        assert checker.clashes(candidate) == expected
+        assert checker.clashes(candidate, mask=schedule_mask(candidate)) == expected
+
+
+def test_clash_checker_exclude():
+    checker = ClashChecker()
+    slots = parse_tkb('Thứ 4,tiết 7-9')
+    checker.add('1', 'Lớp đang xét', slots)
+    checker.add('2', 'Lớp khác', parse_tkb('Thứ 4,tiết 9-10'))
+    assert checker.clashes(slots) == ['Lớp đang xét', 'Lớp khác']
+    assert checker.clashes(slots, exclude='1') == ['Lớp khác']
+    assert checker.clashes(parse_tkb('Thứ 5,tiết 7-9')) == []
@@ -0,0 +1,62 @@
+"""Transport: request trả 5xx được tính là lỗi theo endpoint"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from qldt.metrics import metrics_text
+from qldt.transport import DEFAULT_PROXY, Transport
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0) or 0))
+        status = 500 if self.path == '/fail' else 200
+        body = json.dumps({'result': status == 200}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_server_errors_are_counted(base_url):
+    transport = Transport()
+    assert transport.post(f"{base_url}/ok", endpoint='ok').status_code == 200
+    assert transport.post(f"{base_url}/fail", endpoint='fail').status_code == 500
+    transport.post(f"{base_url}/fail", endpoint='fail')
+
+    assert transport.stats.errors == {'fail': 2}
+    totals = {row['endpoint']: row for row in transport.stats.snapshot() if row['phase'] == 'total'}
+    assert totals['ok']['errors'] == 0
+    assert totals['fail']['errors'] == 2 and totals['fail']['count'] == 2
+    assert 'qldt_http_errors_total{endpoint="fail"} 2' in metrics_text(transport=transport)
+
+
+def test_stream_server_error_counted_once(base_url):
+    transport = Transport()
+    with pytest.raises(Exception):
+        transport.post_stream(f"{base_url}/fail", lambda resp, chunks: b''.join(chunks), endpoint='fail')
+    assert transport.stats.errors == {'fail': 1}
+
+
+def test_from_env_proxy_default(monkeypatch):
+    monkeypatch.delenv('QLDT_PROXY', raising=False)
+    assert Transport.from_env().session.proxies == {'http': DEFAULT_PROXY, 'https': DEFAULT_PROXY}
+    monkeypatch.setenv('QLDT_PROXY', '')
+    assert Transport.from_env().session.proxies == {}